@@ -2,16 +2,37 @@ import cv2
 import numpy as np
 import time
 
+from capture import ThreadedCapture
+from event_log import EVENTS, event_log_from_argv
+from frame_sources import source_from_argv
+from haar_tracker import RoiFaceTracker
+from metrics import PipelineMetrics, metrics_server_from_argv
+from pipeline_trace import TRACER, trace_from_argv
+from startup import STARTUP
+
+# Teks aksi per arah untuk event log / console
+ACTION_TEXT = {
+    "LEFT": "Gerak ke KIRI - simulasi TV Channel Down / Volume Down",
+    "RIGHT": "Gerak ke KANAN - simulasi TV Channel Up / Volume Up",
+    "CENTER": "NETRAL - tidak ada aksi",
+}
+
 class HeadTrackingRemote:
-    def __init__(self):
+    def __init__(self, source=0, roi_tracking=True):
         # Initialize face cascade classifier
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
         
+        # ROI tracking: cari wajah hanya di sekitar posisi sebelumnya,
+        # full-frame rescan tiap 15 frame atau saat wajah hilang
+        self.roi_tracking = roi_tracking
+        self.face_tracker = RoiFaceTracker(self.face_cascade, rescan_interval=15)
+        
         # Camera setup
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        self.cap = ThreadedCapture(source, width=640, height=480)
+        
+        # Metric per stage (disajikan lewat HTTP jika --metrics-port diberikan)
+        self.metrics = PipelineMetrics('head_tracking', self.cap)
         
         # Control parameters
         self.center_x = 320  # Center of frame
@@ -24,13 +45,17 @@ class HeadTrackingRemote:
         print("- Hadapkan wajah ke kamera")
         print("- Putar kepala ke kiri untuk kontrol KIRI")
         print("- Putar kepala ke kanan untuk kontrol KANAN")
+        print("- Tekan 't' untuk toggle ROI tracking / full-frame")
         print("- Tekan 'q' untuk keluar")
         print("=====================================\n")
 
     def detect_head_direction(self, frame):
         """Deteksi arah kepala berdasarkan posisi wajah dan mata"""
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+        if self.roi_tracking:
+            faces = self.face_tracker.detect(gray)
+        else:
+            faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
         
         direction = "CENTER"
         
@@ -85,41 +110,39 @@ class HeadTrackingRemote:
     def send_control_command(self, direction):
         """Kirim perintah kontrol dan tampilkan di terminal"""
         if direction != self.last_command:
+            start = time.perf_counter()
             self.command_count[direction] += 1
-            timestamp = time.strftime("%H:%M:%S")
-            
-            print(f"[{timestamp}] KONTROL: {direction}")
-            
-            if direction == "LEFT":
-                print(">>> AKSI: Gerak ke KIRI <<<")
-                print("    (Simulasi: TV Channel Down / Volume Down)")
-            elif direction == "RIGHT":
-                print(">>> AKSI: Gerak ke KANAN <<<")
-                print("    (Simulasi: TV Channel Up / Volume Up)")
-            else:
-                print(">>> AKSI: NETRAL <<<")
-                print("    (Simulasi: Tidak ada aksi)")
-            
-            print("-" * 50)
+            STARTUP.mark('first_action')
+            EVENTS.emit('control', f"KONTROL: {direction} ({ACTION_TEXT[direction]})",
+                        controller='head_tracking', direction=direction)
             self.last_command = direction
+            self.metrics.output(direction, start)
 
     def run(self):
         """Jalankan sistem head tracking"""
         try:
             while True:
+                self.metrics.begin_frame()
+                frame_start = t = TRACER.begin_frame()
                 ret, frame = self.cap.read()
                 if not ret:
                     print("Error: Tidak dapat membaca dari kamera")
                     break
+                self.metrics.mark('capture')
+                t = TRACER.span('read', t)
                 
                 # Flip frame horizontal untuk efek mirror
                 frame = cv2.flip(frame, 1)
+                t = TRACER.span('flip', t)
                 
                 # Deteksi arah kepala
                 direction, processed_frame = self.detect_head_direction(frame)
+                self.metrics.mark('inference')
+                t = TRACER.span('process', t)
                 
                 # Kirim perintah kontrol
                 self.send_control_command(direction)
+                t = TRACER.span('output', t)
                 
                 # Tampilkan statistik di frame
                 y_pos = 400
@@ -127,13 +150,26 @@ class HeadTrackingRemote:
                     cv2.putText(processed_frame, f"{cmd}: {count}", (10, y_pos), 
                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
                     y_pos += 25
+                self.metrics.mark('features')
+                t = TRACER.span('draw', t)
                 
                 # Tampilkan frame
                 cv2.imshow('Head Tracking Remote Control', processed_frame)
+                t = TRACER.span('imshow', t)
                 
+                key = cv2.waitKey(1) & 0xFF
+                TRACER.span('waitKey', t)
+                TRACER.handle_key(key)
+                self.metrics.mark('render')
+                self.metrics.end_frame()
+                TRACER.end_frame(frame_start)
                 # Keluar jika tekan 'q'
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                if key == ord('q'):
                     break
+                elif key == ord('t'):
+                    self.roi_tracking = not self.roi_tracking
+                    self.face_tracker.reset()
+                    print(f"ROI tracking: {'ON' if self.roi_tracking else 'OFF'}")
                     
         except KeyboardInterrupt:
             print("\nProgram dihentikan oleh user")
@@ -143,11 +179,20 @@ class HeadTrackingRemote:
 
     def cleanup(self):
         """Bersihkan resources"""
+        # Tulis event yang masih di ring sebelum statistik
+        EVENTS.flush()
         print("\n=== STATISTIK PENGGUNAAN ===")
         for cmd, count in self.command_count.items():
             print(f"{cmd}: {count} kali")
         print("===========================")
         
+        stats = self.face_tracker.get_stats()
+        print(f"Face tracker: {stats['roi_scans']} ROI scan, {stats['full_scans']} full scan, "
+              f"{stats['losses']} loss")
+        print(STARTUP.summary())
+        print(self.cap.summary())
+        print(EVENTS.summary())
+        self.metrics.close()
         self.cap.release()
         cv2.destroyAllWindows()
         print("Program selesai. Terima kasih!")
@@ -157,8 +202,16 @@ def main():
     print(f"OpenCV Version: {cv2.__version__}")
     
     # Inisialisasi dan jalankan head tracking remote
-    remote = HeadTrackingRemote()
+    metrics_server, argv = metrics_server_from_argv()
+    events, argv = event_log_from_argv(argv)
+    tracer, argv = trace_from_argv(argv)
+    remote = HeadTrackingRemote(source_from_argv(argv))
     remote.run()
+    events.close()
+    if tracer.enabled:
+        tracer.export()
+    if metrics_server is not None:
+        metrics_server.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,8 +4,20 @@ import pyautogui
 import time
 from collections import deque
 
+from calibration_store import CalibrationStore, DriftCheck
+from capture import ThreadedCapture
+from event_log import EVENTS, event_log_from_argv
+from frame_sources import source_from_argv
+from metrics import PipelineMetrics, metrics_server_from_argv
+from output_dispatcher import CursorDispatcher
+from pipeline_trace import TRACER, trace_from_argv
+from startup import STARTUP
+
 class EyeCursorController:
-    def __init__(self):
+    def __init__(self, source=0):
+        # Sumber frame: index kamera, file video, folder gambar, atau 'synthetic'
+        self.source = source
+        
         # Initialize face and eye cascade classifiers
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
@@ -30,6 +42,12 @@ class EyeCursorController:
         self.calibration_points = []
         self.eye_bounds = None
         
+        # Saved calibration profile (per user + camera resolution), validated on the first frames
+        self.calibration_store = CalibrationStore()
+        self.profile_size = None
+        self.profile_check = None
+        self.drift_margin = 0.25  # Bounds expansion (fraction of span) tolerated before recalibrating
+        
         # Sensitivity settings
         self.cursor_sensitivity = 2.0
         self.smooth_factor = 0.3
@@ -37,6 +55,12 @@ class EyeCursorController:
         # Disable pyautogui failsafe
         pyautogui.FAILSAFE = False
         
+        # Metric per stage (disajikan lewat HTTP jika --metrics-port diberikan)
+        self.metrics = PipelineMetrics('eye_cursor_haar')
+        
+        # Output mouse dikirim dari thread terpisah (tidak memblokir loop vision)
+        self.cursor_output = CursorDispatcher(metrics=self.metrics)
+        
     def detect_eyes(self, frame):
         """Detect eyes in the frame"""
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
@@ -94,10 +118,54 @@ class EyeCursorController:
                 }
                 
                 self.calibrated = True
+                self.calibration_store.save('eye_cursor', *self.profile_size, eye_bounds=self.eye_bounds)
                 print("Kalibrasi selesai! Gerakkan mata untuk mengontrol kursor.")
                 
         return self.calibrated
     
+    def load_calibration_profile(self, width, height):
+        """Load saved eye_bounds for this resolution (once) and start validating them"""
+        if self.profile_size == (width, height):
+            return
+        self.profile_size = (width, height)
+        profile = self.calibration_store.load('eye_cursor', width, height)
+        if not profile or 'eye_bounds' not in profile:
+            return
+        
+        self.eye_bounds = profile['eye_bounds']
+        self.calibrated = True
+        bounds = self.eye_bounds
+        margin_x = (bounds['max_x'] - bounds['min_x']) * self.drift_margin
+        margin_y = (bounds['max_y'] - bounds['min_y']) * self.drift_margin
+        
+        def check(samples):
+            # Most early eye positions must fall inside the (slightly expanded) saved bounds
+            inside = ((samples[:, 0] >= bounds['min_x'] - margin_x) & (samples[:, 0] <= bounds['max_x'] + margin_x) &
+                      (samples[:, 1] >= bounds['min_y'] - margin_y) & (samples[:, 1] <= bounds['max_y'] + margin_y))
+            return inside.mean() >= 0.8
+        
+        self.profile_check = DriftCheck(check)
+        print("Profil kalibrasi dimuat, memvalidasi...")
+    
+    def validate_calibration_profile(self, eye_center):
+        """Compare early frames with the saved profile; fall back to full calibration on drift"""
+        verdict = self.profile_check.add(eye_center)
+        if verdict is None:
+            return
+        self.profile_check = None
+        if verdict:
+            print("Profil kalibrasi valid.")
+        else:
+            print("Posisi mata bergeser dari profil tersimpan, kalibrasi ulang...")
+            self.reset_calibration()
+    
+    def reset_calibration(self):
+        self.calibrated = False
+        self.calibration_points = []
+        self.eye_bounds = None
+        self.profile_check = None
+        self.eye_positions.clear()
+    
     def map_to_screen(self, eye_pos):
         """Map eye position to screen coordinates"""
         if not self.calibrated or not self.eye_bounds:
@@ -131,11 +199,11 @@ class EyeCursorController:
             avg_y = sum(pos[1] for pos in positions) / len(positions)
             
             # Move cursor smoothly
-            current_x, current_y = pyautogui.position()
+            current_x, current_y = self.cursor_output.position()
             new_x = int(current_x + (avg_x - current_x) * self.smooth_factor)
             new_y = int(current_y + (avg_y - current_y) * self.smooth_factor)
             
-            pyautogui.moveTo(new_x, new_y)
+            self.cursor_output.move_to(new_x, new_y)
     
     def handle_blink(self):
         """Handle blink detection and actions"""
@@ -150,33 +218,43 @@ class EyeCursorController:
         # Check for double blink
         if len(recent_blinks) >= 2:
             if current_time - self.last_blink_time > self.blink_cooldown:
-                print("Double blink detected! Performing left click...")
-                pyautogui.click()
+                EVENTS.emit('click', "Double blink detected! Performing left click...",
+                            controller='eye_cursor_haar', trigger='double_blink')
+                self.cursor_output.click()
                 self.last_blink_time = current_time
                 self.blink_times.clear()  # Clear blink history
     
     def run(self):
         """Main execution loop"""
-        cap = cv2.VideoCapture(0)
+        cap = ThreadedCapture(self.source, width=640, height=480)
         
         if not cap.isOpened():
             print("Error: Tidak dapat membuka kamera")
             return
         
         print("Memulai deteksi mata...")
-        print("Tekan 'q' untuk keluar")
+        print("Tekan 'q' untuk keluar, 'c' untuk kalibrasi ulang")
         print("Lakukan kalibrasi dengan menggerakkan mata ke berbagai arah...")
+        self.metrics.watch('capture', cap.get_stats)
         
         while True:
+            self.metrics.begin_frame()
+            frame_start = t = TRACER.begin_frame()
             ret, frame = cap.read()
             if not ret:
                 break
+            self.metrics.mark('capture')
+            t = TRACER.span('read', t)
                 
             # Flip frame horizontally for mirror effect
             frame = cv2.flip(frame, 1)
+            t = TRACER.span('flip', t)
+            self.load_calibration_profile(frame.shape[1], frame.shape[0])
             
             # Detect eyes
             eyes = self.detect_eyes(frame)
+            self.metrics.mark('inference')
+            t = TRACER.span('process', t)
             
             if len(eyes) >= 2:  # At least 2 eyes detected
                 # Use the first two eyes (left and right)
@@ -209,6 +287,9 @@ class EyeCursorController:
                     
                     eye_center = (avg_eye_x, avg_eye_y)
                     
+                    if self.profile_check is not None:
+                        self.validate_calibration_profile(eye_center)
+                    
                     # Calibration phase
                     if not self.calibrated:
                         self.calibrate(eye_center)
@@ -225,14 +306,34 @@ class EyeCursorController:
                 # Draw eye rectangles
                 for (ex, ey, ew, eh) in eyes:
                     cv2.rectangle(frame, (ex, ey), (ex + ew, ey + eh), (255, 0, 0), 2)
+            self.metrics.mark('features')
+            t = TRACER.span('features', t)
             
             # Show frame
             cv2.imshow('Eye Cursor Control', frame)
+            t = TRACER.span('imshow', t)
             
-            # Exit on 'q' key
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            # Exit on 'q' key, recalibrate on 'c'
+            key = cv2.waitKey(1) & 0xFF
+            TRACER.span('waitKey', t)
+            TRACER.handle_key(key)
+            self.metrics.mark('render')
+            self.metrics.end_frame()
+            TRACER.end_frame(frame_start)
+            if key == ord('q'):
                 break
+            if key == ord('c'):
+                self.reset_calibration()
+                print("Kalibrasi ulang...")
         
+        self.cursor_output.stop()
+        # Tulis event yang masih di ring sebelum statistik
+        EVENTS.flush()
+        print(self.cursor_output.summary())
+        print(STARTUP.summary())
+        print(cap.summary())
+        print(EVENTS.summary())
+        self.metrics.close()
         cap.release()
         cv2.destroyAllWindows()
 
@@ -246,5 +347,13 @@ if __name__ == "__main__":
         subprocess.check_call(["pip", "install", "pyautogui"])
         import pyautogui
     
-    controller = EyeCursorController()
-    controller.run()
\ No newline at end of file
+    metrics_server, argv = metrics_server_from_argv()
+    events, argv = event_log_from_argv(argv)
+    tracer, argv = trace_from_argv(argv)
+    controller = EyeCursorController(source_from_argv(argv))
+    controller.run()
+    events.close()
+    if tracer.enabled:
+        tracer.export()
+    if metrics_server is not None:
+        metrics_server.stop()
\ No newline at end of file
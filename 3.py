@@ -1,32 +1,65 @@
 import cv2
 import numpy as np
 import time
-import mediapipe as mp
+from importlib import metadata
+
+from capture import ThreadedCapture
+from event_log import EVENTS, event_log_from_argv
+from frame_sources import source_from_argv
+from head_pose import DEFAULT_ROTATION_METHOD, HeadPoseEstimator, rotation_method_from_argv
+from landmark_array import LandmarkArray
+from metrics import PipelineMetrics, metrics_server_from_argv
+from motion_gate import MotionGate, motion_gate_from_argv
+from pipeline_trace import TRACER, trace_from_argv
+from ring_buffer import RingBuffer
+from startup import STARTUP, lazy_import, parallel_startup
+
+# Diimpor saat FaceMesh dibangun (paralel dengan pembukaan kamera)
+mp = lazy_import('mediapipe')
+
+# Teks aksi per arah untuk event log / console
+ACTION_TEXT = {
+    "LEFT": "geleng kiri - Remote LEFT / Channel Down",
+    "RIGHT": "geleng kanan - Remote RIGHT / Channel Up",
+    "CENTER": "posisi tengah - Remote NETRAL",
+}
+
+# Landmark rotasi: nose tip, mata kiri, mata kanan, mulut kiri, mulut kanan, dagu
+ROTATION_LANDMARKS = np.array([10, 33, 263, 61, 291, 151])
 
 class HeadRotationRemote:
-    def __init__(self):
-        # Initialize MediaPipe Face Mesh
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    def __init__(self, source=0, rotation_method=DEFAULT_ROTATION_METHOD, motion_gate=None):
+        self.window_name = 'Head Rotation Remote Control'
+        
+        # source=None: dipasang sebagai plugin LandmarkBus (kamera dan FaceMesh milik bus)
+        self.face_mesh = None
+        self.cap = None
+        if source is not None:
+            # Camera setup paralel dengan impor mediapipe + FaceMesh + warm-up
+            self.cap, self.face_mesh = parallel_startup(
+                lambda: ThreadedCapture(source, width=640, height=480), self.create_face_mesh)
+        
+        # Motion gate: frame statis memakai ulang hasil FaceMesh terakhir
+        self.motion_gate = motion_gate or MotionGate()
         
-        # Camera setup
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        # Metric per stage (disajikan lewat HTTP jika --metrics-port diberikan)
+        self.metrics = PipelineMetrics('head_rotation', self.cap)
+        self.metrics.watch('motion_gate', self.motion_gate.get_stats)
         
         # Head rotation parameters
         self.rotation_threshold = 15  # Degree threshold untuk trigger
         self.last_command = "CENTER"
         self.command_count = {"LEFT": 0, "RIGHT": 0, "CENTER": 0}
-        self.rotation_history = []
         self.history_size = 5  # Untuk smoothing
+        self.rotation_history = RingBuffer(self.history_size)
+        
+        # Buffer landmark (N, 3) yang dipakai ulang setiap frame
+        self.landmark_array = LandmarkArray()
+        
+        # Estimasi rotasi: 'pnp' (solvePnP 3D, yaw/pitch/roll) atau 'heuristic' (asimetri 2D)
+        self.rotation_method = rotation_method
+        self.head_pose = HeadPoseEstimator()
+        self.head_angles = None  # (yaw, pitch, roll) terakhir dari solvePnP
         
         # Key facial landmarks untuk mendeteksi rotasi
         self.face_landmarks = [
@@ -47,34 +80,27 @@ class HeadRotationRemote:
         print("- Tekan 'q' untuk keluar")
         print("=====================================\n")
 
-    def calculate_head_rotation(self, landmarks, frame_width, frame_height):
-        """Menghitung rotasi kepala berdasarkan landmark wajah"""
-        if not landmarks:
+    def create_face_mesh(self):
+        """Initialize MediaPipe Face Mesh (mediapipe baru diimpor di sini)"""
+        self.mp_face_mesh = mp.solutions.face_mesh
+        self.mp_drawing = mp.solutions.drawing_utils
+        return self.mp_face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+    
+    def calculate_head_rotation(self, points):
+        """Menghitung rotasi kepala dari array landmark pixel (N, 3)"""
+        if points is None:
             return 0
         
-        # Ambil koordinat landmark penting
-        nose_tip = landmarks[10]
-        left_eye = landmarks[33]
-        right_eye = landmarks[263]
-        left_mouth = landmarks[61]
-        right_mouth = landmarks[291]
-        chin = landmarks[151]
-        
-        # Konversi ke pixel coordinates
-        nose_x = int(nose_tip.x * frame_width)
-        nose_y = int(nose_tip.y * frame_height)
-        
-        left_eye_x = int(left_eye.x * frame_width)
-        left_eye_y = int(left_eye.y * frame_height)
-        
-        right_eye_x = int(right_eye.x * frame_width)
-        right_eye_y = int(right_eye.y * frame_height)
-        
-        left_mouth_x = int(left_mouth.x * frame_width)
-        right_mouth_x = int(right_mouth.x * frame_width)
-        
-        chin_x = int(chin.x * frame_width)
-        chin_y = int(chin.y * frame_height)
+        # Ambil koordinat pixel landmark penting sekaligus (fancy indexing)
+        (nose_x, nose_y), (left_eye_x, left_eye_y), (right_eye_x, right_eye_y), \
+            (left_mouth_x, _), (right_mouth_x, _), (chin_x, chin_y) = \
+            points[ROTATION_LANDMARKS, :2].astype(np.int32).tolist()
         
         # Hitung garis mata (eye line)
         eye_center_x = (left_eye_x + right_eye_x) // 2
@@ -102,13 +128,19 @@ class HeadRotationRemote:
             
         return rotation_degrees, (nose_x, nose_y), (eye_center_x, eye_center_y), (chin_x, chin_y)
 
+    def get_rotation(self, points, frame_width, frame_height):
+        """Rotasi kiri/kanan (derajat) dengan metode terpilih, None jika gagal"""
+        if self.rotation_method == 'pnp':
+            self.head_angles = self.head_pose.estimate(points, frame_width, frame_height)
+            return self.head_angles[0] if self.head_angles else None
+        
+        rotation_data = self.calculate_head_rotation(points)
+        return rotation_data[0] if len(rotation_data) == 4 else None
+
     def smooth_rotation(self, rotation):
         """Smooth rotation dengan history untuk mengurangi noise"""
         self.rotation_history.append(rotation)
-        if len(self.rotation_history) > self.history_size:
-            self.rotation_history.pop(0)
-        
-        return sum(self.rotation_history) / len(self.rotation_history)
+        return self.rotation_history.mean()
 
     def determine_direction(self, rotation_degrees):
         """Tentukan arah berdasarkan derajat rotasi"""
@@ -119,24 +151,56 @@ class HeadRotationRemote:
         else:
             return "CENTER"
 
-    def draw_face_info(self, frame, landmarks, rotation_degrees, direction):
+    def calculate_head_rotation_batch(self, points, landmarks=ROTATION_LANDMARKS):
+        """Versi vektor calculate_head_rotation: landmark pixel (T, N, 3) -> derajat rotasi (T,)
+
+        landmarks: posisi ROTATION_LANDMARKS di points; np.arange(6) jika points
+        hanya berisi keenam landmark itu (evaluasi sesi panjang tanpa menyalin 478 titik).
+        """
+        # Sama persis dengan versi skalar: koordinat dibulatkan ke int dan pembagian floor
+        coords = points[:, landmarks, :2].astype(np.int32).astype(np.int64)
+        nose_x = coords[:, 0, 0]
+        left_eye_x, right_eye_x = coords[:, 1, 0], coords[:, 2, 0]
+        mouth_center_x = (coords[:, 3, 0] + coords[:, 4, 0]) // 2
+
+        eye_asymmetry = right_eye_x - left_eye_x
+        rotation_indicator = ((mouth_center_x - nose_x) * 0.7) + (eye_asymmetry * 0.3)
+        face_width = np.abs(eye_asymmetry)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rotation_degrees = (rotation_indicator / face_width) * 45
+        return np.where(face_width > 0, rotation_degrees, 0.0)
+
+    def smooth_rotation_batch(self, rotations):
+        """Versi vektor smooth_rotation untuk satu sesi (history awal kosong): mean history_size terakhir"""
+        rotations = np.asarray(rotations, dtype=np.float64)
+        if len(rotations) == 0:
+            return rotations.copy()
+        # Sliding window di atas deret yang di-pad nol; pembagi = isi history (maks history_size)
+        padded = np.concatenate([np.zeros(self.history_size - 1), rotations])
+        sums = np.lib.stride_tricks.sliding_window_view(padded, self.history_size).sum(axis=1)
+        counts = np.minimum(np.arange(1, len(rotations) + 1), self.history_size)
+        return sums / counts
+
+    def determine_direction_batch(self, rotation_degrees):
+        """Versi vektor determine_direction: array arah ("LEFT"/"RIGHT"/"CENTER") per frame"""
+        rotation_degrees = np.asarray(rotation_degrees)
+        return np.where(rotation_degrees > self.rotation_threshold, "RIGHT",
+                        np.where(rotation_degrees < -self.rotation_threshold, "LEFT", "CENTER"))
+
+    def draw_face_info(self, frame, points, rotation_degrees, direction):
         """Gambar informasi wajah dan rotasi pada frame"""
-        if not landmarks:
+        if points is None:
             return frame
             
         frame_height, frame_width = frame.shape[:2]
         
         # Gambar landmark penting
-        for idx in self.face_landmarks:
-            landmark = landmarks[idx]
-            x = int(landmark.x * frame_width)
-            y = int(landmark.y * frame_height)
+        for x, y in points[self.face_landmarks, :2].astype(np.int32).tolist():
             cv2.circle(frame, (x, y), 3, (0, 255, 0), -1)
         
         # Gambar pointer di jidat (antara mata dan rambut)
-        nose_tip = landmarks[10]
-        forehead_x = int(nose_tip.x * frame_width)
-        forehead_y = int(nose_tip.y * frame_height) - 40
+        forehead_x, forehead_y = points[10, :2].astype(np.int32).tolist()
+        forehead_y -= 40
         
         cv2.circle(frame, (forehead_x, forehead_y), 8, (255, 0, 0), -1)
         cv2.putText(frame, "HEAD POINTER", (forehead_x-50, forehead_y-15), 
@@ -149,6 +213,10 @@ class HeadRotationRemote:
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         cv2.putText(frame, f"Threshold: ±{self.rotation_threshold}°", (10, 90), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 2)
+        if self.head_angles is not None:
+            yaw, pitch, roll = self.head_angles
+            cv2.putText(frame, f"Yaw {yaw:.1f}  Pitch {pitch:.1f}  Roll {roll:.1f}", (10, 110), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
         
         # Gambar indikator arah
         center_x, center_y = frame_width // 2, 120
@@ -182,78 +250,102 @@ class HeadRotationRemote:
     def send_control_command(self, direction, rotation_degrees):
         """Kirim perintah kontrol dan tampilkan di terminal"""
         if direction != self.last_command:
+            start = time.perf_counter()
             self.command_count[direction] += 1
-            timestamp = time.strftime("%H:%M:%S")
-            
-            print(f"[{timestamp}] ROTASI KEPALA: {rotation_degrees:.1f}° → KONTROL: {direction}")
-            
-            if direction == "LEFT":
-                print(">>> AKSI: GELENG KIRI TERDETEKSI <<<")
-                print("    🡸 Simulasi: Remote LEFT (Channel Down / Volume Down)")
-            elif direction == "RIGHT":
-                print(">>> AKSI: GELENG KANAN TERDETEKSI <<<")
-                print("    🡺 Simulasi: Remote RIGHT (Channel Up / Volume Up)")
-            else:
-                print(">>> AKSI: POSISI TENGAH <<<")
-                print("    ⚬ Simulasi: Remote NETRAL")
-            
-            print("-" * 60)
+            STARTUP.mark('first_action')
+            EVENTS.emit('control', f"ROTASI KEPALA: {rotation_degrees:.1f}° → KONTROL: {direction} "
+                        f"({ACTION_TEXT[direction]})",
+                        controller='head_rotation', direction=direction,
+                        rotation=round(float(rotation_degrees), 2))
             self.last_command = direction
+            self.metrics.output(direction, start)
+
+    def process_frame(self, frame, results):
+        """Proses satu frame (sudah di-flip) beserta hasil FaceMesh, kembalikan frame untuk ditampilkan"""
+        if results.multi_face_landmarks:
+            for face_landmarks in results.multi_face_landmarks:
+                # Konversi landmark ke array pixel sekali per frame
+                points = self.landmark_array.update(face_landmarks, frame.shape[1], frame.shape[0])
+                
+                # Hitung rotasi kepala
+                rotation_degrees = self.get_rotation(points, frame.shape[1], frame.shape[0])
+                
+                if rotation_degrees is not None:
+                    # Smooth rotation
+                    smooth_rotation = self.smooth_rotation(rotation_degrees)
+                    
+                    # Tentukan arah
+                    direction = self.determine_direction(smooth_rotation)
+                    
+                    # Kirim perintah kontrol
+                    self.send_control_command(direction, smooth_rotation)
+                    
+                    # Gambar informasi pada frame
+                    draw_start = TRACER.now()
+                    frame = self.draw_face_info(frame, points, smooth_rotation, direction)
+                    TRACER.span('draw', draw_start)
+        else:
+            cv2.putText(frame, "WAJAH TIDAK TERDETEKSI", (200, 200), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        
+        # Tampilkan statistik
+        y_pos = 400
+        for cmd, count in self.command_count.items():
+            cv2.putText(frame, f"{cmd}: {count}x", (10, y_pos), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            y_pos += 25
+        
+        return frame
+
+    def handle_key(self, key):
+        """Tangani input keyboard, kembalikan False untuk keluar"""
+        return key != ord('q')
 
     def run(self):
         """Jalankan sistem head rotation tracking"""
         try:
             while True:
+                self.metrics.begin_frame()
+                frame_start = t = TRACER.begin_frame()
                 ret, frame = self.cap.read()
                 if not ret:
                     print("Error: Tidak dapat membaca dari kamera")
                     break
+                self.metrics.mark('capture')
+                t = TRACER.span('read', t)
                 
                 # Flip frame horizontal untuk efek mirror
                 frame = cv2.flip(frame, 1)
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Deteksi face mesh
-                results = self.face_mesh.process(frame_rgb)
+                t = TRACER.span('flip', t)
                 
-                if results.multi_face_landmarks:
-                    for face_landmarks in results.multi_face_landmarks:
-                        # Hitung rotasi kepala
-                        rotation_data = self.calculate_head_rotation(
-                            face_landmarks.landmark, frame.shape[1], frame.shape[0]
-                        )
-                        
-                        if len(rotation_data) == 4:
-                            rotation_degrees, nose_pos, eye_pos, chin_pos = rotation_data
-                            
-                            # Smooth rotation
-                            smooth_rotation = self.smooth_rotation(rotation_degrees)
-                            
-                            # Tentukan arah
-                            direction = self.determine_direction(smooth_rotation)
-                            
-                            # Kirim perintah kontrol
-                            self.send_control_command(direction, smooth_rotation)
-                            
-                            # Gambar informasi pada frame
-                            frame = self.draw_face_info(frame, face_landmarks.landmark, 
-                                                      smooth_rotation, direction)
+                # Deteksi face mesh; frame statis memakai ulang landmark dan keputusan terakhir
+                infer = self.motion_gate.should_infer(frame)
+                t = TRACER.span('motion_gate', t)
+                if infer:
+                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    t = TRACER.span('cvtColor', t)
+                    results = self.motion_gate.store(self.face_mesh.process(frame_rgb))
+                    t = TRACER.span('process', t)
                 else:
-                    cv2.putText(frame, "WAJAH TIDAK TERDETEKSI", (200, 200), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                
-                # Tampilkan statistik
-                y_pos = 400
-                for cmd, count in self.command_count.items():
-                    cv2.putText(frame, f"{cmd}: {count}x", (10, y_pos), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                    y_pos += 25
+                    results = self.motion_gate.results
+                self.metrics.mark('inference')
+                frame = self.process_frame(frame, results)
+                self.metrics.mark('features')
+                t = TRACER.span('features', t)
                 
                 # Tampilkan frame
-                cv2.imshow('Head Rotation Remote Control', frame)
+                cv2.imshow(self.window_name, frame)
+                t = TRACER.span('imshow', t)
                 
                 # Keluar jika tekan 'q'
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                key = cv2.waitKey(1) & 0xFF
+                TRACER.span('waitKey', t)
+                TRACER.handle_key(key)
+                keep_running = self.handle_key(key)
+                self.metrics.mark('render')
+                self.metrics.end_frame()
+                TRACER.end_frame(frame_start)
+                if not keep_running:
                     break
                     
         except KeyboardInterrupt:
@@ -264,6 +356,8 @@ class HeadRotationRemote:
 
     def cleanup(self):
         """Bersihkan resources"""
+        # Tulis event yang masih di ring sebelum statistik
+        EVENTS.flush()
         print("\n=== STATISTIK ROTASI KEPALA ===")
         total_commands = sum(self.command_count.values())
         for cmd, count in self.command_count.items():
@@ -271,24 +365,41 @@ class HeadRotationRemote:
             print(f"{cmd}: {count} kali ({percentage:.1f}%)")
         print("==============================")
         
-        self.cap.release()
+        if self.cap is not None:
+            print(STARTUP.summary())
+            print(self.motion_gate.summary())
+            print(self.cap.summary())
+            print(EVENTS.summary())
+            self.metrics.close()
+            self.cap.release()
         cv2.destroyAllWindows()
         print("Program selesai. Terima kasih!")
 
 def main():
     print("Checking dependencies...")
+    # Versi dibaca dari metadata paket, tanpa mengimpor mediapipe dua kali
     try:
-        import mediapipe
-        print(f"✓ MediaPipe Version: {mediapipe.__version__}")
+        print(f"✓ MediaPipe Version: {metadata.version('mediapipe')}")
         print(f"✓ OpenCV Version: {cv2.__version__}")
-    except ImportError:
+    except metadata.PackageNotFoundError:
         print("❌ MediaPipe tidak terinstall!")
         print("Install dengan: pip install mediapipe")
         return
     
     # Inisialisasi dan jalankan head rotation remote
-    remote = HeadRotationRemote()
+    rotation_method, argv = rotation_method_from_argv()
+    motion_gate, argv = motion_gate_from_argv(argv)
+    metrics_server, argv = metrics_server_from_argv(argv)
+    events, argv = event_log_from_argv(argv)
+    tracer, argv = trace_from_argv(argv)
+    remote = HeadRotationRemote(source_from_argv(argv), rotation_method=rotation_method,
+                                motion_gate=motion_gate)
     remote.run()
+    events.close()
+    if tracer.enabled:
+        tracer.export()
+    if metrics_server is not None:
+        metrics_server.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,28 +1,50 @@
 import cv2
 import numpy as np
 import time
-import mediapipe as mp
+from importlib import metadata
 from pynput.keyboard import Key, Listener as KeyListener
 from pynput import keyboard as pynput_keyboard
 import threading
 
+from capture import ThreadedCapture
+from event_log import EVENTS, event_log_from_argv
+from frame_sources import source_from_argv
+from head_pose import DEFAULT_ROTATION_METHOD, HeadPoseEstimator, rotation_method_from_argv
+from landmark_array import LandmarkArray
+from metrics import PipelineMetrics, metrics_server_from_argv
+from motion_gate import MotionGate, motion_gate_from_argv
+from pipeline_trace import TRACER, trace_from_argv
+from ring_buffer import RingBuffer
+from latency_governor import LatencyGovernor
+from startup import STARTUP, lazy_import, parallel_startup
+
+# Diimpor saat FaceMesh dibangun (paralel dengan pembukaan kamera)
+mp = lazy_import('mediapipe')
+
+# Rotation landmarks: nose tip, eye outer corners, mouth corners, cheeks
+ROTATION_LANDMARKS = np.array([10, 33, 263, 61, 291, 116, 345])
+
+# Bobot smoothing rotasi (terlama -> terbaru), bobot terbaru lebih besar
+ROTATION_WEIGHTS = (0.2, 0.3, 0.5)
+
 class GameHeadController:
-    def __init__(self):
-        # Initialize MediaPipe Face Mesh
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
+    def __init__(self, source=0, rotation_method=DEFAULT_ROTATION_METHOD, motion_gate=None):
+        self.window_name = 'Game Head Controller - Subway Surfers (Press Q to quit)'
+        
+        # source=None: attached to a LandmarkBus (the bus owns camera and FaceMesh)
+        self.face_mesh = None
+        self.cap = None
+        if source is not None:
+            # Camera setup (higher FPS for gaming), opened while mediapipe loads and FaceMesh warms up
+            self.cap, self.face_mesh = parallel_startup(
+                lambda: ThreadedCapture(source, width=640, height=480, fps=30), self.create_face_mesh)
         
-        # Camera setup
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)  # Higher FPS for gaming
+        # Motion gate: frame statis memakai ulang hasil FaceMesh terakhir
+        self.motion_gate = motion_gate or MotionGate()
+        
+        # Metric per stage (disajikan lewat HTTP jika --metrics-port diberikan)
+        self.metrics = PipelineMetrics('game', self.cap)
+        self.metrics.watch('motion_gate', self.motion_gate.get_stats)
         
         # Gaming control parameters
         self.rotation_threshold = 12  # Lebih sensitif untuk gaming
@@ -31,8 +53,20 @@ class GameHeadController:
         self.action_count = {"LEFT": 0, "RIGHT": 0, "CENTER": 0}
         
         # Smoothing untuk gaming (lebih responsif)
-        self.rotation_history = []
         self.history_size = 3  # Lebih kecil untuk response cepat
+        self.rotation_history = RingBuffer(self.history_size)
+        
+        # Reusable (N, 3) landmark buffer
+        self.landmark_array = LandmarkArray()
+        
+        # Estimasi rotasi: 'pnp' (solvePnP 3D, yaw/pitch/roll) atau 'heuristic' (asimetri 2D)
+        self.rotation_method = rotation_method
+        self.head_pose = HeadPoseEstimator()
+        self.head_angles = None  # (yaw, pitch, roll) terakhir dari solvePnP
+        
+        # Latency governor: budget 1 frame @30 FPS, turunkan beban jika terlewati
+        self.governor = LatencyGovernor(budget_ms=1000 / 30)
+        self.metrics.watch('governor', self.governor.get_stats)
         
         # Key control
         self.keyboard_controller = pynput_keyboard.Controller()
@@ -55,28 +89,25 @@ class GameHeadController:
         print("   • Threshold: ±12° (sensitif)")
         print("================================================\n")
 
-    def calculate_head_rotation(self, landmarks, frame_width, frame_height):
-        """Hitung rotasi kepala dengan akurasi tinggi untuk gaming"""
-        if not landmarks:
+    def create_face_mesh(self):
+        """Initialize MediaPipe Face Mesh (mediapipe is imported here, not at module load)"""
+        self.mp_face_mesh = mp.solutions.face_mesh
+        return self.mp_face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=0.7,
+            min_tracking_confidence=0.7
+        )
+    
+    def calculate_head_rotation(self, points):
+        """Hitung rotasi kepala dengan akurasi tinggi untuk gaming (array pixel (N, 3))"""
+        if points is None:
             return 0
         
-        # Key landmarks untuk rotasi
-        nose_tip = landmarks[10]      # Ujung hidung
-        left_eye_outer = landmarks[33]   # Sudut luar mata kiri
-        right_eye_outer = landmarks[263] # Sudut luar mata kanan
-        left_mouth = landmarks[61]    # Sudut kiri mulut
-        right_mouth = landmarks[291]  # Sudut kanan mulut
-        left_cheek = landmarks[116]   # Pipi kiri
-        right_cheek = landmarks[345]  # Pipi kanan
-        
-        # Konversi ke koordinat pixel
-        nose_x = nose_tip.x * frame_width
-        left_eye_x = left_eye_outer.x * frame_width
-        right_eye_x = right_eye_outer.x * frame_width
-        left_mouth_x = left_mouth.x * frame_width
-        right_mouth_x = right_mouth.x * frame_width
-        left_cheek_x = left_cheek.x * frame_width
-        right_cheek_x = right_cheek.x * frame_width
+        # Pixel x coordinates of all key landmarks in one fancy-indexing step
+        nose_x, left_eye_x, right_eye_x, left_mouth_x, right_mouth_x, left_cheek_x, right_cheek_x = \
+            points[ROTATION_LANDMARKS, 0].tolist()
         
         # Hitung beberapa indikator rotasi
         eye_asymmetry = right_eye_x - left_eye_x
@@ -103,18 +134,22 @@ class GameHeadController:
             
         return rotation_degrees
 
+    def get_rotation(self, points, frame_width, frame_height):
+        """Rotasi kiri/kanan (derajat) dengan metode terpilih, None jika gagal"""
+        if self.rotation_method == 'pnp':
+            self.head_angles = self.head_pose.estimate(points, frame_width, frame_height)
+            return self.head_angles[0] if self.head_angles else None
+        return self.calculate_head_rotation(points)
+
     def smooth_rotation(self, rotation):
         """Smoothing khusus untuk gaming - lebih responsif"""
         self.rotation_history.append(rotation)
-        if len(self.rotation_history) > self.history_size:
-            self.rotation_history.pop(0)
         
         # Weighted average - prioritas ke data terbaru
-        weights = [0.2, 0.3, 0.5]  # Bobot terbaru lebih besar
-        if len(self.rotation_history) == 3:
-            return sum(w * r for w, r in zip(weights, self.rotation_history))
+        if self.rotation_history.full:
+            return self.rotation_history.weighted_mean(ROTATION_WEIGHTS)
         else:
-            return sum(self.rotation_history) / len(self.rotation_history)
+            return self.rotation_history.mean()
 
     def determine_direction(self, rotation_degrees):
         """Tentukan arah dengan threshold gaming"""
@@ -141,18 +176,24 @@ class GameHeadController:
             if direction == "LEFT":
                 self.keyboard_controller.press(Key.left)
                 self.is_pressing_left = True
-                print("🎮 GAME: ← LEFT ARROW PRESSED")
+                STARTUP.mark('first_action')
+                EVENTS.emit('game_control', "🎮 GAME: ← LEFT ARROW PRESSED",
+                            controller='game', direction=direction)
                 
             elif direction == "RIGHT":
                 self.keyboard_controller.press(Key.right)
                 self.is_pressing_right = True
-                print("🎮 GAME: → RIGHT ARROW PRESSED")
+                STARTUP.mark('first_action')
+                EVENTS.emit('game_control', "🎮 GAME: → RIGHT ARROW PRESSED",
+                            controller='game', direction=direction)
                 
             elif direction == "CENTER":
-                print("🎮 GAME: ⚬ KEYS RELEASED")
+                EVENTS.emit('game_control', "🎮 GAME: ⚬ KEYS RELEASED",
+                            controller='game', direction=direction)
             
         except Exception as e:
-            print(f"❌ Control Error: {e}")
+            EVENTS.emit('control_error', f"❌ Control Error: {e}", controller='game',
+                        direction=direction, error=str(e))
 
     def draw_gaming_interface(self, frame, rotation_degrees, direction):
         """Interface khusus untuk gaming"""
@@ -233,6 +274,62 @@ class GameHeadController:
         
         return frame
 
+    def process_frame(self, frame, results):
+        """Process one (already flipped) frame with its FaceMesh results"""
+        if results.multi_face_landmarks:
+            for face_landmarks in results.multi_face_landmarks:
+                # Convert landmarks to a pixel array once per frame
+                points = self.landmark_array.update(face_landmarks, frame.shape[1], frame.shape[0])
+                
+                # Calculate rotation
+                rotation_degrees = self.get_rotation(points, frame.shape[1], frame.shape[0])
+                if rotation_degrees is None:
+                    continue
+                
+                # Smooth for gaming
+                smooth_rotation = self.smooth_rotation(rotation_degrees)
+                
+                # Determine direction
+                direction = self.determine_direction(smooth_rotation)
+                
+                # Execute control if direction changed
+                if direction != self.current_direction:
+                    output_start = time.perf_counter()
+                    self.execute_game_control(direction)
+                    self.metrics.output(direction, output_start)
+                    self.action_count[direction] += 1
+                    self.current_direction = direction
+                
+                # Draw gaming interface (dilewati governor saat over budget)
+                if self.governor.draw_hud:
+                    draw_start = TRACER.now()
+                    frame = self.draw_gaming_interface(frame, smooth_rotation, direction)
+                    TRACER.span('draw', draw_start)
+                
+        else:
+            # No face detected
+            cv2.putText(frame, "NO FACE - PLACE FACE IN CAMERA", (100, 200), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+            
+            # Release all keys when no face
+            if self.is_pressing_left or self.is_pressing_right:
+                output_start = time.perf_counter()
+                if self.is_pressing_left:
+                    self.keyboard_controller.release(Key.left)
+                    self.is_pressing_left = False
+                if self.is_pressing_right:
+                    self.keyboard_controller.release(Key.right)
+                    self.is_pressing_right = False
+                EVENTS.emit('game_control', "🎮 GAME: Keys released (no face)",
+                            controller='game', direction='RELEASE')
+                self.metrics.output('RELEASE', output_start)
+        
+        return frame
+
+    def handle_key(self, key):
+        """Handle keyboard input, return False to quit"""
+        return key != ord('q')
+
     def run(self):
         """Main game loop"""
         print("🚀 Starting Game Head Controller...")
@@ -241,60 +338,57 @@ class GameHeadController:
         
         try:
             while True:
+                self.metrics.begin_frame()
+                frame_start = t = TRACER.begin_frame()
                 ret, frame = self.cap.read()
                 if not ret:
                     print("❌ Camera error")
                     break
+                self.metrics.mark('capture')
+                t = TRACER.span('read', t)
+                
+                self.governor.begin_frame()
                 
                 # Flip untuk mirror effect
                 frame = cv2.flip(frame, 1)
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Process face
-                results = self.face_mesh.process(frame_rgb)
+                t = TRACER.span('flip', t)
                 
-                if results.multi_face_landmarks:
-                    for face_landmarks in results.multi_face_landmarks:
-                        # Calculate rotation
-                        rotation_degrees = self.calculate_head_rotation(
-                            face_landmarks.landmark, frame.shape[1], frame.shape[0]
-                        )
-                        
-                        # Smooth for gaming
-                        smooth_rotation = self.smooth_rotation(rotation_degrees)
+                if self.governor.should_infer():
+                    # Frame statis: pakai ulang landmark dan keputusan dari inference terakhir
+                    infer = self.motion_gate.should_infer(frame)
+                    t = TRACER.span('motion_gate', t)
+                    if infer:
+                        # Landmark ternormalisasi, jadi frame kecil tetap dipetakan ke ukuran asli
+                        scale = self.governor.inference_scale
+                        small = frame if scale == 1.0 else cv2.resize(
+                            frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                        frame_rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+                        t = TRACER.span('cvtColor', t)
                         
-                        # Determine direction
-                        direction = self.determine_direction(smooth_rotation)
-                        
-                        # Execute control if direction changed
-                        if direction != self.current_direction:
-                            self.execute_game_control(direction)
-                            self.action_count[direction] += 1
-                            self.current_direction = direction
-                        
-                        # Draw gaming interface
-                        frame = self.draw_gaming_interface(frame, smooth_rotation, direction)
-                        
-                else:
-                    # No face detected
-                    cv2.putText(frame, "NO FACE - PLACE FACE IN CAMERA", (100, 200), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                    
-                    # Release all keys when no face
-                    if self.is_pressing_left or self.is_pressing_right:
-                        if self.is_pressing_left:
-                            self.keyboard_controller.release(Key.left)
-                            self.is_pressing_left = False
-                        if self.is_pressing_right:
-                            self.keyboard_controller.release(Key.right)
-                            self.is_pressing_right = False
-                        print("🎮 GAME: Keys released (no face)")
+                        # Process face
+                        results = self.motion_gate.store(self.face_mesh.process(frame_rgb))
+                        t = TRACER.span('process', t)
+                    else:
+                        results = self.motion_gate.results
+                    self.metrics.mark('inference')
+                    frame = self.process_frame(frame, results)
+                    self.metrics.mark('features')
+                    t = TRACER.span('features', t)
                 
                 # Show frame
-                cv2.imshow('Game Head Controller - Subway Surfers (Press Q to quit)', frame)
+                cv2.imshow(self.window_name, frame)
+                t = TRACER.span('imshow', t)
                 
                 # Quit
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                key = cv2.waitKey(1) & 0xFF
+                TRACER.span('waitKey', t)
+                TRACER.handle_key(key)
+                keep_running = self.handle_key(key)
+                self.metrics.mark('render')
+                self.metrics.end_frame()
+                TRACER.end_frame(frame_start)
+                self.governor.end_frame()
+                if not keep_running:
                     break
                     
         except KeyboardInterrupt:
@@ -313,6 +407,8 @@ class GameHeadController:
         except:
             pass
         
+        # Tulis event yang masih di ring sebelum statistik
+        EVENTS.flush()
         print("\n🎮 === GAMING SESSION STATS ===")
         total_actions = sum(self.action_count.values())
         print(f"Total Actions: {total_actions}")
@@ -322,7 +418,14 @@ class GameHeadController:
                 print(f"   {direction}: {count} ({percentage:.1f}%)")
         print("==============================")
         
-        self.cap.release()
+        if self.cap is not None:
+            print(STARTUP.summary())
+            print(self.motion_gate.summary())
+            print(self.governor.summary())
+            print(self.cap.summary())
+            print(EVENTS.summary())
+            self.metrics.close()
+            self.cap.release()
         cv2.destroyAllWindows()
         print("✅ Game controller closed successfully!")
         print("🎮 Thanks for playing!")
@@ -338,10 +441,11 @@ def main():
         print("📦 Install: pip install pynput")
         return
     
+    # Cek lewat metadata paket; mediapipe baru diimpor saat FaceMesh dibangun
     try:
-        import mediapipe
+        metadata.version('mediapipe')
         print("✓ mediapipe (face tracking)")
-    except ImportError:
+    except metadata.PackageNotFoundError:
         print("❌ mediapipe not found!")
         print("📦 Install: pip install mediapipe")
         return
@@ -350,8 +454,19 @@ def main():
     print("\n🎮 Starting Game Head Controller...")
     
     # Start the game controller
-    controller = GameHeadController()
+    rotation_method, argv = rotation_method_from_argv()
+    motion_gate, argv = motion_gate_from_argv(argv)
+    metrics_server, argv = metrics_server_from_argv(argv)
+    events, argv = event_log_from_argv(argv)
+    tracer, argv = trace_from_argv(argv)
+    controller = GameHeadController(source_from_argv(argv), rotation_method=rotation_method,
+                                    motion_gate=motion_gate)
     controller.run()
+    events.close()
+    if tracer.enabled:
+        tracer.export()
+    if metrics_server is not None:
+        metrics_server.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,70 +1,106 @@
 import cv2
 import numpy as np
-import mediapipe as mp
 import pyautogui
 import time
 
+from calibration_store import CalibrationStore, DriftCheck
+from capture import ThreadedCapture
+from cursor_filters import DEFAULT_FILTER, cursor_options_from_argv, make_filter
+from cursor_predictor import CursorPredictor
+from frame_sources import source_from_argv
+from landmark_array import LandmarkArray
+from metrics import PipelineMetrics, metrics_server_from_argv
+from motion_gate import MotionGate, motion_gate_from_argv
+from pipeline_trace import TRACER, trace_from_argv
+from ring_buffer import RingBuffer
+from startup import STARTUP, lazy_import, parallel_startup
+from output_dispatcher import CursorDispatcher
+
+# Diimpor saat FaceMesh dibangun (paralel dengan pembukaan kamera)
+mp = lazy_import('mediapipe')
+
+# Indeks landmark untuk area dahi (bagian atas wajah)
+FOREHEAD_LANDMARKS = np.array([10, 151, 9, 10])
+
+# Nama profil di calibration store (5.py dan cursor.py berbagi kalibrasi yang sama)
+CALIBRATION_PROFILE = 'forehead_cursor'
+
 class ForeheadCursor:
-    def __init__(self):
-        # Inisialisasi MediaPipe Face Mesh
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    def __init__(self, source=0, cursor_filter=DEFAULT_FILTER, predict=False, motion_gate=None):
+        self.window_name = 'Dahi Pointer Cursor'
         
-        # Inisialisasi drawing utilities
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
+        # source=None: dipasang sebagai plugin LandmarkBus (kamera dan FaceMesh milik bus)
+        self.face_mesh = None
+        self.cap = None
+        if source is not None:
+            # Setup kamera paralel dengan impor mediapipe, pembuatan FaceMesh dan warm-up
+            self.cap, self.face_mesh = parallel_startup(
+                lambda: ThreadedCapture(source, width=640, height=480), self.create_face_mesh)
+        
+        # Motion gate: frame statis memakai ulang hasil FaceMesh terakhir
+        self.motion_gate = motion_gate or MotionGate()
         
-        # Setup kamera
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        # Metric per stage (disajikan lewat HTTP jika --metrics-port diberikan)
+        self.metrics = PipelineMetrics('forehead_cursor_basic', self.cap)
+        self.metrics.watch('motion_gate', self.motion_gate.get_stats)
+        
+        # Buffer landmark (N, 3) yang dipakai ulang setiap frame
+        self.landmark_array = LandmarkArray()
         
         # Konfigurasi pointer
         self.pointer_color = (0, 255, 0)  # Hijau
         self.pointer_radius = 8
-        self.trail_points = []  # Untuk jejak pointer
         self.max_trail_length = 10
+        self.trail_points = RingBuffer(self.max_trail_length, width=2, dtype=np.int32)  # Untuk jejak pointer
         
         # Kalibrasi area gerakan
         self.screen_width, self.screen_height = pyautogui.size()
         self.movement_sensitivity = 3
         self.smoothing_factor = 0.7
-        self.prev_cursor_pos = None
+        # Filter cursor: 'ema' (default, smoothing_factor) atau 'one_euro' (opt-in, adaptif terhadap kecepatan)
+        filter_params = {'smoothing_factor': self.smoothing_factor} if cursor_filter == 'ema' else {}
+        self.cursor_filter = make_filter(cursor_filter, **filter_params)
+        # Prediksi Kalman posisi cursor saat moveTo dieksekusi (None = nonaktif)
+        self.cursor_predictor = CursorPredictor() if predict else None
         
         # Status tracking
         self.calibration_mode = True
         self.calibration_frames = 0
-        self.calibration_positions = []
+        self.calibration_positions = RingBuffer(30, width=2)
         self.center_point = None
         
+        # Profil kalibrasi tersimpan per user + resolusi; divalidasi diam-diam di frame awal
+        self.calibration_store = CalibrationStore()
+        self.profile_size = None  # (w, h) yang profilnya sudah dicoba dimuat
+        self.profile_check = None  # DriftCheck aktif selama validasi profil
+        self.drift_tolerance = 40  # pixel pergeseran titik tengah dahi yang masih diterima
+        
         # Disable pyautogui failsafe
         pyautogui.FAILSAFE = False
         
-    def get_forehead_point(self, landmarks, img_width, img_height):
-        """Mendapatkan titik tengah dahi dari landmarks wajah"""
-        # Indeks landmark untuk area dahi (bagian atas wajah)
-        forehead_indices = [10, 151, 9, 10]  # Titik-titik di area dahi
+        # Output mouse dikirim dari thread terpisah (tidak memblokir loop vision)
+        self.cursor_output = CursorDispatcher(metrics=self.metrics)
         
-        if landmarks:
-            # Ambil koordinat landmark dahi
-            forehead_points = []
-            for idx in forehead_indices:
-                if idx < len(landmarks.landmark):
-                    x = int(landmarks.landmark[idx].x * img_width)
-                    y = int(landmarks.landmark[idx].y * img_height)
-                    forehead_points.append((x, y))
-            
-            if forehead_points:
-                # Hitung titik tengah dahi
-                avg_x = sum(p[0] for p in forehead_points) // len(forehead_points)
-                avg_y = sum(p[1] for p in forehead_points) // len(forehead_points)
-                return (avg_x, avg_y - 30)  # Offset ke atas untuk posisi dahi yang lebih akurat
+    def create_face_mesh(self):
+        """Inisialisasi MediaPipe Face Mesh dan drawing utilities (mediapipe baru diimpor di sini)"""
+        self.mp_face_mesh = mp.solutions.face_mesh
+        self.mp_drawing = mp.solutions.drawing_utils
+        self.mp_drawing_styles = mp.solutions.drawing_styles
+        return self.mp_face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+    
+    def get_forehead_point(self, points):
+        """Mendapatkan titik tengah dahi dari array landmark pixel (N, 3)"""
+        if points is not None and len(points) > FOREHEAD_LANDMARKS.max():
+            # Ambil koordinat landmark dahi sekaligus, lalu hitung titik tengahnya
+            forehead_points = points[FOREHEAD_LANDMARKS, :2].astype(np.int32)
+            avg_x, avg_y = (forehead_points.sum(axis=0) // len(forehead_points)).tolist()
+            return (avg_x, avg_y - 30)  # Offset ke atas untuk posisi dahi yang lebih akurat
         
         return None
     
@@ -76,15 +112,55 @@ class ForeheadCursor:
             
             if self.calibration_frames >= 30:  # Kalibrasi selama 30 frame
                 # Hitung titik tengah dari posisi kalibrasi
-                avg_x = sum(p[0] for p in self.calibration_positions) // len(self.calibration_positions)
-                avg_y = sum(p[1] for p in self.calibration_positions) // len(self.calibration_positions)
-                self.center_point = (avg_x, avg_y)
+                avg_x, avg_y = self.calibration_positions.mean()
+                self.center_point = (int(avg_x), int(avg_y))
                 self.calibration_mode = False
+                self.calibration_store.save(CALIBRATION_PROFILE, *self.profile_size,
+                                            center_point=self.center_point)
                 print("Kalibrasi selesai! Sekarang Anda dapat menggunakan pointer.")
             
             return True
         return False
     
+    def load_calibration_profile(self, w, h):
+        """Muat center_point tersimpan untuk resolusi ini (sekali), lalu validasi di frame berikutnya"""
+        if self.profile_size == (w, h):
+            return
+        self.profile_size = (w, h)
+        profile = self.calibration_store.load(CALIBRATION_PROFILE, w, h)
+        if not profile or 'center_point' not in profile:
+            return
+        
+        self.center_point = tuple(profile['center_point'])
+        self.calibration_mode = False
+        center = np.array(self.center_point, dtype=np.float64)
+        # Median posisi dahi di frame awal harus dekat titik tengah tersimpan
+        self.profile_check = DriftCheck(
+            lambda samples: np.hypot(*(np.median(samples, axis=0) - center)) <= self.drift_tolerance)
+        print("Profil kalibrasi dimuat, memvalidasi...")
+    
+    def validate_calibration_profile(self, forehead_pos):
+        """Bandingkan frame awal dengan profil tersimpan; kalibrasi ulang penuh jika drift"""
+        verdict = self.profile_check.add(forehead_pos)
+        if verdict is None:
+            return
+        self.profile_check = None
+        if verdict:
+            print("Profil kalibrasi valid.")
+        else:
+            print("Posisi bergeser dari profil tersimpan, kalibrasi ulang...")
+            self.reset_calibration()
+    
+    def reset_calibration(self):
+        self.calibration_mode = True
+        self.calibration_frames = 0
+        self.calibration_positions.clear()
+        self.center_point = None
+        self.profile_check = None
+        self.cursor_filter.reset()
+        if self.cursor_predictor is not None:
+            self.cursor_predictor.reset()
+    
     def map_to_screen_coordinates(self, forehead_pos, img_width, img_height):
         """Mapping posisi dahi ke koordinat layar"""
         if not self.center_point:
@@ -106,34 +182,35 @@ class ForeheadCursor:
     
     def smooth_cursor_movement(self, new_pos):
         """Menghaluskan gerakan cursor untuk mengurangi jitter"""
-        if self.prev_cursor_pos is None:
-            self.prev_cursor_pos = new_pos
-            return new_pos
-        
-        # Smoothing menggunakan interpolasi linear
-        smooth_x = int(self.prev_cursor_pos[0] * self.smoothing_factor + 
-                      new_pos[0] * (1 - self.smoothing_factor))
-        smooth_y = int(self.prev_cursor_pos[1] * self.smoothing_factor + 
-                      new_pos[1] * (1 - self.smoothing_factor))
-        
-        self.prev_cursor_pos = (smooth_x, smooth_y)
-        return (smooth_x, smooth_y)
+        # Timestamp capture agar filter memakai interval frame sebenarnya
+        timestamp = self.cap.last_timestamp if self.cap is not None else None
+        smooth_x, smooth_y = self.cursor_filter.filter(new_pos, timestamp)
+        return (int(smooth_x), int(smooth_y))
+    
+    def predict_cursor_position(self, pos):
+        """Perkirakan posisi cursor saat moveTo benar-benar dieksekusi (Kalman)"""
+        if self.cursor_predictor is None:
+            return pos
+        timestamp = self.cap.last_timestamp if self.cap is not None else None
+        # Horizon: umur frame sejak capture + latency thread output
+        pred_x, pred_y = self.cursor_predictor.step(
+            pos, timestamp, output_latency=self.cursor_output.latency_estimate)
+        x = max(0, min(self.screen_width - 1, int(pred_x)))
+        y = max(0, min(self.screen_height - 1, int(pred_y)))
+        return (x, y)
     
     def draw_pointer_trail(self, img, current_pos):
         """Menggambar jejak pointer untuk efek visual"""
+        # Ring buffer: titik tertua otomatis tertimpa setelah max_trail_length
         self.trail_points.append(current_pos)
         
-        # Batasi panjang jejak
-        if len(self.trail_points) > self.max_trail_length:
-            self.trail_points.pop(0)
-        
         # Gambar jejak dengan opacity yang menurun
         for i, point in enumerate(self.trail_points):
             alpha = (i + 1) / len(self.trail_points)
             radius = int(self.pointer_radius * alpha)
             color_intensity = int(255 * alpha)
             color = (0, color_intensity, 0)
-            cv2.circle(img, point, radius, color, -1)
+            cv2.circle(img, tuple(point.tolist()), radius, color, -1)
     
     def draw_ui_elements(self, img):
         """Menggambar elemen UI pada layar"""
@@ -160,6 +237,90 @@ class ForeheadCursor:
             cv2.putText(img, instruction, (10, h - 80 + i * 25), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
     
+    def process_frame(self, frame, results):
+        """Proses satu frame (sudah di-flip) beserta hasil FaceMesh, kembalikan frame untuk ditampilkan"""
+        h, w, _ = frame.shape
+        self.load_calibration_profile(w, h)
+        
+        if results.multi_face_landmarks:
+            for face_landmarks in results.multi_face_landmarks:
+                # Gambar face mesh (opsional, untuk debugging)
+                # self.mp_drawing.draw_landmarks(
+                #     frame, face_landmarks, self.mp_face_mesh.FACEMESH_CONTOURS,
+                #     None, self.mp_drawing_styles.get_default_face_mesh_contours_style())
+                
+                # Konversi landmark ke array pixel sekali per frame, lalu ambil posisi dahi
+                points = self.landmark_array.update(face_landmarks, w, h)
+                forehead_pos = self.get_forehead_point(points)
+                
+                if forehead_pos:
+                    if self.profile_check is not None:
+                        self.validate_calibration_profile(forehead_pos)
+                    
+                    # Kalibrasi jika masih dalam mode kalibrasi
+                    if self.calibrate_movement_area(forehead_pos):
+                        # Gambar lingkaran kalibrasi
+                        cv2.circle(frame, forehead_pos, self.pointer_radius + 5, (0, 255, 255), 2)
+                    else:
+                        # Mode normal - kontrol cursor
+                        screen_pos = self.map_to_screen_coordinates(forehead_pos, w, h)
+                        
+                        if screen_pos:
+                            # Smoothing gerakan cursor, lalu kompensasi latency (jika prediksi aktif)
+                            smooth_pos = self.smooth_cursor_movement(screen_pos)
+                            smooth_pos = self.predict_cursor_position(smooth_pos)
+                            
+                            # Gerakkan cursor mouse
+                            self.cursor_output.move_to(smooth_pos[0], smooth_pos[1])
+                            
+                            # Gambar pointer dengan trail
+                            self.draw_pointer_trail(frame, forehead_pos)
+                            
+                            # Gambar pointer utama
+                            cv2.circle(frame, forehead_pos, self.pointer_radius, self.pointer_color, -1)
+                            cv2.circle(frame, forehead_pos, self.pointer_radius + 2, (255, 255, 255), 2)
+                            
+                            # Tampilkan koordinat
+                            coord_text = f"Screen: ({smooth_pos[0]}, {smooth_pos[1]})"
+                            cv2.putText(frame, coord_text, (10, 60), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        
+        # Gambar UI elements
+        draw_start = TRACER.now()
+        self.draw_ui_elements(frame)
+        TRACER.span('draw', draw_start)
+        
+        return frame
+    
+    def handle_key(self, key):
+        """Tangani input keyboard, kembalikan False untuk keluar"""
+        if key == ord('q'):
+            return False
+        if key == ord('c'):
+            # Reset kalibrasi (profil baru disimpan setelah selesai)
+            self.reset_calibration()
+            print("Kalibrasi ulang...")
+        elif key == ord(' '):
+            # Klik mouse
+            if not self.calibration_mode:
+                self.cursor_output.click()
+                print("Mouse clicked!")
+        return True
+    
+    def cleanup(self):
+        """Bersihkan resources"""
+        self.cursor_output.stop()
+        print(self.cursor_output.summary())
+        if self.cursor_predictor is not None:
+            print(self.cursor_predictor.summary())
+        if self.cap is not None:
+            print(STARTUP.summary())
+            print(self.motion_gate.summary())
+            print(self.cap.summary())
+            self.metrics.close()
+            self.cap.release()
+        cv2.destroyAllWindows()
+    
     def run(self):
         """Fungsi utama untuk menjalankan aplikasi"""
         print("=== Aplikasi Dahi Pointer Cursor ===")
@@ -172,90 +333,65 @@ class ForeheadCursor:
         print("6. Tekan 'q' untuk keluar")
         print()
         
-        while True:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-            
-            # Flip frame horizontal untuk efek mirror
-            frame = cv2.flip(frame, 1)
-            h, w, _ = frame.shape
-            
-            # Konversi ke RGB untuk MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.face_mesh.process(rgb_frame)
-            
-            if results.multi_face_landmarks:
-                for face_landmarks in results.multi_face_landmarks:
-                    # Gambar face mesh (opsional, untuk debugging)
-                    # self.mp_drawing.draw_landmarks(
-                    #     frame, face_landmarks, self.mp_face_mesh.FACEMESH_CONTOURS,
-                    #     None, self.mp_drawing_styles.get_default_face_mesh_contours_style())
-                    
-                    # Dapatkan posisi dahi
-                    forehead_pos = self.get_forehead_point(face_landmarks, w, h)
-                    
-                    if forehead_pos:
-                        # Kalibrasi jika masih dalam mode kalibrasi
-                        if self.calibrate_movement_area(forehead_pos):
-                            # Gambar lingkaran kalibrasi
-                            cv2.circle(frame, forehead_pos, self.pointer_radius + 5, (0, 255, 255), 2)
-                        else:
-                            # Mode normal - kontrol cursor
-                            screen_pos = self.map_to_screen_coordinates(forehead_pos, w, h)
-                            
-                            if screen_pos:
-                                # Smoothing gerakan cursor
-                                smooth_pos = self.smooth_cursor_movement(screen_pos)
-                                
-                                # Gerakkan cursor mouse
-                                pyautogui.moveTo(smooth_pos[0], smooth_pos[1])
-                                
-                                # Gambar pointer dengan trail
-                                self.draw_pointer_trail(frame, forehead_pos)
-                                
-                                # Gambar pointer utama
-                                cv2.circle(frame, forehead_pos, self.pointer_radius, self.pointer_color, -1)
-                                cv2.circle(frame, forehead_pos, self.pointer_radius + 2, (255, 255, 255), 2)
-                                
-                                # Tampilkan koordinat
-                                coord_text = f"Screen: ({smooth_pos[0]}, {smooth_pos[1]})"
-                                cv2.putText(frame, coord_text, (10, 60), 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            
-            # Gambar UI elements
-            self.draw_ui_elements(frame)
-            
-            # Tampilkan frame
-            cv2.imshow('Dahi Pointer Cursor', frame)
-            
-            # Handle keyboard input
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
-                break
-            elif key == ord('c'):
-                # Reset kalibrasi
-                self.calibration_mode = True
-                self.calibration_frames = 0
-                self.calibration_positions = []
-                self.center_point = None
-                self.prev_cursor_pos = None
-                print("Kalibrasi ulang...")
-            elif key == ord(' '):
-                # Klik mouse
-                if not self.calibration_mode:
-                    pyautogui.click()
-                    print("Mouse clicked!")
-        
-        # Cleanup
-        self.cap.release()
-        cv2.destroyAllWindows()
+        try:
+            while True:
+                self.metrics.begin_frame()
+                frame_start = t = TRACER.begin_frame()
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                self.metrics.mark('capture')
+                t = TRACER.span('read', t)
+                
+                # Flip frame horizontal untuk efek mirror
+                frame = cv2.flip(frame, 1)
+                t = TRACER.span('flip', t)
+                
+                # Frame statis: pakai ulang landmark dan keputusan dari inference terakhir
+                infer = self.motion_gate.should_infer(frame)
+                t = TRACER.span('motion_gate', t)
+                if infer:
+                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    t = TRACER.span('cvtColor', t)
+                    results = self.motion_gate.store(self.face_mesh.process(rgb_frame))
+                    t = TRACER.span('process', t)
+                else:
+                    results = self.motion_gate.results
+                self.metrics.mark('inference')
+                frame = self.process_frame(frame, results)
+                self.metrics.mark('features')
+                t = TRACER.span('features', t)
+                
+                # Tampilkan frame
+                cv2.imshow(self.window_name, frame)
+                t = TRACER.span('imshow', t)
+                
+                # Handle keyboard input
+                key = cv2.waitKey(1) & 0xFF
+                TRACER.span('waitKey', t)
+                TRACER.handle_key(key)
+                keep_running = self.handle_key(key)
+                self.metrics.mark('render')
+                self.metrics.end_frame()
+                TRACER.end_frame(frame_start)
+                if not keep_running:
+                    break
+        finally:
+            self.cleanup()
 
 def main():
     """Fungsi main untuk menjalankan aplikasi"""
     try:
-        app = ForeheadCursor()
+        cursor_options, argv = cursor_options_from_argv()
+        motion_gate, argv = motion_gate_from_argv(argv)
+        metrics_server, argv = metrics_server_from_argv(argv)
+        tracer, argv = trace_from_argv(argv)
+        app = ForeheadCursor(source_from_argv(argv), motion_gate=motion_gate, **cursor_options)
         app.run()
+        if tracer.enabled:
+            tracer.export()
+        if metrics_server is not None:
+            metrics_server.stop()
     except KeyboardInterrupt:
         print("\nAplikasi dihentikan oleh user.")
     except Exception as e:
@@ -0,0 +1,291 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import types
+
+import cv2
+import numpy as np
+
+from calibration_store import PATH_ENV
+from controllers import CONTROLLERS, load_script_module
+from frame_sources import open_source
+from startup import STARTUP
+from system_actions import stub_methods
+
+
+# Method controller yang tidak diukur sebagai stage
+SKIPPED_METHODS = {'run', 'run_detection', 'cleanup'}
+
+# Jumlah aksi output yang dicegat stub (direset per controller)
+OUTPUT_ACTIONS = {'moveTo': 0, 'click': 0, 'press': 0, 'release': 0, 'system': 0}
+
+
+class StageTimer:
+    """Kumpulkan durasi per stage (nanodetik)"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def record(self, stage, duration_ns):
+        self.samples.setdefault(stage, []).append(duration_ns)
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter_ns() - start)
+        return timed
+
+    def summary(self):
+        report = {}
+        for stage, values in sorted(self.samples.items()):
+            ms = np.asarray(values, dtype=np.float64) / 1e6
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            report[stage] = {
+                'count': int(ms.size),
+                'mean_ms': round(float(ms.mean()), 4),
+                'p50_ms': round(float(p50), 4),
+                'p95_ms': round(float(p95), 4),
+                'p99_ms': round(float(p99), 4),
+                'max_ms': round(float(ms.max()), 4),
+            }
+        return report
+
+
+class _TimedCV2:
+    """Proxy modul cv2 untuk controller: stage flip/cvtColor/imshow/waitKey diukur"""
+
+    def __init__(self, timer, headless):
+        self._timer = timer
+        self.flip = timer.wrap('flip', cv2.flip)
+        self.cvtColor = timer.wrap('cvtColor', cv2.cvtColor)
+        if headless:
+            self.imshow = timer.wrap('imshow', lambda *args: None)
+            self.waitKey = timer.wrap('waitKey', lambda *args: -1)
+            self.destroyAllWindows = lambda: None
+        else:
+            self.imshow = timer.wrap('imshow', cv2.imshow)
+            self.waitKey = timer.wrap('waitKey', cv2.waitKey)
+
+    def __getattr__(self, name):
+        return getattr(cv2, name)
+
+
+class _TimedProxy:
+    """Bungkus objek (FaceMesh, Hands, CascadeClassifier) dan ukur method tertentu"""
+
+    def __init__(self, target, timer, methods):
+        self._target = target
+        for method, stage in methods.items():
+            setattr(self, method, timer.wrap(stage, getattr(target, method)))
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+
+class _TimedCapture:
+    """Bungkus ThreadedCapture: ukur read() dan interval end-to-end antar frame"""
+
+    def __init__(self, capture, timer):
+        self._capture = capture
+        self._timer = timer
+        self._last_frame_ns = None
+        self.frames = 0
+
+    def read(self):
+        start = time.perf_counter_ns()
+        ret, frame = self._capture.read()
+        now = time.perf_counter_ns()
+        self._timer.record('read', now - start)
+        if ret:
+            if self._last_frame_ns is not None:
+                self._timer.record('frame', now - self._last_frame_ns)
+            self._last_frame_ns = now
+            self.frames += 1
+        return ret, frame
+
+    def __getattr__(self, name):
+        return getattr(self._capture, name)
+
+
+def install_output_stubs():
+    """Ganti pyautogui/pynput dengan stub agar benchmark tidak menggerakkan mouse/keyboard"""
+    def count(action, result=None):
+        def stub(*args, **kwargs):
+            OUTPUT_ACTIONS[action] += 1
+            return result
+        return stub
+
+    pyautogui = types.ModuleType('pyautogui')
+    pyautogui.FAILSAFE = False
+    pyautogui.PAUSE = 0.0
+    pyautogui.size = lambda: (1920, 1080)
+    pyautogui.position = lambda: (960, 540)
+    pyautogui.moveTo = count('moveTo')
+    pyautogui.click = count('click')
+    sys.modules['pyautogui'] = pyautogui
+
+    keyboard = types.ModuleType('pynput.keyboard')
+    keyboard.Key = types.SimpleNamespace(left='left', right='right', up='up', down='down', space='space')
+
+    class Controller:
+        press = staticmethod(count('press'))
+        release = staticmethod(count('release'))
+
+    keyboard.Controller = Controller
+    keyboard.Listener = object
+    pynput = types.ModuleType('pynput')
+    pynput.keyboard = keyboard
+    sys.modules['pynput'] = pynput
+    sys.modules['pynput.keyboard'] = keyboard
+
+    return types.SimpleNamespace(system=count('system', 0))
+
+
+def benchmark_controller(name, source_spec, headless=True):
+    """Jalankan satu controller di atas clip dan kembalikan laporan per stage"""
+    filename, class_name, run_method, _ = CONTROLLERS[name]
+    os_stub = install_output_stubs()
+    for action in OUTPUT_ACTIONS:
+        OUTPUT_ACTIONS[action] = 0
+    module = load_script_module(filename)
+    timer = StageTimer()
+
+    # Instrumentasi level modul: cv2, pembuatan capture, aksi OS
+    real_cv2 = module.cv2
+    real_capture = module.ThreadedCapture
+    module.cv2 = _TimedCV2(timer, headless)
+    capture_holder = []
+
+    def make_capture(*args, **kwargs):
+        capture_holder.append(_TimedCapture(real_capture(*args, **kwargs), timer))
+        return capture_holder[-1]
+
+    module.ThreadedCapture = make_capture
+    # Aksi OS (sleep/shutdown) lewat executor: perintah stub yang hanya mencetak
+    real_executor = getattr(module, 'ActionExecutor', None)
+    if real_executor is not None:
+        module.ActionExecutor = lambda: real_executor(stub_methods())
+    if hasattr(module, 'os'):
+        real_os = module.os
+        module.os = os_stub
+
+    # Profil kalibrasi sementara: setiap benchmark mulai dari kalibrasi penuh
+    calibration_dir = tempfile.TemporaryDirectory()
+    real_calibration_path = os.environ.get(PATH_ENV)
+    os.environ[PATH_ENV] = os.path.join(calibration_dir.name, 'calibration.json')
+
+    error = None
+    controller = None
+    STARTUP.reset()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            controller = getattr(module, class_name)(open_source(source_spec))
+
+            # Instrumentasi level instance: inference dan semua method fitur/gambar
+            for attr, methods in (('face_mesh', {'process': 'process'}),
+                                  ('hands', {'process': 'process'}),
+                                  ('face_cascade', {'detectMultiScale': 'detectMultiScale'}),
+                                  ('eye_cascade', {'detectMultiScale': 'detectMultiScale_eye'}),
+                                  ('face_tracker', {'detect': 'face_tracker'})):
+                if hasattr(controller, attr):
+                    setattr(controller, attr, _TimedProxy(getattr(controller, attr), timer, methods))
+            for method_name in dir(type(controller)):
+                if method_name.startswith('_') or method_name in SKIPPED_METHODS:
+                    continue
+                method = getattr(controller, method_name)
+                if callable(method):
+                    setattr(controller, method_name, timer.wrap(method_name, method))
+
+            start = time.perf_counter()
+            getattr(controller, run_method)()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        wall_time = time.perf_counter() - start
+        module.cv2 = real_cv2
+        module.ThreadedCapture = real_capture
+        if real_executor is not None:
+            module.ActionExecutor = real_executor
+        if hasattr(module, 'os'):
+            module.os = real_os
+        if real_calibration_path is None:
+            os.environ.pop(PATH_ENV, None)
+        else:
+            os.environ[PATH_ENV] = real_calibration_path
+        calibration_dir.cleanup()
+
+    if controller is not None and hasattr(controller, 'actions'):
+        OUTPUT_ACTIONS['system'] += controller.actions.completed
+    frames = capture_holder[0].frames if capture_holder else 0
+    report = {
+        'script': filename,
+        'class': class_name,
+        'source': str(source_spec),
+        'frames': frames,
+        'wall_time_s': round(wall_time, 4),
+        'fps': round(frames / wall_time, 2) if wall_time > 0 else 0.0,
+        'actions': dict(OUTPUT_ACTIONS),
+        'startup': STARTUP.get_stats(),
+        'stages': timer.summary(),
+    }
+    if controller is not None and hasattr(controller, 'motion_gate'):
+        report['motion_gate'] = controller.motion_gate.get_stats()
+    if error:
+        report['error'] = error
+    return report
+
+
+def environment_info():
+    info = {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+    }
+    try:
+        import mediapipe
+        info['mediapipe'] = mediapipe.__version__
+    except ImportError:
+        info['mediapipe'] = None
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark latency per stage semua controller")
+    parser.add_argument('--controllers', nargs='+', default=list(CONTROLLERS),
+                        choices=list(CONTROLLERS), help="controller yang diukur (default: semua)")
+    parser.add_argument('--face-clip', default='synthetic:300',
+                        help="clip rekaman wajah (file video / folder gambar)")
+    parser.add_argument('--hand-clip', default='synthetic:300',
+                        help="clip rekaman tangan (file video / folder gambar)")
+    parser.add_argument('--show', action='store_true', help="tampilkan window (default headless)")
+    parser.add_argument('--output', help="tulis JSON ke file (default: stdout)")
+    args = parser.parse_args()
+
+    results = {'environment': environment_info(), 'controllers': {}}
+    for name in args.controllers:
+        clip = args.hand_clip if CONTROLLERS[name][3] == 'hand' else args.face_clip
+        print(f"Benchmark {name} ({clip})...", file=sys.stderr)
+        results['controllers'][name] = benchmark_controller(name, clip, headless=not args.show)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import getpass
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+# Lokasi default profil; bisa diganti lewat environment (misal untuk benchmark)
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.head_control', 'calibration.json')
+PATH_ENV = 'HEAD_CONTROL_CALIBRATION'
+
+
+class CalibrationStore:
+    """Profil kalibrasi tersimpan per user, controller, dan resolusi kamera.
+
+    Disimpan sebagai satu file JSON: {"user/controller/640x480": {...}}.
+    Penulisan atomic (file sementara + os.replace) agar profil tidak rusak
+    jika beberapa controller berjalan bersamaan di workstation yang sama.
+    """
+
+    def __init__(self, path=None, user=None):
+        self.path = path or os.environ.get(PATH_ENV) or DEFAULT_PATH
+        self.user = user or getpass.getuser()
+
+    def key(self, controller, width, height):
+        return f"{self.user}/{controller}/{width}x{height}"
+
+    def _read_all(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, controller, width, height):
+        """Profil untuk controller dan resolusi ini, atau None"""
+        return self._read_all().get(self.key(controller, width, height))
+
+    def save(self, controller, width, height, **fields):
+        """Gabungkan field ke profil yang ada lalu tulis ulang file"""
+        profiles = self._read_all()
+        key = self.key(controller, width, height)
+        profile = profiles.get(key, {})
+        profile.update({name: _to_json(value) for name, value in fields.items()})
+        profile['updated'] = time.strftime("%Y-%m-%d %H:%M:%S")
+        profiles[key] = profile
+
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(profiles, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Gagal menyimpan profil kalibrasi: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _to_json(value):
+    """Konversi nilai numpy (array, skalar, dict berisi numpy) ke tipe JSON"""
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return np.asarray(value).tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class DriftCheck:
+    """Validasi diam-diam profil tersimpan terhadap beberapa frame pertama.
+
+    add() mengumpulkan sampel; setelah `frames` sampel, check(samples)
+    dipanggil sekali dan hasilnya (True = profil masih cocok, False = drift)
+    dikembalikan. Sebelum itu add() mengembalikan None.
+    """
+
+    def __init__(self, check, frames=10):
+        self.check = check
+        self.frames = frames
+        self.samples = []
+
+    def add(self, sample):
+        self.samples.append(sample)
+        if len(self.samples) < self.frames:
+            return None
+        return bool(self.check(np.asarray(self.samples, dtype=np.float64)))
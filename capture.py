@@ -0,0 +1,131 @@
+import threading
+import time
+
+from frame_sources import open_source
+from pipeline_trace import TRACER
+from startup import STARTUP
+
+
+class ThreadedCapture:
+    """Capture frame di thread terpisah dengan slot "latest frame wins".
+
+    Thread pembaca terus mengambil frame dari kamera sehingga buffer internal
+    driver tidak menumpuk. Loop controller selalu mendapat frame paling baru;
+    frame yang tertimpa sebelum sempat dibaca dihitung sebagai dropped.
+    """
+
+    def __init__(self, source=0, width=640, height=480, fps=None, read_timeout=5.0,
+                 latest_only=None):
+        # source: index kamera, path, "synthetic", FrameSource, atau objek mirip VideoCapture
+        if isinstance(source, (int, str)):
+            source = open_source(source, width, height, fps)
+        self.cap = source
+
+        # Sumber live/real-time: frame lama ditimpa. Rekaman "secepat mungkin":
+        # thread pembaca menunggu frame sebelumnya diambil agar tidak ada yang hilang
+        if latest_only is None:
+            latest_only = getattr(source, 'realtime', True)
+        self.latest_only = latest_only
+
+        self.read_timeout = read_timeout
+
+        # Slot frame terbaru
+        self._cond = threading.Condition()
+        self._frame = None
+        self._timestamp = None
+        self._seq = 0
+        self._consumed_seq = 0
+        self._ended = False
+        self._running = True
+
+        # Statistik
+        self.frames_captured = 0
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+        self.last_timestamp = None
+        self.last_frame_id = 0
+
+        self._thread = threading.Thread(target=self._reader, name="ThreadedCapture", daemon=True)
+        self._thread.start()
+
+    def _reader(self):
+        """Loop thread pembaca: simpan frame terbaru, timpa yang belum dibaca"""
+        while self._running:
+            grab_start = TRACER.now()
+            ret, frame = self.cap.read()
+            TRACER.span('capture.grab', grab_start)
+            timestamp = time.perf_counter()
+
+            with self._cond:
+                if not self.latest_only:
+                    self._cond.wait_for(lambda: self._seq == self._consumed_seq or not self._running)
+                    timestamp = time.perf_counter()
+
+                if not ret:
+                    self._ended = True
+                    self._cond.notify_all()
+                    break
+
+                if self._seq > self._consumed_seq:
+                    # Frame sebelumnya belum sempat diproses -> dibuang
+                    self.frames_dropped += 1
+
+                self._frame = frame
+                self._timestamp = timestamp
+                self._seq += 1
+                self.frames_captured += 1
+                self._cond.notify_all()
+
+    def read(self):
+        """Ambil frame terbaru yang belum pernah dibaca (kompatibel dengan cv2.VideoCapture.read)"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._seq > self._consumed_seq or self._ended or not self._running,
+                timeout=self.read_timeout
+            )
+            if self._seq == self._consumed_seq:
+                return False, None
+
+            self._consumed_seq = self._seq
+            self.frames_delivered += 1
+            self.last_timestamp = self._timestamp
+            self.last_frame_id = self._seq
+            frame = self._frame
+            self._cond.notify_all()
+        STARTUP.mark('first_frame')
+        return True, frame
+
+    def frame_age(self):
+        """Umur frame terakhir yang dibaca (detik sejak di-capture)"""
+        if self.last_timestamp is None:
+            return 0.0
+        return time.perf_counter() - self.last_timestamp
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def get_stats(self):
+        """Statistik capture untuk ditampilkan saat cleanup"""
+        total = self.frames_captured
+        return {
+            'captured': total,
+            'delivered': self.frames_delivered,
+            'dropped': self.frames_dropped,
+            'drop_rate': (self.frames_dropped / total) if total > 0 else 0.0,
+        }
+
+    def summary(self):
+        """Ringkasan satu baris statistik capture"""
+        stats = self.get_stats()
+        return (f"Capture: {stats['captured']} frame, {stats['dropped']} dropped "
+                f"({stats['drop_rate'] * 100:.1f}%)")
+
+    def release(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+        self.cap.release()
@@ -0,0 +1,41 @@
+import importlib.util
+import os
+import sys
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# nama -> (file script, nama class, method loop utama, jenis input)
+CONTROLLERS = {
+    'head_tracking': ('1.py', 'HeadTrackingRemote', 'run', 'face'),
+    'eye_cursor_haar': ('2.py', 'EyeCursorController', 'run', 'face'),
+    'head_rotation': ('3.py', 'HeadRotationRemote', 'run', 'face'),
+    'game': ('4.py', 'GameHeadController', 'run', 'face'),
+    'forehead_cursor_basic': ('5.py', 'ForeheadCursor', 'run', 'face'),
+    'forehead_cursor': ('cursor.py', 'ForeheadCursor', 'run', 'face'),
+    'eye': ('eye.py', 'EyeController', 'run', 'face'),
+    'sleep_gesture': ('sleep.py', 'HandGestureDetector', 'run_detection', 'hand'),
+    'shutdown_gesture': ('shutdown.py', 'HandGestureDetector', 'run_detection', 'hand'),
+}
+
+
+def load_script_module(filename):
+    """Import script controller berdasarkan nama file (termasuk 1.py, 3.py, ...)"""
+    module_name = 'controller_' + os.path.splitext(filename)[0]
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(BASE_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_controller_class(name):
+    """Ambil class controller dari registry"""
+    filename, class_name, _, _ = CONTROLLERS[name]
+    return getattr(load_script_module(filename), class_name)
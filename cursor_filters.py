@@ -0,0 +1,231 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+
+class EmaFilter:
+    """Exponential moving average (smoothing lama di smooth_cursor_movement)"""
+
+    def __init__(self, smoothing_factor=0.7):
+        self.smoothing_factor = smoothing_factor
+        self.reset()
+
+    def reset(self):
+        self._pos = None
+
+    def filter(self, pos, timestamp=None):
+        pos = np.asarray(pos, dtype=np.float64)
+        if self._pos is None:
+            self._pos = pos
+        else:
+            self._pos = self._pos * self.smoothing_factor + pos * (1 - self.smoothing_factor)
+        return self._pos
+
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al.): cutoff low-pass naik sesuai kecepatan.
+
+    Saat diam cutoff = min_cutoff (Hz) sehingga jitter diredam kuat; saat
+    bergerak cepat cutoff bertambah beta * kecepatan (px/s) sehingga lag
+    mengecil. Kecepatan diambil dari norma vektor 2D agar x dan y konsisten.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0, default_dt=1 / 30):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.default_dt = default_dt
+        self.reset()
+
+    def reset(self):
+        self._pos = None
+        self._velocity = None
+        self._timestamp = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, pos, timestamp=None):
+        pos = np.asarray(pos, dtype=np.float64)
+        if timestamp is None:
+            timestamp = time.perf_counter()
+
+        if self._pos is None:
+            self._pos = pos
+            self._velocity = np.zeros_like(pos)
+            self._timestamp = timestamp
+            return self._pos
+
+        dt = timestamp - self._timestamp
+        if dt <= 0:
+            dt = self.default_dt
+        self._timestamp = timestamp
+
+        # Kecepatan (px/s) yang di-low-pass dengan cutoff tetap
+        velocity = (pos - self._pos) / dt
+        self._velocity += self._alpha(self.d_cutoff, dt) * (velocity - self._velocity)
+
+        cutoff = self.min_cutoff + self.beta * float(np.hypot(*self._velocity))
+        self._pos = self._pos + self._alpha(cutoff, dt) * (pos - self._pos)
+        return self._pos
+
+
+FILTERS = {
+    'ema': EmaFilter,
+    'one_euro': OneEuroFilter,
+}
+# EMA (smoothing_factor) tetap default agar rasa cursor tidak berubah; One Euro opt-in lewat --filter
+DEFAULT_FILTER = 'ema'
+
+
+def make_filter(name, **params):
+    """Buat filter cursor berdasarkan nama ('ema' / 'one_euro')"""
+    if name not in FILTERS:
+        raise ValueError(f"Filter tidak dikenal: {name} (pilih: {', '.join(FILTERS)})")
+    return FILTERS[name](**params)
+
+
+def cursor_options_from_argv(argv=None):
+    """Ambil opsi --filter/--predict dari command line, kembalikan (kwargs controller, argumen sisanya)"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--filter', choices=list(FILTERS), default=DEFAULT_FILTER,
+                        help="filter cursor: ema (default, smoothing tetap) atau one_euro (opt-in, adaptif)")
+    parser.add_argument('--predict', action='store_true',
+                        help="prediksi Kalman untuk mengkompensasi latency cursor")
+    args, remaining = parser.parse_known_args(argv)
+    return {'cursor_filter': args.filter, 'predict': args.predict}, remaining
+
+
+# --- Evaluasi offline pada trace (t, x, y) ---
+
+def synthetic_trace(duration=20.0, fps=30, noise_px=4.0, seed=0):
+    """Trace cursor buatan: diam, geser pelan, geser cepat, kembali; plus noise gaussian.
+
+    Mengembalikan (timestamps, raw (T, 2), truth (T, 2)).
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(0, duration, 1 / fps)
+    truth = np.empty((len(t), 2))
+    phase = t % 10
+    # 0-2 s diam, 2-5 s geser pelan, 5-6 s diam, 6-7 s geser cepat, 7-8 s diam, 8-10 s kembali
+    slow = np.clip((phase - 2) / 3, 0, 1) * 200
+    fast = np.clip(phase - 6, 0, 1) * 800
+    back = np.clip((phase - 8) / 2, 0, 1) * 1000
+    truth[:, 0] = 460 + slow + fast - back
+    truth[:, 1] = 540 + 0.5 * (slow - np.clip((phase - 8) / 2, 0, 1) * 200)
+    raw = truth + rng.normal(0, noise_px, truth.shape)
+    return t, raw, truth
+
+
+def load_trace(path):
+    """Baca trace .npy / .csv berkolom (t, x, y)"""
+    if path.endswith('.npy'):
+        data = np.load(path)
+    else:
+        data = np.loadtxt(path, delimiter=',', skiprows=1)
+    return data[:, 0], data[:, 1:3]
+
+
+def trace_from_clip(path, sensitivity=3):
+    """Trace titik dahi dari clip rekaman (FaceMesh), diskalakan seperti mapping ke layar"""
+    import cv2
+    import mediapipe as mp
+
+    from frame_sources import open_source
+    from landmark_array import LandmarkArray, face_points
+
+    source = open_source(path)
+    fps = source.fps or 30
+    buffer = LandmarkArray()
+    timestamps, positions = [], []
+    with mp.solutions.face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True) as face_mesh:
+        index = 0
+        while True:
+            ret, frame = source.read()
+            if not ret:
+                break
+            frame = cv2.flip(frame, 1)
+            points = face_points(face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)),
+                                 frame.shape[1], frame.shape[0], buffer)
+            if points is not None:
+                timestamps.append(index / fps)
+                positions.append(points[[10, 151, 9, 10], :2].mean(axis=0) * sensitivity)
+            index += 1
+    source.release()
+    return np.asarray(timestamps), np.asarray(positions)
+
+
+def centered_reference(raw, window=7):
+    """Referensi tanpa lag (moving average terpusat, non-kausal) untuk trace rekaman"""
+    kernel = np.ones(window) / window
+    padded = np.pad(raw, ((window // 2, window // 2), (0, 0)), mode='edge')
+    return np.stack([np.convolve(padded[:, axis], kernel, mode='valid') for axis in range(2)], axis=1)
+
+
+def apply_filter(cursor_filter, timestamps, raw):
+    cursor_filter.reset()
+    return np.array([cursor_filter.filter(pos, t) for t, pos in zip(timestamps, raw)])
+
+
+def evaluate_filter(timestamps, filtered, reference, still_speed=60.0, settle_s=0.5, max_lag_ms=400):
+    """Jitter RMS (px) saat diam dan lag (ms) saat bergerak terhadap referensi.
+
+    Jitter: RMS jarak filtered ke referensi di frame yang sudah diam (kecepatan
+    referensi < still_speed px/s) minimal settle_s detik. Lag: pergeseran waktu
+    referensi yang paling cocok dengan output filter di frame yang bergerak.
+    """
+    speed = np.hypot(*np.gradient(reference, timestamps, axis=0).T)
+    moving = speed >= still_speed
+    # Waktu sejak gerakan terakhir; frame yang baru berhenti masih "mengejar"
+    last_moving = np.maximum.accumulate(np.where(moving, timestamps, -np.inf))
+    still = timestamps - last_moving >= settle_s
+
+    error = np.hypot(*(filtered - reference).T)
+    jitter = float(np.sqrt(np.mean(error[still] ** 2))) if still.any() else 0.0
+
+    lags = np.arange(0, max_lag_ms + 1) / 1000.0
+    # Referensi digeser mundur sebesar lag: shifted[l, i] = reference(t_i - lag_l)
+    shifted_x = np.interp(timestamps[None, :] - lags[:, None], timestamps, reference[:, 0])
+    shifted_y = np.interp(timestamps[None, :] - lags[:, None], timestamps, reference[:, 1])
+    mse = ((shifted_x - filtered[:, 0]) ** 2 + (shifted_y - filtered[:, 1]) ** 2)[:, moving].mean(axis=1)
+    lag_ms = float(lags[np.argmin(mse)] * 1000) if moving.any() else 0.0
+    return {'jitter_rms_px': round(jitter, 2), 'lag_ms': round(lag_ms, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluasi offline filter cursor: jitter RMS dan lag")
+    parser.add_argument('trace', nargs='?', default='synthetic',
+                        help="trace .npy/.csv (t, x, y), clip video/folder, atau 'synthetic' (default)")
+    parser.add_argument('--min-cutoff', type=float, default=1.0)
+    parser.add_argument('--beta', type=float, default=0.01)
+    args = parser.parse_args()
+
+    if args.trace == 'synthetic':
+        timestamps, raw, reference = synthetic_trace()
+    else:
+        if args.trace.endswith(('.npy', '.csv')):
+            timestamps, raw = load_trace(args.trace)
+        else:
+            timestamps, raw = trace_from_clip(args.trace)
+        reference = centered_reference(raw)
+
+    candidates = {
+        'raw': None,
+        'ema 0.6': EmaFilter(0.6),
+        'ema 0.7': EmaFilter(0.7),
+        f'one_euro {args.min_cutoff}/{args.beta}': OneEuroFilter(args.min_cutoff, args.beta),
+    }
+    print(f"Trace: {args.trace} ({len(timestamps)} sampel)")
+    print(f"{'filter':24s} {'jitter RMS (px)':>16s} {'lag (ms)':>10s}")
+    for name, cursor_filter in candidates.items():
+        filtered = raw if cursor_filter is None else apply_filter(cursor_filter, timestamps, raw)
+        result = evaluate_filter(timestamps, filtered, reference)
+        print(f"{name:24s} {result['jitter_rms_px']:16.2f} {result['lag_ms']:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import time
+
+import numpy as np
+
+from cursor_filters import OneEuroFilter, apply_filter, evaluate_filter, synthetic_trace
+
+
+class CursorPredictor:
+    """Kalman filter constant-velocity / constant-acceleration untuk posisi cursor.
+
+    x dan y memakai model yang sama sehingga cukup satu matriks kovarians;
+    state disimpan sebagai array (k, 2). Setiap measurement, posisi
+    diekstrapolasi ke saat moveTo benar-benar dieksekusi untuk menutup
+    latency capture + inference + output. Jika innovation (jarak Mahalanobis
+    kuadrat) melewati threshold, misalnya saat wajah melompat atau setelah
+    kalibrasi ulang, state direset ke measurement dan prediksi dilewati.
+    """
+
+    def __init__(self, model='velocity', process_noise=2e5, measurement_noise=4.0,
+                 horizon=None, max_horizon=0.15, innovation_threshold=25.0):
+        if model not in ('velocity', 'acceleration'):
+            raise ValueError(f"Model tidak dikenal: {model}")
+        self.model = model
+        self.order = 2 if model == 'velocity' else 3
+        self.process_noise = process_noise  # Spektral density (px²/s³ atau px²/s⁵)
+        self.measurement_noise = measurement_noise  # Varians measurement (px²)
+        self.horizon = horizon  # Detik setelah capture; None = otomatis (umur frame + latency output)
+        self.max_horizon = max_horizon
+        self.innovation_threshold = innovation_threshold
+
+        # Statistik
+        self.updates = 0
+        self.fallbacks = 0
+        self.reset()
+
+    def reset(self):
+        self.state = None  # (k, 2): posisi, kecepatan[, percepatan] untuk x dan y
+        self.covariance = None
+        self.timestamp = None
+
+    def _transition(self, dt):
+        if self.order == 2:
+            return np.array([[1.0, dt], [0.0, 1.0]])
+        return np.array([[1.0, dt, dt * dt / 2], [0.0, 1.0, dt], [0.0, 0.0, 1.0]])
+
+    def _process_covariance(self, dt):
+        q = self.process_noise
+        if self.order == 2:
+            return q * np.array([[dt ** 3 / 3, dt ** 2 / 2],
+                                 [dt ** 2 / 2, dt]])
+        return q * np.array([[dt ** 5 / 20, dt ** 4 / 8, dt ** 3 / 6],
+                             [dt ** 4 / 8, dt ** 3 / 3, dt ** 2 / 2],
+                             [dt ** 3 / 6, dt ** 2 / 2, dt]])
+
+    def _initialize(self, pos, timestamp):
+        self.state = np.zeros((self.order, 2))
+        self.state[0] = pos
+        self.covariance = np.diag([self.measurement_noise] + [1e6] * (self.order - 1))
+        self.timestamp = timestamp
+
+    def update(self, pos, timestamp):
+        """Masukkan measurement baru; False jika innovation terlalu besar (state direset)"""
+        pos = np.asarray(pos, dtype=np.float64)
+        self.updates += 1
+        if self.state is None:
+            self._initialize(pos, timestamp)
+            return True
+
+        dt = max(timestamp - self.timestamp, 1e-3)
+        F = self._transition(dt)
+        state = F @ self.state
+        covariance = F @ self.covariance @ F.T + self._process_covariance(dt)
+
+        # Measurement hanya posisi: H = [1, 0(, 0)], sehingga S skalar sama untuk x dan y
+        innovation = pos - state[0]
+        S = covariance[0, 0] + self.measurement_noise
+        if float(innovation @ innovation) / S > self.innovation_threshold:
+            self.fallbacks += 1
+            self._initialize(pos, timestamp)
+            return False
+
+        gain = covariance[:, 0] / S
+        self.state = state + np.outer(gain, innovation)
+        self.covariance = covariance - np.outer(gain, covariance[0])
+        self.timestamp = timestamp
+        return True
+
+    def predict(self, at_time):
+        """Posisi yang diperkirakan pada waktu at_time (perf_counter)"""
+        dt = min(max(at_time - self.timestamp, 0.0), self.max_horizon)
+        return self._transition(dt)[0] @ self.state
+
+    def step(self, pos, timestamp=None, now=None, output_latency=0.0):
+        """Update dengan measurement lalu prediksi posisi saat moveTo dieksekusi"""
+        if now is None:
+            now = time.perf_counter()
+        if timestamp is None:
+            timestamp = now
+
+        if not self.update(pos, timestamp):
+            return tuple(pos)
+
+        if self.horizon is not None:
+            target_time = timestamp + self.horizon
+        else:
+            target_time = now + output_latency
+        predicted = self.predict(target_time)
+        return (predicted[0], predicted[1])
+
+    def get_stats(self):
+        return {
+            'model': self.model,
+            'updates': self.updates,
+            'fallbacks': self.fallbacks,
+        }
+
+    def summary(self):
+        return (f"Kalman predictor ({self.model}): {self.updates} update, "
+                f"{self.fallbacks} fallback (innovation besar)")
+
+
+def main():
+    """Replay offline: lag efektif (termasuk latency pipeline) dengan dan tanpa prediksi"""
+    parser = argparse.ArgumentParser(description="Evaluasi Kalman predictor pada trace cursor")
+    parser.add_argument('--latency-ms', type=float, default=80.0,
+                        help="latency capture -> moveTo yang disimulasikan")
+    parser.add_argument('--noise-px', type=float, default=4.0)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    timestamps, raw, truth = synthetic_trace(noise_px=args.noise_px)
+    # Cursor baru bergerak pada t + latency; dibandingkan dengan posisi kepala saat itu
+    fire_times = timestamps + latency
+    truth_at_fire = np.stack([np.interp(fire_times, timestamps, truth[:, axis]) for axis in range(2)], axis=1)
+    smoothed = apply_filter(OneEuroFilter(), timestamps, raw)
+
+    candidates = {
+        'one_euro (tanpa prediksi)': None,
+        'one_euro + kalman CV': CursorPredictor('velocity'),
+        'one_euro + kalman CA': CursorPredictor('acceleration', process_noise=5e6),
+    }
+    print(f"Latency pipeline: {args.latency_ms:.0f} ms, noise {args.noise_px} px")
+    print(f"{'mode':28s} {'jitter RMS (px)':>16s} {'lag efektif (ms)':>17s} {'fallback':>9s}")
+    for name, predictor in candidates.items():
+        if predictor is None:
+            output = smoothed
+        else:
+            output = np.array([predictor.step(pos, t, now=t, output_latency=latency)
+                               for t, pos in zip(timestamps, smoothed)])
+        result = evaluate_filter(fire_times, output, truth_at_fire)
+        fallbacks = predictor.fallbacks if predictor is not None else 0
+        print(f"{name:28s} {result['jitter_rms_px']:16.2f} {result['lag_ms']:17.1f} {fallbacks:9d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from motion_gate import changed_fraction, downscale_gray
+
+
+MODES = ('idle', 'active')
+
+# Pengganti hasil Hands untuk frame yang tidak diproses saat idle
+IDLE_RESULTS = SimpleNamespace(multi_hand_landmarks=None)
+
+
+class DutyCycle:
+    """Mode idle hemat daya untuk detektor gesture yang berjalan sepanjang hari.
+
+    active: Hands dijalankan di setiap frame (perilaku lama).
+    idle:   hanya idle_fps sampel per detik; tiap sampel diperkecil ke
+            grayscale idle_size dan dibandingkan dengan sampel sebelumnya
+            (frame differencing). Hands hanya dijalankan pada sampel yang
+            ada gerakannya, dan tangan yang terdeteksi membangunkan mode active.
+    Di mode active, tanpa tangan selama idle_timeout detik -> kembali idle.
+
+    CPU dihitung per mode dari time.process_time() (semua thread proses)
+    dibagi waktu wall di mode tersebut. Wake-up latency adalah waktu dari
+    capture frame tempat tangan pertama kali terlihat sampai hasil Hands
+    tersedia, ditambah rata-rata waktu tunggu sampel (setengah interval).
+    """
+
+    def __init__(self, enabled=True, idle_fps=4.0, idle_size=(80, 60), pixel_threshold=20,
+                 motion_fraction=0.005, idle_timeout=10.0):
+        self.enabled = enabled
+        self.idle_interval = 1.0 / idle_fps
+        self.idle_size = idle_size
+        self.pixel_threshold = pixel_threshold  # Selisih gray per pixel yang dianggap berubah
+        self.motion_fraction = motion_fraction  # Fraksi pixel berubah minimal untuk memicu Hands
+        self.idle_timeout = idle_timeout
+
+        # Mulai active: user yang sudah di depan kamera langsung dilacak
+        self.mode = 'active'
+        self._previous = None
+        self._next_sample = 0.0
+        self._hand_visible = False
+        self._last_presence = time.perf_counter()
+        self._mode_since = self._last_presence
+        self._cpu_since = time.process_time()
+
+        # Statistik per mode
+        self.mode_time = dict.fromkeys(MODES, 0.0)
+        self.mode_cpu = dict.fromkeys(MODES, 0.0)
+        self.mode_frames = dict.fromkeys(MODES, 0)  # frame yang dicek (idle: sampel)
+        self.inferences = dict.fromkeys(MODES, 0)
+        self.onset_latency = {mode: deque(maxlen=100) for mode in MODES}
+        self.wakeups = 0
+        self.idle_entries = 0
+
+    def _switch(self, mode):
+        now, cpu = time.perf_counter(), time.process_time()
+        self.mode_time[self.mode] += now - self._mode_since
+        self.mode_cpu[self.mode] += cpu - self._cpu_since
+        self._mode_since, self._cpu_since = now, cpu
+        self.mode = mode
+        if mode == 'idle':
+            self.idle_entries += 1
+            self._previous = None
+            self._next_sample = 0.0
+        else:
+            self.wakeups += 1
+            self._last_presence = now
+
+    def _motion(self, frame):
+        """Frame differencing pada grayscale kecil; sampel pertama dianggap bergerak"""
+        gray = downscale_gray(frame, self.idle_size)
+        previous, self._previous = self._previous, gray
+        if previous is None:
+            return True
+        return changed_fraction(gray, previous, self.pixel_threshold) >= self.motion_fraction
+
+    def should_process(self, frame):
+        """True jika Hands perlu dijalankan pada frame ini"""
+        if not self.enabled or self.mode == 'active':
+            self.mode_frames['active'] += 1
+            return True
+
+        now = time.perf_counter()
+        if now < self._next_sample:
+            return False
+        self._next_sample = now + self.idle_interval
+        self.mode_frames['idle'] += 1
+        return self._motion(frame)
+
+    def update(self, hand_present, capture_time=None):
+        """Panggil setelah Hands. capture_time: perf_counter saat frame di-capture,
+        None jika hasil Hands dipakai ulang (motion gate) tanpa inference baru
+        """
+        now = time.perf_counter()
+        if capture_time is not None:
+            self.inferences[self.mode] += 1
+        if hand_present and not self._hand_visible and capture_time is not None:
+            self.onset_latency[self.mode].append(now - capture_time)
+        self._hand_visible = hand_present
+
+        if not self.enabled:
+            return
+        if hand_present:
+            self._last_presence = now
+            if self.mode == 'idle':
+                self._switch('active')
+        elif self.mode == 'active' and now - self._last_presence > self.idle_timeout:
+            self._switch('idle')
+
+    def wait_ms(self):
+        """Delay untuk cv2.waitKey: 1 ms saat active, sisa interval sampel saat idle"""
+        if self.mode == 'active':
+            return 1
+        return max(1, int((self._next_sample - time.perf_counter()) * 1000))
+
+    def get_stats(self):
+        # Sertakan waktu di mode saat ini yang belum ditutup oleh _switch
+        mode_time, mode_cpu = dict(self.mode_time), dict(self.mode_cpu)
+        mode_time[self.mode] += time.perf_counter() - self._mode_since
+        mode_cpu[self.mode] += time.process_time() - self._cpu_since
+
+        stats = {'mode': self.mode, 'wakeups': self.wakeups, 'idle_entries': self.idle_entries}
+        for mode in MODES:
+            wall = mode_time[mode]
+            rate = self.mode_frames[mode] / wall if wall > 0 else 0.0
+            onset = self.onset_latency[mode]
+            # Tangan muncul rata-rata di tengah interval antar frame/sampel
+            sampling_ms = 500.0 / rate if rate > 0 else 0.0
+            stats[mode] = {
+                'time_s': round(wall, 2),
+                'cpu_percent': round(mode_cpu[mode] / wall * 100, 1) if wall > 0 else 0.0,
+                'checks_per_s': round(rate, 1),
+                'inferences': self.inferences[mode],
+                'wake_latency_ms': round(np.mean(onset) * 1000 + sampling_ms, 1) if onset else None,
+            }
+        return stats
+
+    def summary(self):
+        stats = self.get_stats()
+        parts = []
+        for mode in MODES:
+            mode_stats = stats[mode]
+            latency = mode_stats['wake_latency_ms']
+            latency = f"{latency:.0f} ms" if latency is not None else "n/a"
+            parts.append(f"{mode} {mode_stats['time_s']:.0f}s CPU {mode_stats['cpu_percent']:.0f}% "
+                         f"({mode_stats['checks_per_s']:.1f} cek/s, wake {latency})")
+        return f"Duty cycle: {', '.join(parts)}; {stats['wakeups']} wake-up"
+
+
+def duty_cycle_from_argv(argv=None):
+    """Ambil opsi mode idle dari command line, kembalikan (DutyCycle, argumen sisanya)"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--no-idle', action='store_true',
+                        help="selalu jalankan Hands di setiap frame (tanpa mode idle)")
+    parser.add_argument('--idle-fps', type=float, default=4.0, help="sampel per detik saat idle")
+    parser.add_argument('--idle-timeout', type=float, default=10.0,
+                        help="detik tanpa tangan sebelum kembali ke idle")
+    args, remaining = parser.parse_known_args(argv)
+    return DutyCycle(not args.no_idle, args.idle_fps, idle_timeout=args.idle_timeout), remaining
+
+
+def main():
+    """Ukur CPU per mode: selalu active vs idle (scene diam / bergerak) pada sumber real-time"""
+    parser = argparse.ArgumentParser(description="Benchmark mode idle detektor gesture tangan")
+    parser.add_argument('--seconds', type=float, default=10.0, help="durasi tiap skenario")
+    args = parser.parse_args()
+
+    import mediapipe as mp
+
+    from frame_sources import SyntheticSource
+
+    class StaticSource(SyntheticSource):
+        """Ruangan kosong: frame yang sama terus-menerus"""
+
+        def _read_frame(self, index):
+            return self._background.copy() if index < self.num_frames else None
+
+    num_frames = int(args.seconds * 30)
+    scenarios = (
+        ('selalu active', lambda: SyntheticSource(num_frames=num_frames, realtime=True), False),
+        ('idle, scene diam', lambda: StaticSource(num_frames=num_frames, realtime=True), True),
+        ('idle, scene bergerak', lambda: SyntheticSource(num_frames=num_frames, realtime=True), True),
+    )
+    with mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.7,
+                                  min_tracking_confidence=0.5) as hands:
+        for name, make_source, enabled in scenarios:
+            source = make_source()
+            duty = DutyCycle(enabled, idle_timeout=0.0)
+            while True:
+                ret, frame = source.read()
+                if not ret:
+                    break
+                captured = time.perf_counter()
+                if duty.should_process(frame):
+                    results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                    duty.update(bool(results.multi_hand_landmarks), captured)
+            source.release()
+            stats = duty.get_stats()
+            mode = 'idle' if enabled else 'active'
+            print(f"{name:22s}: CPU {stats[mode]['cpu_percent']:5.1f}%, "
+                  f"{stats[mode]['inferences']} inference Hands dalam {stats[mode]['time_s']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import atexit
+import itertools
+import json
+import sys
+import threading
+import time
+from collections import deque
+
+
+class ConsoleSink:
+    """Output console opsional dengan rate limit (token bucket).
+
+    Dipanggil dari thread writer, bukan dari loop vision. Jika event datang
+    lebih cepat dari `rate` baris/detik (burst sampai `burst`), baris
+    dilewati dan jumlahnya dilaporkan saat token tersedia lagi.
+    """
+
+    def __init__(self, rate=5.0, burst=10, stream=None):
+        self.rate = rate
+        self.burst = burst
+        self.stream = stream
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self.printed = 0
+        self.suppressed = 0
+        self._pending_suppressed = 0
+
+    def _take(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def write(self, records):
+        stream = self.stream or sys.stdout
+        lines = []
+        for _, wall, event, message, fields in records:
+            if not self._take():
+                self.suppressed += 1
+                self._pending_suppressed += 1
+                continue
+            if self._pending_suppressed:
+                lines.append(f"... {self._pending_suppressed} event console dilewati (rate limit)")
+                self._pending_suppressed = 0
+            text = message if message is not None else " ".join(
+                [event] + [f"{key}={value}" for key, value in fields.items()])
+            lines.append(f"[{time.strftime('%H:%M:%S', time.localtime(wall))}] {text}")
+        if lines:
+            # Satu write per batch: jauh lebih murah dari print per baris di console Windows
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+            self.printed += len(lines)
+
+
+class EventLog:
+    """Log event terstruktur: emit() di hot path, I/O di thread writer.
+
+    emit() hanya membuat satu tuple dan append ke ring (deque berkapasitas
+    tetap, append atomik tanpa lock). Thread writer mengambil batch setiap
+    flush_interval detik (atau lebih cepat saat ring setengah penuh) dan
+    menulisnya sebagai JSON lines ke file dan/atau ke ConsoleSink. Jika ring
+    penuh, event tertua ditimpa; celah nomor urut dihitung sebagai dropped.
+    """
+
+    def __init__(self, capacity=4096, flush_interval=0.25):
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.path = None
+        self.console = ConsoleSink()
+
+        self._ring = deque(maxlen=capacity)
+        self._seq = itertools.count()
+        self._wake = threading.Event()
+        self._file = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # flush() bisa dipanggil dari loop vision dan writer
+        self._stopping = False
+
+        # Statistik
+        self.emitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._next_seq = 0
+
+    def configure(self, path=None, console_rate=5.0, console=True):
+        """Atur sink: file JSON lines (path) dan console (None jika console=False)"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.path = path
+            if path is not None:
+                self._file = open(path, 'a', encoding='utf-8')
+            self.console = ConsoleSink(console_rate) if console else None
+        return self
+
+    def emit(self, event, message=None, **fields):
+        """Catat satu event; message = teks console (opsional), fields = data terstruktur"""
+        self._ring.append((next(self._seq), time.time(), event, message, fields))
+        self.emitted += 1
+        if self._thread is None:
+            self._start()
+        elif len(self._ring) > self.capacity // 2:
+            self._wake.set()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._writer, name="EventLog", daemon=True)
+            self._thread.start()
+        # Event yang masih di ring tetap ditulis saat program keluar
+        atexit.register(self.close)
+
+    def _drain(self):
+        records = []
+        while self._ring:
+            try:
+                records.append(self._ring.popleft())
+            except IndexError:
+                break
+        if records:
+            # Ring penuh menimpa event tertua: nomor urut yang hilang = dropped
+            self.dropped += records[0][0] - self._next_seq
+            self._next_seq = records[-1][0] + 1
+        return records
+
+    def _write(self, records):
+        with self._lock:
+            if self._file is not None:
+                lines = []
+                for seq, wall, event, message, fields in records:
+                    record = {'t': round(wall, 6), 'seq': seq, 'event': event}
+                    record.update(fields)
+                    if message is not None:
+                        record['msg'] = message
+                    lines.append(json.dumps(record, ensure_ascii=False, default=str))
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+            if self.console is not None:
+                self.console.write(records)
+        self.written += len(records)
+        self.batches += 1
+
+    def flush(self):
+        with self._flush_lock:
+            records = self._drain()
+            if records:
+                self._write(records)
+
+    def _writer(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Tulis sisa event lalu hentikan writer dan tutup file"""
+        if self._thread is not None and not self._stopping:
+            self._stopping = True
+            self._wake.set()
+            self._thread.join(timeout=2.0)
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def get_stats(self):
+        console = self.console
+        return {
+            'emitted': self.emitted,
+            'written': self.written,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'console_printed': console.printed if console else 0,
+            'console_suppressed': console.suppressed if console else 0,
+        }
+
+    def summary(self):
+        stats = self.get_stats()
+        target = self.path or "tanpa file"
+        return (f"Event log: {stats['emitted']} event ({target}), {stats['batches']} batch, "
+                f"{stats['dropped']} dropped, console {stats['console_printed']} baris / "
+                f"{stats['console_suppressed']} dilewati")
+
+
+# Satu event log per proses; sink diatur oleh event_log_from_argv()
+EVENTS = EventLog()
+
+
+def event_log_from_argv(argv=None):
+    """Ambil opsi --event-log/--quiet/--console-rate, kembalikan (EVENTS, argumen sisanya)"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--event-log', help="tulis event terstruktur ke file JSON lines ini")
+    parser.add_argument('--quiet', action='store_true', help="jangan tampilkan event di console")
+    parser.add_argument('--console-rate', type=float, default=5.0,
+                        help="maksimal baris event console per detik")
+    args, remaining = parser.parse_known_args(argv)
+    EVENTS.configure(args.event_log, args.console_rate, console=not args.quiet)
+    return EVENTS, remaining
+
+
+def main():
+    """Bandingkan biaya hot path: print per event vs emit() ke ring"""
+    parser = argparse.ArgumentParser(description="Benchmark event log vs print di hot path")
+    parser.add_argument('--events', type=int, default=2000, help="jumlah event")
+    parser.add_argument('--log', default='events_benchmark.jsonl', help="file JSON lines keluaran")
+    args = parser.parse_args()
+
+    def print_events():
+        start = time.perf_counter()
+        for i in range(args.events):
+            print(f"[{time.strftime('%H:%M:%S')}] ROTASI KEPALA: {i % 30 - 15:.1f}° → KONTROL: LEFT")
+            print(">>> AKSI: GELENG KIRI TERDETEKSI <<<")
+            print("    🡸 Simulasi: Remote LEFT (Channel Down / Volume Down)")
+            print("-" * 60)
+        return (time.perf_counter() - start) / args.events * 1e6
+
+    print_us = print_events()
+
+    log = EventLog().configure(args.log, console_rate=5.0)
+    start = time.perf_counter()
+    for i in range(args.events):
+        rotation = i % 30 - 15
+        log.emit('control', f"ROTASI KEPALA: {rotation:.1f}° → KONTROL: LEFT (geleng kiri)",
+                 controller='benchmark', direction='LEFT', rotation=rotation)
+    emit_us = (time.perf_counter() - start) / args.events * 1e6
+    log.close()
+    print(f"print per event : {print_us:8.1f} us/event di loop vision")
+    print(f"EventLog.emit() : {emit_us:8.1f} us/event di loop vision")
+    print(log.summary())
+
+
+if __name__ == "__main__":
+    main()
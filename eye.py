@@ -1,50 +1,77 @@
 import cv2
 import numpy as np
-import mediapipe as mp
 import pyautogui
 import time
 import math
 
+from calibration_store import CalibrationStore, DriftCheck
+from capture import ThreadedCapture
+from event_log import EVENTS, event_log_from_argv
+from cursor_filters import DEFAULT_FILTER, cursor_options_from_argv, make_filter
+from cursor_predictor import CursorPredictor
+from eye_features import EyeFeatureExtractor, eye_features_from_argv
+from frame_sources import source_from_argv
+from landmark_array import LandmarkArray
+from metrics import PipelineMetrics, metrics_server_from_argv
+from motion_gate import MotionGate, motion_gate_from_argv
+from pipeline_trace import TRACER, trace_from_argv
+from ring_buffer import RingBuffer
+from startup import STARTUP, lazy_import, parallel_startup
+from output_dispatcher import CursorDispatcher
+
+# Diimpor saat FaceMesh dibangun (paralel dengan pembukaan kamera)
+mp = lazy_import('mediapipe')
+
 class EyeController:
-    def __init__(self):
-        # Inisialisasi MediaPipe Face Mesh
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
+    def __init__(self, source=0, cursor_filter=DEFAULT_FILTER, predict=False, eye_features='iris', motion_gate=None):
+        self.window_name = 'Eye Controller'
         
-        # Drawing utilities
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
+        # source=None: dipasang sebagai plugin LandmarkBus (kamera dan FaceMesh milik bus)
+        self.face_mesh = None
+        self.cap = None
+        if source is not None:
+            # Setup kamera paralel dengan impor mediapipe, pembuatan FaceMesh dan warm-up
+            self.cap, self.face_mesh = parallel_startup(
+                lambda: ThreadedCapture(source, width=640, height=480), self.create_face_mesh)
+        
+        # Motion gate: frame statis memakai ulang hasil FaceMesh terakhir
+        self.motion_gate = motion_gate or MotionGate()
         
-        # Setup kamera
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        # Metric per stage (disajikan lewat HTTP jika --metrics-port diberikan)
+        self.metrics = PipelineMetrics('eye', self.cap)
+        self.metrics.watch('motion_gate', self.motion_gate.get_stats)
         
         # Landmark indices untuk mata
-        self.LEFT_EYE = [362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398]
-        self.RIGHT_EYE = [33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246]
+        self.LEFT_EYE = np.array([362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398])
+        self.RIGHT_EYE = np.array([33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246])
         
         # Iris landmarks (estimasi)
-        self.LEFT_IRIS = [474, 475, 476, 477]
-        self.RIGHT_IRIS = [469, 470, 471, 472]
+        self.LEFT_IRIS = np.array([474, 475, 476, 477])
+        self.RIGHT_IRIS = np.array([469, 470, 471, 472])
+        
+        # Fitur mata: 'iris' (landmark iris + EAR 6 titik, satu pass vektor) atau 'contour' (centroid kontur lama)
+        self.eye_features = eye_features
+        self.feature_extractor = EyeFeatureExtractor()
+        
+        # Buffer landmark (N, 3) yang dipakai ulang setiap frame
+        self.landmark_array = LandmarkArray()
         
         # Konfigurasi layar - Parameter lebih responsif
         self.screen_width, self.screen_height = pyautogui.size()
         self.movement_sensitivity = 3  # Dikurangi untuk kontrol lebih halus
         self.smoothing_factor = 0.6  # Dikurangi untuk respon lebih cepat
         
+        # Filter cursor: 'ema' (default, smoothing_factor) atau 'one_euro' (opt-in, adaptif terhadap kecepatan)
+        filter_params = {'smoothing_factor': self.smoothing_factor} if cursor_filter == 'ema' else {}
+        self.cursor_filter = make_filter(cursor_filter, **filter_params)
+        # Prediksi Kalman posisi cursor saat moveTo dieksekusi (None = nonaktif)
+        self.cursor_predictor = CursorPredictor() if predict else None
+        
         # Dead zone untuk mengurangi noise
         self.dead_zone_x = 0.05
         self.dead_zone_y = 0.05
         
         # State tracking
-        self.prev_cursor_pos = None
         self.calibration_mode = True
         self.calibration_data = {
             'center': [],
@@ -70,17 +97,42 @@ class EyeController:
         self.ear_threshold = 0.3  # Dinaikkan untuk deteksi lebih mudah
         self.ear_consecutive_frames = 2  # Dikurangi untuk respon lebih cepat
         self.ear_counter = 0
-        self.ear_history = []  # History EAR untuk smoothing
         self.ear_history_size = 5
+        self.ear_history = RingBuffer(self.ear_history_size)  # History EAR untuk smoothing
         
         # Baseline EAR untuk kalibrasi otomatis
         self.baseline_ear = None
         self.baseline_frames = 0
         self.baseline_collection_frames = 60
         
+        # Profil kalibrasi tersimpan per user + resolusi; divalidasi diam-diam di frame awal
+        self.calibration_store = CalibrationStore()
+        # Skala gaze/EAR berbeda antar metode fitur, jadi profilnya dipisah
+        self.calibration_profile = 'eye' if eye_features == 'contour' else 'eye_iris'
+        self.profile_size = None  # (w, h) yang profilnya sudah dicoba dimuat
+        self.profile_check = None  # DriftCheck aktif selama validasi profil
+        self.gaze_drift_tolerance = 0.1  # Pergeseran gaze center (posisi relatif iris 0-1)
+        self.ear_drift_tolerance = 0.3  # Perubahan relatif EAR terhadap baseline tersimpan
+        
         # Disable failsafe
         pyautogui.FAILSAFE = False
         
+        # Output mouse dikirim dari thread terpisah (tidak memblokir loop vision)
+        self.cursor_output = CursorDispatcher(metrics=self.metrics)
+        
+    def create_face_mesh(self):
+        """Inisialisasi MediaPipe Face Mesh dan drawing utilities (mediapipe baru diimpor di sini)"""
+        self.mp_face_mesh = mp.solutions.face_mesh
+        self.mp_drawing = mp.solutions.drawing_utils
+        self.mp_drawing_styles = mp.solutions.drawing_styles
+        return self.mp_face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=0.7,
+            min_tracking_confidence=0.7
+        )
+    
     def get_eye_aspect_ratio(self, eye_landmarks):
         """Menghitung Eye Aspect Ratio untuk deteksi kedip - Metode yang lebih akurat"""
         if len(eye_landmarks) < 6:
@@ -104,15 +156,11 @@ class EyeController:
             
         return ear
     
-    def extract_eye_landmarks(self, landmarks, eye_indices, img_width, img_height):
-        """Ekstrak koordinat landmarks mata"""
-        eye_points = []
-        for idx in eye_indices:
-            if idx < len(landmarks.landmark):
-                x = int(landmarks.landmark[idx].x * img_width)
-                y = int(landmarks.landmark[idx].y * img_height)
-                eye_points.append([x, y])
-        return np.array(eye_points)
+    def extract_eye_landmarks(self, points, eye_indices):
+        """Ekstrak koordinat landmarks mata dari array pixel (N, 3)"""
+        if points is None or len(points) <= eye_indices.max():
+            return np.empty((0, 2), dtype=np.int32)
+        return points[eye_indices, :2].astype(np.int32)
     
     def get_iris_position(self, eye_landmarks):
         """Estimasi posisi iris dalam mata - Metode yang lebih akurat"""
@@ -150,6 +198,41 @@ class EyeController:
             'bbox': (min_x, min_y, max_x, max_y)
         }
     
+    def get_eye_features(self, points):
+        """EAR kedua mata, gaze, kontur dan iris untuk overlay (None jika landmark mata tidak lengkap)"""
+        if self.eye_features == 'iris':
+            features = self.feature_extractor.extract(points)
+            if features is None:
+                return None
+            contours = features['contours'].astype(np.int32)
+            iris = features['iris_centers']
+            return {
+                'left_ear': features['left_ear'],
+                'right_ear': features['right_ear'],
+                'gaze': features['gaze'],
+                'left_eye': contours[0],
+                'right_eye': contours[1],
+                'left_iris': {'center': iris[0]},
+                'right_iris': {'center': iris[1]},
+            }
+        
+        # Jalur lama: centroid convex hull kontur, EAR dari 6 titik pertama kontur
+        left_eye = self.extract_eye_landmarks(points, self.LEFT_EYE)
+        right_eye = self.extract_eye_landmarks(points, self.RIGHT_EYE)
+        if len(left_eye) < 6 or len(right_eye) < 6:
+            return None
+        left_iris = self.get_iris_position(left_eye)
+        right_iris = self.get_iris_position(right_eye)
+        return {
+            'left_ear': self.get_eye_aspect_ratio(left_eye[:6]),
+            'right_ear': self.get_eye_aspect_ratio(right_eye[:6]),
+            'gaze': self.calculate_gaze_direction(left_iris, right_iris),
+            'left_eye': left_eye,
+            'right_eye': right_eye,
+            'left_iris': left_iris,
+            'right_iris': right_iris,
+        }
+    
     def calculate_gaze_direction(self, left_iris, right_iris):
         """Menghitung arah pandangan berdasarkan posisi iris"""
         if left_iris is None or right_iris is None:
@@ -199,6 +282,8 @@ class EyeController:
                 if self.calibration_step >= len(self.calibration_steps):
                     self.calibration_mode = False
                     self.process_calibration_data()
+                    self.calibration_store.save(self.calibration_profile, *self.profile_size,
+                                                calibration_points=self.calibration_points)
                     print("Kalibrasi selesai! Eye controller siap digunakan.")
             
             return True
@@ -217,6 +302,62 @@ class EyeController:
         
         print("Calibration points:", self.calibration_points)
     
+    def load_calibration_profile(self, w, h):
+        """Muat calibration_points dan baseline_ear tersimpan (sekali per resolusi)"""
+        if self.profile_size == (w, h):
+            return
+        self.profile_size = (w, h)
+        profile = self.calibration_store.load(self.calibration_profile, w, h)
+        if not profile:
+            return
+        
+        center = None
+        if 'calibration_points' in profile:
+            self.calibration_points = profile['calibration_points']
+            self.calibration_mode = False
+            center = np.array(self.calibration_points.get('center', [0.5, 0.5]))
+        baseline = profile.get('baseline_ear')
+        if baseline is not None:
+            self.baseline_ear = baseline
+        if center is None and baseline is None:
+            return
+        
+        def check(samples):
+            # Sampel: (gaze x, gaze y, EAR); median agar kedipan tidak mengganggu
+            gaze_x, gaze_y, ear = np.median(samples, axis=0)
+            if center is not None and np.hypot(gaze_x - center[0], gaze_y - center[1]) > self.gaze_drift_tolerance:
+                return False
+            return baseline is None or abs(ear / baseline - 1) <= self.ear_drift_tolerance
+        
+        self.profile_check = DriftCheck(check)
+        print("Profil kalibrasi dimuat, memvalidasi...")
+    
+    def validate_calibration_profile(self, gaze_data):
+        """Bandingkan frame awal dengan profil tersimpan; kalibrasi ulang penuh jika drift"""
+        verdict = self.profile_check.add([gaze_data['x'], gaze_data['y'], self.current_ear])
+        if verdict is None:
+            return
+        self.profile_check = None
+        if verdict:
+            print("Profil kalibrasi valid.")
+        else:
+            print("Posisi mata bergeser dari profil tersimpan, kalibrasi ulang...")
+            self.reset_calibration()
+    
+    def reset_calibration(self):
+        self.calibration_mode = True
+        self.calibration_step = 0
+        self.current_calibration_frames = 0
+        self.calibration_data = {step: [] for step in self.calibration_steps}
+        self.profile_check = None
+        self.cursor_filter.reset()
+        if self.cursor_predictor is not None:
+            self.cursor_predictor.reset()
+        # Reset blink calibration
+        self.baseline_ear = None
+        self.baseline_frames = 0
+        self.ear_history.clear()
+    
     def map_gaze_to_screen(self, gaze_data):
         """Mapping arah pandangan ke koordinat layar - Lebih responsif"""
         if self.calibration_mode or not hasattr(self, 'calibration_points'):
@@ -250,17 +391,22 @@ class EyeController:
     
     def smooth_cursor_movement(self, new_pos):
         """Smoothing gerakan cursor"""
-        if self.prev_cursor_pos is None:
-            self.prev_cursor_pos = new_pos
-            return new_pos
-        
-        smooth_x = int(self.prev_cursor_pos[0] * self.smoothing_factor + 
-                      new_pos[0] * (1 - self.smoothing_factor))
-        smooth_y = int(self.prev_cursor_pos[1] * self.smoothing_factor + 
-                      new_pos[1] * (1 - self.smoothing_factor))
-        
-        self.prev_cursor_pos = (smooth_x, smooth_y)
-        return (smooth_x, smooth_y)
+        # Timestamp capture agar filter memakai interval frame sebenarnya
+        timestamp = self.cap.last_timestamp if self.cap is not None else None
+        smooth_x, smooth_y = self.cursor_filter.filter(new_pos, timestamp)
+        return (int(smooth_x), int(smooth_y))
+    
+    def predict_cursor_position(self, pos):
+        """Perkirakan posisi cursor saat moveTo benar-benar dieksekusi (Kalman)"""
+        if self.cursor_predictor is None:
+            return pos
+        timestamp = self.cap.last_timestamp if self.cap is not None else None
+        # Horizon: umur frame sejak capture + latency thread output
+        pred_x, pred_y = self.cursor_predictor.step(
+            pos, timestamp, output_latency=self.cursor_output.latency_estimate)
+        x = max(0, min(self.screen_width - 1, int(pred_x)))
+        y = max(0, min(self.screen_height - 1, int(pred_y)))
+        return (x, y)
     
     def detect_blink(self, left_ear, right_ear):
         """Deteksi kedipan mata - Algoritma yang lebih sensitif"""
@@ -268,11 +414,9 @@ class EyeController:
         
         # Tambahkan ke history untuk smoothing
         self.ear_history.append(avg_ear)
-        if len(self.ear_history) > self.ear_history_size:
-            self.ear_history.pop(0)
         
-        # Hitung rata-rata EAR dari history
-        smooth_ear = np.mean(self.ear_history)
+        # Rata-rata EAR dari running sum history
+        smooth_ear = self.ear_history.mean()
         
         # Kalibrasi baseline EAR otomatis
         if self.baseline_ear is None:
@@ -281,8 +425,10 @@ class EyeController:
                 return False
             else:
                 # Set baseline dari rata-rata history
-                self.baseline_ear = np.mean(self.ear_history)
-                print(f"Baseline EAR dikalibrasi: {self.baseline_ear:.3f}")
+                self.baseline_ear = self.ear_history.mean()
+                self.calibration_store.save(self.calibration_profile, *self.profile_size, baseline_ear=self.baseline_ear)
+                EVENTS.emit('baseline_ear', f"Baseline EAR dikalibrasi: {self.baseline_ear:.3f}",
+                            controller='eye', baseline_ear=round(float(self.baseline_ear), 4))
         
         # Dynamic threshold berdasarkan baseline
         dynamic_threshold = self.baseline_ear * 0.7  # 70% dari baseline
@@ -291,7 +437,9 @@ class EyeController:
         if smooth_ear < dynamic_threshold:
             self.ear_counter += 1
             if self.ear_counter == 1:  # Frame pertama blink terdeteksi
-                print(f"Blink detected! EAR: {smooth_ear:.3f}, Threshold: {dynamic_threshold:.3f}")
+                EVENTS.emit('blink', f"Blink detected! EAR: {smooth_ear:.3f}, Threshold: {dynamic_threshold:.3f}",
+                            controller='eye', ear=round(float(smooth_ear), 4),
+                            threshold=round(float(dynamic_threshold), 4))
         else:
             if self.ear_counter >= self.ear_consecutive_frames:
                 current_time = time.time()
@@ -299,7 +447,7 @@ class EyeController:
                 # Deteksi double blink
                 if current_time - self.last_blink_time < self.double_blink_threshold:
                     self.double_blink_detected()
-                    print("Double blink detected!")
+                    EVENTS.emit('double_blink', "Double blink detected!", controller='eye')
                 
                 self.last_blink_time = current_time
                 self.blink_counter += 1
@@ -313,8 +461,9 @@ class EyeController:
     def double_blink_detected(self):
         """Aksi ketika double blink terdeteksi"""
         if not self.calibration_mode:
-            pyautogui.click()
-            print("Double blink detected - Mouse clicked!")
+            self.cursor_output.click()
+            EVENTS.emit('click', "Double blink detected - Mouse clicked!", controller='eye',
+                        trigger='double_blink')
     
     def draw_eye_overlay(self, img, left_eye, right_eye, left_iris, right_iris):
         """Gambar overlay mata dan iris"""
@@ -417,6 +566,102 @@ class EyeController:
             cv2.putText(img, control, (10, h - 60 + i * 20), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
     
+    def process_frame(self, frame, results):
+        """Proses satu frame (sudah di-flip) beserta hasil FaceMesh, kembalikan frame untuk ditampilkan"""
+        h, w, _ = frame.shape
+        self.load_calibration_profile(w, h)
+        
+        if results.multi_face_landmarks:
+            for face_landmarks in results.multi_face_landmarks:
+                # Konversi landmark ke array pixel sekali per frame, lalu ekstrak fitur mata
+                points = self.landmark_array.update(face_landmarks, w, h)
+                eye = self.get_eye_features(points)
+                
+                if eye is not None:
+                    # EAR untuk deteksi blink
+                    left_ear, right_ear = eye['left_ear'], eye['right_ear']
+                    
+                    # Simpan EAR untuk debugging
+                    self.current_ear = (left_ear + right_ear) / 2.0
+                    
+                    # Deteksi blink
+                    blink_detected = self.detect_blink(left_ear, right_ear)
+                    
+                    # Visual feedback untuk blink
+                    if blink_detected:
+                        cv2.putText(frame, "BLINK!", (w//2 - 50, 50), 
+                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 3)
+                    
+                    # Arah pandangan (posisi iris relatif dalam mata)
+                    gaze_data = eye['gaze']
+                    
+                    screen_pos = None
+                    if gaze_data:
+                        if self.profile_check is not None:
+                            self.validate_calibration_profile(gaze_data)
+                        
+                        # Kalibrasi atau kontrol
+                        if not self.calibrate_gaze(gaze_data):
+                            # Mode kontrol normal
+                            screen_pos = self.map_gaze_to_screen(gaze_data)
+                            if screen_pos:
+                                smooth_pos = self.smooth_cursor_movement(screen_pos)
+                                smooth_pos = self.predict_cursor_position(smooth_pos)
+                                self.cursor_output.move_to(smooth_pos[0], smooth_pos[1])
+                                screen_pos = smooth_pos
+                    
+                    # Gambar overlay
+                    draw_start = TRACER.now()
+                    self.draw_eye_overlay(frame, eye['left_eye'], eye['right_eye'],
+                                          eye['left_iris'], eye['right_iris'])
+                    self.draw_ui_elements(frame, gaze_data, screen_pos)
+                    TRACER.span('draw', draw_start)
+        
+        # Gambar UI kalibrasi
+        if self.calibration_mode:
+            self.draw_calibration_ui(frame)
+        
+        return frame
+    
+    def handle_key(self, key):
+        """Tangani input keyboard, kembalikan False untuk keluar"""
+        if key == ord('q'):
+            return False
+        if key == ord('c'):
+            # Reset kalibrasi (profil baru disimpan setelah selesai)
+            self.reset_calibration()
+            print("Memulai kalibrasi ulang...")
+        elif key == ord('r'):
+            # Reset hanya blink detection demi github
+            self.baseline_ear = None
+            self.baseline_frames = 0
+            self.ear_history.clear()
+            self.blink_counter = 0
+            print("Reset deteksi blink...")
+        elif key == ord(' '):
+            # Manual click untuk testing
+            if not self.calibration_mode:
+                self.cursor_output.click()
+                print("Manual click!")
+        return True
+    
+    def cleanup(self):
+        """Bersihkan resources"""
+        self.cursor_output.stop()
+        # Tulis event yang masih di ring sebelum statistik
+        EVENTS.flush()
+        print(self.cursor_output.summary())
+        if self.cursor_predictor is not None:
+            print(self.cursor_predictor.summary())
+        if self.cap is not None:
+            print(STARTUP.summary())
+            print(self.motion_gate.summary())
+            print(self.cap.summary())
+            print(EVENTS.summary())
+            self.metrics.close()
+            self.cap.release()
+        cv2.destroyAllWindows()
+    
     def run(self):
         """Fungsi utama aplikasi"""
         print("=== Eye Controller ===")
@@ -428,103 +673,66 @@ class EyeController:
         print("5. Tekan 'c' untuk kalibrasi ulang, 'q' untuk keluar")
         print()
         
-        while True:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-            
-            frame = cv2.flip(frame, 1)
-            h, w, _ = frame.shape
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            results = self.face_mesh.process(rgb_frame)
-            
-            if results.multi_face_landmarks:
-                for face_landmarks in results.multi_face_landmarks:
-                    # Ekstrak landmarks mata
-                    left_eye = self.extract_eye_landmarks(face_landmarks, self.LEFT_EYE, w, h)
-                    right_eye = self.extract_eye_landmarks(face_landmarks, self.RIGHT_EYE, w, h)
-                    
-                    if len(left_eye) >= 6 and len(right_eye) >= 6:
-                        # Hitung EAR untuk deteksi blink
-                        left_ear = self.get_eye_aspect_ratio(left_eye[:6])
-                        right_ear = self.get_eye_aspect_ratio(right_eye[:6])
-                        
-                        # Simpan EAR untuk debugging
-                        self.current_ear = (left_ear + right_ear) / 2.0
-                        
-                        # Deteksi blink
-                        blink_detected = self.detect_blink(left_ear, right_ear)
-                        
-                        # Visual feedback untuk blink
-                        if blink_detected:
-                            cv2.putText(frame, "BLINK!", (w//2 - 50, 50), 
-                                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 3)
-                        
-                        # Estimasi posisi iris
-                        left_iris = self.get_iris_position(left_eye)
-                        right_iris = self.get_iris_position(right_eye)
-                        
-                        # Hitung arah pandangan
-                        gaze_data = self.calculate_gaze_direction(left_iris, right_iris)
-                        
-                        screen_pos = None
-                        if gaze_data:
-                            # Kalibrasi atau kontrol
-                            if not self.calibrate_gaze(gaze_data):
-                                # Mode kontrol normal
-                                screen_pos = self.map_gaze_to_screen(gaze_data)
-                                if screen_pos:
-                                    smooth_pos = self.smooth_cursor_movement(screen_pos)
-                                    pyautogui.moveTo(smooth_pos[0], smooth_pos[1])
-                                    screen_pos = smooth_pos
-                        
-                        # Gambar overlay
-                        self.draw_eye_overlay(frame, left_eye, right_eye, left_iris, right_iris)
-                        self.draw_ui_elements(frame, gaze_data, screen_pos)
-            
-            # Gambar UI kalibrasi
-            if self.calibration_mode:
-                self.draw_calibration_ui(frame)
-            
-            cv2.imshow('Eye Controller', frame)
-            
-            # Handle input
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
-                break
-                            elif key == ord('c'):
-                # Reset kalibrasi
-                self.calibration_mode = True
-                self.calibration_step = 0
-                self.current_calibration_frames = 0
-                self.calibration_data = {step: [] for step in self.calibration_steps}
-                self.prev_cursor_pos = None
-                # Reset blink calibration
-                self.baseline_ear = None
-                self.baseline_frames = 0
-                self.ear_history = []
-                print("Memulai kalibrasi ulang...")
-            elif key == ord('r'):
-                # Reset hanya blink detection demi github
-                self.baseline_ear = None
-                self.baseline_frames = 0
-                self.ear_history = []
-                self.blink_counter = 0
-                print("Reset deteksi blink...")
-            elif key == ord(' '):
-                # Manual click untuk testing
-                if not self.calibration_mode:
-                    pyautogui.click()
-                    print("Manual click!")
-        
-        self.cap.release()
-        cv2.destroyAllWindows()
+        try:
+            while True:
+                self.metrics.begin_frame()
+                frame_start = t = TRACER.begin_frame()
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                self.metrics.mark('capture')
+                t = TRACER.span('read', t)
+                
+                frame = cv2.flip(frame, 1)
+                t = TRACER.span('flip', t)
+                # Frame statis: pakai ulang landmark dan keputusan dari inference terakhir
+                infer = self.motion_gate.should_infer(frame)
+                t = TRACER.span('motion_gate', t)
+                if infer:
+                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    t = TRACER.span('cvtColor', t)
+                    results = self.motion_gate.store(self.face_mesh.process(rgb_frame))
+                    t = TRACER.span('process', t)
+                else:
+                    results = self.motion_gate.results
+                self.metrics.mark('inference')
+                frame = self.process_frame(frame, results)
+                self.metrics.mark('features')
+                t = TRACER.span('features', t)
+                
+                # Tampilkan frame
+                cv2.imshow(self.window_name, frame)
+                t = TRACER.span('imshow', t)
+                
+                # Handle keyboard input
+                key = cv2.waitKey(1) & 0xFF
+                TRACER.span('waitKey', t)
+                TRACER.handle_key(key)
+                keep_running = self.handle_key(key)
+                self.metrics.mark('render')
+                self.metrics.end_frame()
+                TRACER.end_frame(frame_start)
+                if not keep_running:
+                    break
+        finally:
+            self.cleanup()
 
 def main():
     try:
-        controller = EyeController()
+        cursor_options, argv = cursor_options_from_argv()
+        eye_features, argv = eye_features_from_argv(argv)
+        motion_gate, argv = motion_gate_from_argv(argv)
+        metrics_server, argv = metrics_server_from_argv(argv)
+        events, argv = event_log_from_argv(argv)
+        tracer, argv = trace_from_argv(argv)
+        controller = EyeController(source_from_argv(argv), eye_features=eye_features,
+                                   motion_gate=motion_gate, **cursor_options)
         controller.run()
+        events.close()
+        if tracer.enabled:
+            tracer.export()
+        if metrics_server is not None:
+            metrics_server.stop()
     except KeyboardInterrupt:
         print("\nAplikasi dihentikan oleh user.")
     except Exception as e:
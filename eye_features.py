@@ -0,0 +1,206 @@
+import argparse
+import time
+
+import numpy as np
+
+
+# Indeks FaceMesh (refine_landmarks=True); baris 0 = mata kiri, baris 1 = mata kanan
+EYE_CONTOURS = np.array([
+    [362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398],
+    [33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246],
+])
+IRIS_RINGS = np.array([
+    [474, 475, 476, 477],
+    [469, 470, 471, 472],
+])
+# EAR enam titik: p1/p4 sudut mata, p2/p3 kelopak atas, p6/p5 kelopak bawah di bawahnya
+EAR_POINTS = np.array([
+    [362, 385, 387, 263, 373, 380],
+    [33, 160, 158, 133, 153, 144],
+])
+
+EYE_FEATURE_METHODS = ('iris', 'contour')
+
+# Tata letak kolom indeks gabungan per mata
+_CONTOUR = slice(0, 16)
+_IRIS = slice(16, 20)
+_UPPER = slice(20, 22)  # p2, p3
+_LOWER = slice(22, 24)  # p6, p5 (pasangan vertikal p2/p3)
+
+
+class EyeFeatureExtractor:
+    """Fitur kedua mata dalam satu pass vektor dari array landmark pixel (N, 3).
+
+    Semua indeks (kontur 16 titik, ring iris 4 titik, 6 titik EAR) untuk
+    kedua mata digabung menjadi satu array (2, 26) sehingga cukup satu
+    gather per frame; sisanya operasi NumPy pada array (2, k, 2).
+    Gaze adalah posisi pusat iris relatif terhadap bounding box kontur mata
+    (0-1), dirata-rata kedua mata, sama seperti calculate_gaze_direction.
+    """
+
+    def __init__(self):
+        # Kolom: kontur, ring iris, p2 p3, p6 p5, p1 p4 -> pasangan EAR cukup diiris, tanpa fancy index
+        ear = EAR_POINTS[:, [1, 2, 5, 4, 0, 3]]
+        self.index = np.concatenate([EYE_CONTOURS, IRIS_RINGS, ear], axis=1)
+        self.min_landmarks = int(self.index.max()) + 1
+
+    def extract(self, points):
+        """Kembalikan dict fitur mata, atau None jika landmark iris tidak tersedia"""
+        if points is None or len(points) < self.min_landmarks:
+            return None
+        eyes = points[self.index, :2]  # (2, 26, 2)
+
+        contours = eyes[:, _CONTOUR]
+        low = contours.min(axis=1)
+        span = contours.max(axis=1) - low
+        if (span <= 0).any():
+            return None
+        iris = eyes[:, _IRIS].sum(axis=1) * 0.25  # (2, 2)
+        relative = (iris - low) / span
+
+        vertical = eyes[:, _UPPER] - eyes[:, _LOWER]  # (2, 2, 2)
+        horizontal = eyes[:, 24] - eyes[:, 25]
+        ear = np.hypot(vertical[..., 0], vertical[..., 1]).sum(axis=1) / \
+            (2.0 * np.hypot(horizontal[:, 0], horizontal[:, 1]))
+
+        gaze_x, gaze_y = ((relative[0] + relative[1]) * 0.5).tolist()
+        absolute_x, absolute_y = ((iris[0] + iris[1]) * 0.5).tolist()
+        left_ear, right_ear = ear.tolist()
+        return {
+            'left_ear': left_ear,
+            'right_ear': right_ear,
+            'iris_centers': iris,
+            'contours': contours,
+            'gaze': {'x': gaze_x, 'y': gaze_y, 'absolute_x': absolute_x, 'absolute_y': absolute_y},
+        }
+
+
+def eye_features_from_argv(argv=None):
+    """Ambil opsi --eye-features dari command line, kembalikan (metode, argumen sisanya)"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--eye-features', choices=EYE_FEATURE_METHODS, default='iris',
+                        help="fitur mata: iris (landmark iris, EAR 6 titik) atau contour (centroid kontur)")
+    args, remaining = parser.parse_known_args(argv)
+    return args.eye_features, remaining
+
+
+def _synthetic_face(gaze_x, gaze_y, openness=0.3, width=60.0, center=(320.0, 240.0)):
+    """Landmark (478, 3) dengan kontur mata elips dan iris di posisi relatif (gaze_x, gaze_y)"""
+    points = np.zeros((478, 3), dtype=np.float32)
+    height = width * openness
+    for eye, offset in ((0, 50.0), (1, -50.0)):
+        cx, cy = center[0] + offset, center[1]
+        # Kontur: 8 titik bawah lalu 8 titik atas, sudut di indeks 0 dan 8
+        angles = np.concatenate([np.linspace(0, np.pi, 8, endpoint=False),
+                                 np.linspace(np.pi, 2 * np.pi, 8, endpoint=False)])
+        points[EYE_CONTOURS[eye], 0] = cx - np.cos(angles) * width / 2
+        points[EYE_CONTOURS[eye], 1] = cy + np.sin(angles) * height / 2
+        # Iris di posisi relatif terhadap bounding box kontur
+        contour = points[EYE_CONTOURS[eye], :2]
+        low, high = contour.min(axis=0), contour.max(axis=0)
+        iris_center = low + (high - low) * (gaze_x, gaze_y)
+        ring = np.array([(1, 0), (0, -1), (-1, 0), (0, 1)], dtype=np.float32) * height / 3
+        points[IRIS_RINGS[eye], :2] = iris_center + ring
+    return points
+
+
+def main():
+    """Bandingkan extractor vektor vs jalur kontur lama: biaya per frame dan akurasi"""
+    parser = argparse.ArgumentParser(description="Benchmark fitur mata: iris vektor vs kontur lama")
+    parser.add_argument('clip', nargs='?', help="clip wajah rekaman (opsional)")
+    parser.add_argument('--repeat', type=int, default=2000, help="iterasi untuk pengukuran biaya")
+    args = parser.parse_args()
+
+    from benchmark import install_output_stubs
+    from controllers import load_controller_class
+
+    install_output_stubs()
+    controller = load_controller_class('eye')
+    extractor = EyeFeatureExtractor()
+
+    def contour_path(points):
+        # Jalur lama EyeController.process_frame (method tidak memakai self)
+        left_eye = controller.extract_eye_landmarks(None, points, EYE_CONTOURS[0])
+        right_eye = controller.extract_eye_landmarks(None, points, EYE_CONTOURS[1])
+        left_ear = controller.get_eye_aspect_ratio(None, left_eye[:6])
+        right_ear = controller.get_eye_aspect_ratio(None, right_eye[:6])
+        gaze = controller.calculate_gaze_direction(None, controller.get_iris_position(None, left_eye),
+                                                   controller.get_iris_position(None, right_eye))
+        return left_ear, right_ear, gaze
+
+    # Akurasi gaze pada posisi iris yang diketahui
+    errors = {'iris': [], 'contour': []}
+    for gaze_x in np.linspace(0.3, 0.7, 5):
+        for gaze_y in np.linspace(0.35, 0.65, 3):
+            points = _synthetic_face(gaze_x, gaze_y)
+            gaze = extractor.extract(points)['gaze']
+            errors['iris'].append(np.hypot(gaze['x'] - gaze_x, gaze['y'] - gaze_y))
+            gaze = contour_path(points)[2]
+            errors['contour'].append(np.hypot(gaze['x'] - gaze_x, gaze['y'] - gaze_y))
+    print("Sintetis (posisi iris diketahui): error gaze rata-rata "
+          f"iris {np.mean(errors['iris']):.4f}, kontur lama {np.mean(errors['contour']):.4f}")
+
+    # EAR: mata terbuka vs tertutup
+    for name, fn in (('iris (6 titik)', lambda p: extractor.extract(p)['left_ear']),
+                     ('kontur lama', lambda p: contour_path(p)[0])):
+        opened, closed = fn(_synthetic_face(0.5, 0.5, 0.3)), fn(_synthetic_face(0.5, 0.5, 0.05))
+        print(f"  EAR {name:15s}: terbuka {opened:.3f}, tertutup {closed:.3f}")
+
+    frames = [_synthetic_face(0.5, 0.5)]
+    if args.clip:
+        import cv2
+        import mediapipe as mp
+
+        from frame_sources import open_source
+        from landmark_array import LandmarkArray, face_points
+
+        source = open_source(args.clip)
+        buffer = LandmarkArray()
+        frames = []
+        with mp.solutions.face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True) as face_mesh:
+            while True:
+                ret, frame = source.read()
+                if not ret:
+                    break
+                frame = cv2.flip(frame, 1)
+                points = face_points(face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)),
+                                     frame.shape[1], frame.shape[0], buffer)
+                if points is not None:
+                    frames.append(points.copy())
+        source.release()
+        if not frames:
+            print("Tidak ada wajah terdeteksi di clip")
+            return
+
+        features = [extractor.extract(points) for points in frames]
+        contour = [contour_path(points) for points in frames]
+        # Pusat iris FaceMesh (473 kiri, 468 kanan) sebagai referensi
+        reference = np.array([points[[473, 468], :2] for points in frames])
+        iris = np.array([f['iris_centers'] for f in features])
+        ear_new = np.array([(f['left_ear'] + f['right_ear']) / 2 for f in features])
+        ear_old = np.array([(c[0] + c[1]) / 2 for c in contour])
+        gaze_new = np.array([f['gaze']['x'] for f in features])
+        gaze_old = np.array([c[2]['x'] for c in contour])
+        print(f"Clip: {args.clip} ({len(frames)} frame dengan wajah)")
+        print(f"  Jarak pusat ring iris ke landmark pusat iris: {np.hypot(*(iris - reference).T).mean():.2f} px")
+        print(f"  EAR rata-rata: 6 titik {ear_new.mean():.3f}, lama {ear_old.mean():.3f}; "
+              f"korelasi {np.corrcoef(ear_new, ear_old)[0, 1]:.2f}")
+        print(f"  Std gaze x: iris {gaze_new.std():.4f}, kontur lama {gaze_old.std():.4f}")
+
+    # Biaya per frame
+    timings = {'iris (vektor)': [], 'kontur lama': []}
+    for _ in range(max(1, args.repeat // len(frames))):
+        for points in frames:
+            start = time.perf_counter()
+            extractor.extract(points)
+            timings['iris (vektor)'].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            contour_path(points)
+            timings['kontur lama'].append(time.perf_counter() - start)
+    for name, values in timings.items():
+        values = np.array(values) * 1e6
+        print(f"  {name:15s}: mean {values.mean():6.1f} us, p95 {np.percentile(values, 95):6.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class FrameSource:
+    """Interface sumber frame, kompatibel dengan cv2.VideoCapture.
+
+    Semua controller hanya memanggil read(), isOpened(), get() dan release(),
+    jadi webcam, file video, folder gambar dan generator sintetis bisa dipakai
+    bergantian. is_live=True berarti frame datang dari kamera; realtime=True
+    berarti sumber dijalankan sesuai kecepatan FPS aslinya.
+    """
+
+    is_live = False
+    realtime = False
+    fps = 30.0
+
+    def read(self):
+        raise NotImplementedError
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+
+    def release(self):
+        pass
+
+
+class WebcamSource(FrameSource):
+    """Kamera fisik via cv2.VideoCapture"""
+
+    is_live = True
+    realtime = True
+
+    def __init__(self, index=0, width=640, height=480, fps=None):
+        self.cap = cv2.VideoCapture(index)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps is not None:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def read(self):
+        return self.cap.read()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def release(self):
+        self.cap.release()
+
+
+class _PacedSource(FrameSource):
+    """Basis sumber rekaman: pacing real-time atau secepat mungkin, opsional loop"""
+
+    def __init__(self, fps=30.0, realtime=False, loop=False):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.realtime = realtime
+        self.loop = loop
+        self.frame_index = 0
+        self._next_frame_time = None
+
+    def _read_frame(self, index):
+        """Kembalikan frame ke-index atau None jika habis"""
+        raise NotImplementedError
+
+    def _rewind(self):
+        pass
+
+    def _pace(self):
+        """Tunggu sampai jadwal frame berikutnya jika mode real-time"""
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        if self._next_frame_time is None:
+            self._next_frame_time = now
+        delay = self._next_frame_time - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame_time += 1.0 / self.fps
+
+    def read(self):
+        frame = self._read_frame(self.frame_index)
+        if frame is None and self.loop and self.frame_index > 0:
+            self._rewind()
+            self.frame_index = 0
+            frame = self._read_frame(self.frame_index)
+        if frame is None:
+            return False, None
+
+        self._pace()
+        self.frame_index += 1
+        return True, frame
+
+
+class VideoFileSource(_PacedSource):
+    """File video rekaman (mp4, avi, ...)"""
+
+    def __init__(self, path, realtime=False, loop=False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS), realtime, loop)
+
+    def _read_frame(self, index):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource(_PacedSource):
+    """Folder berisi frame gambar, dibaca berurutan sesuai nama file"""
+
+    def __init__(self, path, fps=30.0, realtime=False, loop=False):
+        super().__init__(fps, realtime, loop)
+        self.path = path
+        self.files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+    def _read_frame(self, index):
+        if index >= len(self.files):
+            return None
+        return cv2.imread(self.files[index])
+
+    def isOpened(self):
+        return len(self.files) > 0
+
+
+class SyntheticSource(_PacedSource):
+    """Generator frame sintetis deterministik untuk CI / mesin tanpa kamera"""
+
+    def __init__(self, width=640, height=480, num_frames=300, fps=30.0,
+                 realtime=False, loop=False, seed=0):
+        super().__init__(fps, realtime, loop)
+        self.width = width
+        self.height = height
+        self.num_frames = num_frames  # None = tanpa batas
+        rng = np.random.default_rng(seed)
+        self._background = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+
+    def _read_frame(self, index):
+        if self.num_frames is not None and index >= self.num_frames:
+            return None
+
+        # Blok terang bergerak horizontal seperti kepala yang menoleh
+        frame = self._background.copy()
+        size = min(self.width, self.height) // 3
+        travel = self.width - size
+        phase = (index % 120) / 120.0
+        x = int(travel * (0.5 + 0.5 * np.sin(2 * np.pi * phase)))
+        y = (self.height - size) // 2
+        cv2.rectangle(frame, (x, y), (x + size, y + size), (180, 200, 220), -1)
+        return frame
+
+
+def open_source(spec=0, width=640, height=480, fps=None, realtime=False, loop=False):
+    """Buat FrameSource dari spesifikasi.
+
+    spec bisa berupa FrameSource, index kamera (int atau "0"), "synthetic"
+    atau "synthetic:<jumlah_frame>", path folder gambar, atau path file video.
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return WebcamSource(int(spec), width, height, fps)
+    if spec == 'synthetic' or spec.startswith('synthetic:'):
+        num_frames = int(spec.split(':', 1)[1]) if ':' in spec else 300
+        return SyntheticSource(width, height, num_frames, fps or 30.0, realtime, loop)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, fps or 30.0, realtime, loop)
+    return VideoFileSource(spec, realtime, loop)
+
+
+def source_from_argv(argv=None, description=None):
+    """Parse argumen command line sumber frame untuk main() tiap controller.
+
+    Mengembalikan index kamera (agar controller membuka webcam dengan setting
+    miliknya sendiri) atau FrameSource yang sudah dibuka.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('source', nargs='?', default='0',
+                        help="index kamera, file video, folder gambar, atau 'synthetic[:N]'")
+    parser.add_argument('--realtime', action='store_true',
+                        help="putar rekaman sesuai FPS aslinya (default: secepat mungkin)")
+    parser.add_argument('--loop', action='store_true', help="ulangi rekaman terus-menerus")
+    args, _ = parser.parse_known_args(argv)
+
+    if args.source.isdigit():
+        return int(args.source)
+    return open_source(args.source, realtime=args.realtime, loop=args.loop)
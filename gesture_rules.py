@@ -0,0 +1,221 @@
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+
+# Landmark MediaPipe Hands per jari: (tip, pip, mcp); untuk jempol (tip, ip, mcp)
+FINGERS = {
+    'thumb': (4, 3, 2),
+    'index': (8, 6, 5),
+    'middle': (12, 10, 9),
+    'ring': (16, 14, 13),
+    'pinky': (20, 18, 17),
+}
+
+# Kosakata default. Format rule:
+#   'extended': jari lurus ke atas (tip di atas pip dan mcp)
+#   'folded':   jari terlipat (tip di bawah pip)
+#   'above':    [(jari, [jari lain], margin)] tip jari lebih tinggi dari tip jari lain
+#               minimal margin * tinggi frame; 'below' kebalikannya
+# Jari yang tidak disebut diabaikan (misal jempol pada middle_finger).
+GESTURES = {
+    'middle_finger': {
+        'extended': ['middle'],
+        'folded': ['index', 'ring', 'pinky'],
+        'above': [('middle', ['index', 'ring', 'pinky'], 0.015)],
+    },
+    'open_palm': {
+        'extended': ['index', 'middle', 'ring', 'pinky'],
+    },
+    'fist': {
+        'folded': ['index', 'middle', 'ring', 'pinky'],
+    },
+    'peace': {
+        'extended': ['index', 'middle'],
+        'folded': ['ring', 'pinky'],
+    },
+    'point': {
+        'extended': ['index'],
+        'folded': ['middle', 'ring', 'pinky'],
+        'above': [('index', ['middle', 'ring', 'pinky'], 0.015)],
+    },
+    'thumbs_up': {
+        'extended': ['thumb'],
+        'folded': ['index', 'middle', 'ring', 'pinky'],
+        'above': [('thumb', ['index', 'middle', 'ring', 'pinky'], 0.02)],
+    },
+}
+
+
+class GestureRuleEngine:
+    """Rule gesture deklaratif yang dikompilasi menjadi predikat vektor.
+
+    Setiap syarat rule adalah perbandingan y dua landmark:
+    y[a] - y[b] < -margin * tinggi_frame. Syarat dari semua gesture
+    dideduplikasi menjadi satu daftar atom (a, b, margin), lalu tiap frame
+    cukup satu gather + satu perbandingan untuk semua atom, dan satu
+    perkalian matriks boolean (gesture x atom) untuk mencari gesture yang
+    semua syaratnya terpenuhi. Biaya per frame hampir konstan terhadap
+    jumlah gesture yang terdaftar.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = dict(GESTURES if rules is None else rules)
+        self.compile()
+
+    def register(self, name, rule):
+        """Tambah/ganti satu gesture lalu kompilasi ulang"""
+        self.rules[name] = rule
+        self.compile()
+
+    @staticmethod
+    def _conditions(name, rule):
+        """Uraikan satu rule menjadi atom (a, b, margin): y[a] - y[b] < -margin * H"""
+        unknown = set(rule) - {'extended', 'folded', 'above', 'below'}
+        if unknown:
+            raise ValueError(f"Gesture {name}: kunci rule tidak dikenal {sorted(unknown)}")
+
+        def joints(finger):
+            if finger not in FINGERS:
+                raise ValueError(f"Gesture {name}: jari tidak dikenal '{finger}'")
+            return FINGERS[finger]
+
+        atoms = []
+        for finger in rule.get('extended', ()):
+            tip, pip, mcp = joints(finger)
+            atoms += [(tip, pip, 0.0), (tip, mcp, 0.0)]
+        for finger in rule.get('folded', ()):
+            tip, pip, _ = joints(finger)
+            atoms.append((pip, tip, 0.0))
+        for finger, others, margin in rule.get('above', ()):
+            atoms += [(joints(finger)[0], joints(other)[0], margin) for other in others]
+        for finger, others, margin in rule.get('below', ()):
+            atoms += [(joints(other)[0], joints(finger)[0], margin) for other in others]
+        if not atoms:
+            raise ValueError(f"Gesture {name}: rule kosong")
+        return atoms
+
+    def compile(self):
+        atom_index = {}
+        requirements = []
+        for name, rule in self.rules.items():
+            required = []
+            for atom in self._conditions(name, rule):
+                required.append(atom_index.setdefault(atom, len(atom_index)))
+            requirements.append(required)
+
+        atoms = np.array(list(atom_index), dtype=np.float64).reshape(-1, 3)
+        self.names = list(self.rules)
+        self._pairs = atoms[:, :2].astype(np.intp).T.copy()  # (2, n_atom): a, b
+        self._margins = -atoms[:, 2]
+        # requires[g, k] = True jika gesture g butuh atom k
+        self._requires = np.zeros((len(self.names), len(atom_index)), dtype=bool)
+        for row, required in enumerate(requirements):
+            self._requires[row, required] = True
+
+    @property
+    def num_atoms(self):
+        return self._pairs.shape[1]
+
+    def evaluate(self, points, frame_height):
+        """Array bool (n_gesture,) urut self.names untuk landmark pixel (21, 3)"""
+        y = points[self._pairs, 1]  # (2, n_atom)
+        failed = (y[0] - y[1]) >= self._margins * frame_height
+        # Gesture aktif jika tidak ada atom wajib yang gagal
+        return ~(self._requires @ failed)
+
+    def evaluate_batch(self, points, frame_height):
+        """Array bool (T, n_gesture) untuk landmark pixel (T, 21, 3) satu sesi sekaligus"""
+        y = points[:, self._pairs, 1]  # (T, 2, n_atom)
+        failed = (y[:, 0] - y[:, 1]) >= self._margins * frame_height
+        return ~(failed @ self._requires.T)
+
+    def matches(self, points, frame_height):
+        """Set nama gesture yang aktif pada frame ini"""
+        active = self.evaluate(points, frame_height)
+        return {self.names[i] for i in np.flatnonzero(active)}
+
+
+def _scalar_rule(rule, points, frame_height):
+    """Evaluasi satu rule dengan perbandingan skalar (baseline benchmark)"""
+    y = points[:, 1]
+    for finger in rule.get('extended', ()):
+        tip, pip, mcp = FINGERS[finger]
+        if not (y[tip] < y[pip] and y[tip] < y[mcp]):
+            return False
+    for finger in rule.get('folded', ()):
+        tip, pip, _ = FINGERS[finger]
+        if not y[tip] > y[pip]:
+            return False
+    for finger, others, margin in rule.get('above', ()):
+        for other in others:
+            if not y[FINGERS[finger][0]] < y[FINGERS[other][0]] - margin * frame_height:
+                return False
+    for finger, others, margin in rule.get('below', ()):
+        for other in others:
+            if not y[FINGERS[other][0]] < y[FINGERS[finger][0]] - margin * frame_height:
+                return False
+    return True
+
+
+def _vocabulary(size):
+    """Kosakata sintetis: semua kombinasi lurus/terlipat 4 jari + variasi margin"""
+    rules = dict(GESTURES)
+    fingers = ['index', 'middle', 'ring', 'pinky']
+    for states in itertools.product((True, False), repeat=4):
+        for margin in (0.0, 0.01, 0.02):
+            if len(rules) >= size:
+                return rules
+            extended = [f for f, s in zip(fingers, states) if s]
+            folded = [f for f, s in zip(fingers, states) if not s]
+            rule = {'extended': extended, 'folded': folded}
+            if extended and folded and margin:
+                rule['above'] = [(extended[0], folded, margin)]
+            rules[f"combo_{''.join('E' if s else 'F' for s in states)}_{margin}"] = rule
+    return rules
+
+
+def main():
+    """Kesetaraan dengan rule skalar (logika detect_middle_finger_gesture lama) dan biaya vs jumlah gesture"""
+    parser = argparse.ArgumentParser(description="Benchmark rule engine gesture tangan")
+    parser.add_argument('--samples', type=int, default=20000, help="jumlah pose tangan acak")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    height = 480.0
+    # Pose acak: jari-jari di sekitar telapak agar semua kombinasi muncul
+    hands = rng.normal(240, 40, size=(args.samples, 21, 3)).astype(np.float32)
+
+    engine = GestureRuleEngine()
+    index = engine.names.index('middle_finger')
+    engine_result = np.array([engine.evaluate(points, height)[index] for points in hands])
+    scalar_result = np.array([_scalar_rule(GESTURES['middle_finger'], points, height) for points in hands])
+    print(f"middle_finger: {engine_result.sum()} positif, kesesuaian dengan baseline skalar "
+          f"{np.mean(engine_result == scalar_result) * 100:.2f}%")
+    start = time.perf_counter()
+    batch_result = engine.evaluate_batch(hands, height)[:, index]
+    batch_us = (time.perf_counter() - start) / len(hands) * 1e6
+    print(f"evaluate_batch: kesesuaian dengan evaluate per frame "
+          f"{np.mean(batch_result == engine_result) * 100:.2f}%, {batch_us:.2f} us/frame")
+
+    print(f"{'gesture':>8s} {'atom':>6s} {'engine (us)':>12s} {'skalar (us)':>12s}")
+    sample = hands[:500]
+    for size in (1, 6, 12, 24, 48):
+        rules = _vocabulary(size) if size > len(GESTURES) else dict(list(GESTURES.items())[:size])
+        engine = GestureRuleEngine(rules)
+        start = time.perf_counter()
+        for points in sample:
+            engine.evaluate(points, height)
+        engine_us = (time.perf_counter() - start) / len(sample) * 1e6
+        start = time.perf_counter()
+        for points in sample:
+            for rule in rules.values():
+                _scalar_rule(rule, points, height)
+        scalar_us = (time.perf_counter() - start) / len(sample) * 1e6
+        print(f"{len(rules):8d} {engine.num_atoms:6d} {engine_us:12.1f} {scalar_us:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
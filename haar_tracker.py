@@ -0,0 +1,184 @@
+import argparse
+import time
+
+import cv2
+
+from frame_sources import open_source
+
+
+class RoiFaceTracker:
+    """Deteksi wajah Haar yang hanya mencari di sekitar posisi wajah sebelumnya.
+
+    Setelah wajah ditemukan, frame berikutnya hanya memindai region (ROI) yang
+    diperbesar di sekitar wajah lama dengan rentang ukuran terbatas. Full-frame
+    scan (opsional di-downscale) dilakukan setiap rescan_interval frame atau
+    saat wajah hilang.
+    """
+
+    def __init__(self, cascade, scale_factor=1.3, min_neighbors=5, padding=0.5,
+                 size_tolerance=0.3, rescan_interval=15, downscale=1.0):
+        self.cascade = cascade
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.padding = padding  # Tambahan ROI relatif terhadap ukuran wajah
+        self.size_tolerance = size_tolerance  # Rentang ukuran wajah di ROI (+/-)
+        self.rescan_interval = rescan_interval
+        self.downscale = downscale  # < 1.0: full scan di frame yang diperkecil
+
+        self.last_face = None
+        self.frames_since_full_scan = 0
+
+        # Statistik
+        self.full_scans = 0
+        self.roi_scans = 0
+        self.losses = 0
+
+    def reset(self):
+        self.last_face = None
+        self.frames_since_full_scan = 0
+
+    def detect(self, gray):
+        """Kembalikan list wajah (x, y, w, h) dalam koordinat frame penuh"""
+        if self.last_face is None or self.frames_since_full_scan >= self.rescan_interval:
+            return self._full_scan(gray)
+
+        faces = self._roi_scan(gray)
+        if len(faces) == 0:
+            # Wajah hilang dari ROI -> cari ulang di seluruh frame
+            self.losses += 1
+            return self._full_scan(gray)
+
+        self.frames_since_full_scan += 1
+        self.last_face = _largest(faces)
+        return faces
+
+    def _full_scan(self, gray):
+        self.full_scans += 1
+        self.frames_since_full_scan = 0
+
+        if self.downscale < 1.0:
+            small = cv2.resize(gray, None, fx=self.downscale, fy=self.downscale,
+                               interpolation=cv2.INTER_AREA)
+            faces = self.cascade.detectMultiScale(small, self.scale_factor, self.min_neighbors)
+            faces = [tuple(int(v / self.downscale) for v in face) for face in faces]
+        else:
+            faces = [tuple(int(v) for v in face)
+                     for face in self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors)]
+
+        self.last_face = _largest(faces) if faces else None
+        return faces
+
+    def _roi_scan(self, gray):
+        self.roi_scans += 1
+        x, y, w, h = self.last_face
+        frame_h, frame_w = gray.shape[:2]
+
+        pad_x = int(w * self.padding)
+        pad_y = int(h * self.padding)
+        x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+        x1, y1 = min(frame_w, x + w + pad_x), min(frame_h, y + h + pad_y)
+
+        min_size = int(min(w, h) * (1 - self.size_tolerance))
+        max_size = int(max(w, h) * (1 + self.size_tolerance))
+        faces = self.cascade.detectMultiScale(
+            gray[y0:y1, x0:x1], self.scale_factor, self.min_neighbors,
+            minSize=(min_size, min_size), maxSize=(max_size, max_size)
+        )
+        return [(int(fx) + x0, int(fy) + y0, int(fw), int(fh)) for fx, fy, fw, fh in faces]
+
+    def get_stats(self):
+        return {
+            'full_scans': self.full_scans,
+            'roi_scans': self.roi_scans,
+            'losses': self.losses,
+        }
+
+
+def _largest(faces):
+    return max(faces, key=lambda face: face[2] * face[3])
+
+
+def _iou(a, b):
+    ax1, ay1, ax2, ay2 = a[0], a[1], a[0] + a[2], a[1] + a[3]
+    bx1, by1, bx2, by2 = b[0], b[1], b[0] + b[2], b[1] + b[3]
+    inter_w = max(0, min(ax2, bx2) - max(ax1, bx1))
+    inter_h = max(0, min(ay2, by2) - max(ay1, by1))
+    inter = inter_w * inter_h
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _direction(face, center_x=320, threshold=50):
+    """Arah seperti HeadTrackingRemote.detect_head_direction"""
+    if face is None:
+        return "CENTER"
+    offset = face[0] + face[2] // 2 - center_x
+    if offset < -threshold:
+        return "LEFT"
+    if offset > threshold:
+        return "RIGHT"
+    return "CENTER"
+
+
+def evaluate(source_spec, rescan_interval=15, downscale=1.0):
+    """Bandingkan full-frame vs ROI tracking pada clip yang sama"""
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    tracker = RoiFaceTracker(cascade, rescan_interval=rescan_interval, downscale=downscale)
+    source = open_source(source_spec)
+
+    full_time = track_time = 0.0
+    frames = both_found = agree_iou = agree_direction = 0
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frame = cv2.flip(frame, 1)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        frames += 1
+
+        start = time.perf_counter()
+        full_faces = cascade.detectMultiScale(gray, 1.3, 5)
+        full_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        tracked_faces = tracker.detect(gray)
+        track_time += time.perf_counter() - start
+
+        full_face = _largest(full_faces) if len(full_faces) else None
+        tracked_face = _largest(tracked_faces) if tracked_faces else None
+        if full_face is not None and tracked_face is not None:
+            both_found += 1
+            if _iou(full_face, tracked_face) >= 0.5:
+                agree_iou += 1
+        if _direction(full_face) == _direction(tracked_face):
+            agree_direction += 1
+    source.release()
+
+    return {
+        'frames': frames,
+        'full_frame_fps': frames / full_time if full_time > 0 else 0.0,
+        'tracking_fps': frames / track_time if track_time > 0 else 0.0,
+        'iou_agreement': agree_iou / both_found if both_found else 0.0,
+        'direction_agreement': agree_direction / frames if frames else 0.0,
+        'tracker': tracker.get_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluasi ROI tracking vs full-frame Haar")
+    parser.add_argument('clip', help="file video / folder gambar rekaman")
+    parser.add_argument('--rescan-interval', type=int, default=15)
+    parser.add_argument('--downscale', type=float, default=1.0)
+    args = parser.parse_args()
+
+    result = evaluate(args.clip, args.rescan_interval, args.downscale)
+    print(f"Frames              : {result['frames']}")
+    print(f"Full-frame FPS      : {result['full_frame_fps']:.1f}")
+    print(f"ROI tracking FPS    : {result['tracking_fps']:.1f}")
+    print(f"Box agreement (IoU) : {result['iou_agreement'] * 100:.1f}%")
+    print(f"Direction agreement : {result['direction_agreement'] * 100:.1f}%")
+    print(f"Tracker             : {result['tracker']}")
+
+
+if __name__ == "__main__":
+    main()
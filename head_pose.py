@@ -0,0 +1,234 @@
+import argparse
+import math
+import time
+
+import cv2
+import numpy as np
+
+
+# Landmark FaceMesh untuk model 3D: nose tip, dagu, sudut luar mata kiri/kanan, sudut mulut kiri/kanan
+POSE_LANDMARKS = np.array([1, 152, 33, 263, 61, 291])
+
+# Model wajah kanonik (mm) dalam konvensi kamera OpenCV: x kanan, y bawah, z menjauhi kamera.
+# Wajah yang menghadap lurus ke kamera menghasilkan rotasi identitas.
+FACE_MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),         # Nose tip
+    (0.0, 63.6, 12.5),       # Dagu
+    (-43.3, -32.7, 26.0),    # Sudut luar mata kiri (gambar)
+    (43.3, -32.7, 26.0),     # Sudut luar mata kanan (gambar)
+    (-28.9, 28.9, 24.1),     # Sudut mulut kiri
+    (28.9, 28.9, 24.1),      # Sudut mulut kanan
+])
+
+ROTATION_METHODS = ('pnp', 'heuristic')
+# Threshold dan smoothing 3.py/4.py dikalibrasi untuk skala heuristik (* 45 / * 60), bukan derajat
+# yaw solvePnP; pnp tetap opt-in (--rotation pnp) sampai threshold-nya di-tuning pada data rekaman
+DEFAULT_ROTATION_METHOD = 'heuristic'
+
+
+class HeadPoseEstimator:
+    """Estimasi yaw/pitch/roll kepala dengan cv2.solvePnP.
+
+    Camera matrix di-cache per ukuran frame (focal = lebar frame, tanpa
+    distorsi). Frame pertama memakai solvePnP penuh; frame berikutnya hanya
+    refine Levenberg-Marquardt dari rvec/tvec sebelumnya dengan jumlah
+    iterasi dibatasi, sehingga biaya per frame tetap kecil. Hasil yang tidak
+    masuk akal (wajah di belakang kamera) memaksa inisialisasi ulang.
+    """
+
+    def __init__(self, max_iterations=5):
+        self.criteria = (cv2.TERM_CRITERIA_COUNT | cv2.TERM_CRITERIA_EPS, max_iterations, 1e-6)
+        self.camera_matrix = None
+        self.dist_coeffs = np.zeros((4, 1))
+        self._frame_size = None
+        self.rvec = None
+        self.tvec = None
+
+        # Statistik
+        self.full_solves = 0
+        self.refinements = 0
+
+    def reset(self):
+        self.rvec = None
+        self.tvec = None
+
+    def _camera(self, width, height):
+        if self._frame_size != (width, height):
+            self.camera_matrix = np.array([[width, 0, width / 2],
+                                           [0, width, height / 2],
+                                           [0, 0, 1]], dtype=np.float64)
+            self._frame_size = (width, height)
+            self.reset()
+        return self.camera_matrix
+
+    def estimate(self, points, width, height):
+        """Kembalikan (yaw, pitch, roll) dalam derajat dari array landmark pixel (N, 3), atau None.
+
+        yaw > 0: wajah menghadap ke kanan gambar, pitch > 0: menghadap ke atas,
+        roll > 0: kepala miring searah jarum jam di gambar.
+        """
+        if points is None or len(points) <= POSE_LANDMARKS.max():
+            return None
+        camera_matrix = self._camera(width, height)
+        image_points = points[POSE_LANDMARKS, :2].astype(np.float64)
+
+        if self.rvec is None:
+            ok, rvec, tvec = cv2.solvePnP(FACE_MODEL_POINTS, image_points, camera_matrix,
+                                          self.dist_coeffs, flags=cv2.SOLVEPNP_ITERATIVE)
+            if not ok:
+                return None
+            self.rvec, self.tvec = rvec, tvec
+            self.full_solves += 1
+        else:
+            # Warm start: rvec/tvec frame sebelumnya diperbaiki in-place
+            cv2.solvePnPRefineLM(FACE_MODEL_POINTS, image_points, camera_matrix, self.dist_coeffs,
+                                 self.rvec, self.tvec, self.criteria)
+            self.refinements += 1
+
+        if not (self.tvec[2, 0] > 0 and np.isfinite(self.rvec).all()):
+            self.reset()
+            return None
+        return rotation_to_angles(cv2.Rodrigues(self.rvec)[0])
+
+    def get_stats(self):
+        return {'full_solves': self.full_solves, 'refinements': self.refinements}
+
+
+def rotation_to_angles(rotation):
+    """Matriks rotasi R = Rz(roll) Ry(yaw) Rx(pitch) -> (yaw, pitch, roll) derajat, tanda seperti estimate()"""
+    pitch = math.atan2(rotation[2, 1], rotation[2, 2])
+    yaw = math.atan2(-rotation[2, 0], math.hypot(rotation[2, 1], rotation[2, 2]))
+    roll = math.atan2(rotation[1, 0], rotation[0, 0])
+    # Arah hadap wajah = -z model: yaw/pitch positif OpenCV berarti menghadap kiri/bawah gambar
+    return (-math.degrees(yaw), -math.degrees(pitch), math.degrees(roll))
+
+
+def rotation_method_from_argv(argv=None):
+    """Ambil opsi --rotation dari command line, kembalikan (metode, argumen sisanya)"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--rotation', choices=ROTATION_METHODS, default=DEFAULT_ROTATION_METHOD,
+                        help="estimasi rotasi: pnp (solvePnP 3D) atau heuristic (asimetri 2D)")
+    args, remaining = parser.parse_known_args(argv)
+    return args.rotation, remaining
+
+
+def _project_model(yaw, pitch, roll, width=640, height=480, distance=500.0):
+    """Titik gambar dari model wajah yang diputar (untuk uji akurasi sintetis)"""
+    # Sudut dalam konvensi estimate() -> rotasi OpenCV
+    y, p, r = np.radians([-yaw, -pitch, roll])
+    rx = np.array([[1, 0, 0], [0, math.cos(p), -math.sin(p)], [0, math.sin(p), math.cos(p)]])
+    ry = np.array([[math.cos(y), 0, math.sin(y)], [0, 1, 0], [-math.sin(y), 0, math.cos(y)]])
+    rz = np.array([[math.cos(r), -math.sin(r), 0], [math.sin(r), math.cos(r), 0], [0, 0, 1]])
+    rvec = cv2.Rodrigues(rz @ ry @ rx)[0]
+    camera_matrix = np.array([[width, 0, width / 2], [0, width, height / 2], [0, 0, 1]], dtype=np.float64)
+    image_points, _ = cv2.projectPoints(FACE_MODEL_POINTS, rvec, np.array([[0.0], [0.0], [distance]]),
+                                        camera_matrix, np.zeros((4, 1)))
+    return image_points.reshape(-1, 2)
+
+
+def main():
+    """Bandingkan solvePnP vs heuristik 2D: biaya per frame dan kesesuaian yaw"""
+    parser = argparse.ArgumentParser(description="Benchmark head pose solvePnP vs heuristik")
+    parser.add_argument('clip', nargs='?', help="clip wajah rekaman (opsional)")
+    args = parser.parse_args()
+
+    # Uji round-trip: titik diproyeksikan dari FACE_MODEL_POINTS dengan camera matrix yang sama,
+    # jadi ini hanya memeriksa konvensi sudut/tanda, bukan akurasi pada wajah sungguhan
+    estimator = HeadPoseEstimator()
+    errors = []
+    points = np.zeros((478, 3), dtype=np.float32)
+    for yaw in range(-40, 41, 10):
+        for pitch in (-20, 0, 20):
+            points[POSE_LANDMARKS, :2] = _project_model(yaw, pitch, 5)
+            angles = estimator.estimate(points, 640, 480)
+            errors.append(np.abs(np.subtract(angles, (yaw, pitch, 5))))
+    errors = np.array(errors)
+    print(f"Round-trip sintetis: error rata-rata yaw {errors[:, 0].mean():.2f}°, pitch {errors[:, 1].mean():.2f}°, "
+          f"roll {errors[:, 2].mean():.2f}°")
+
+    if not args.clip:
+        return
+
+    import mediapipe as mp
+
+    from benchmark import install_output_stubs
+    from controllers import load_controller_class
+    from frame_sources import open_source
+    from landmark_array import LandmarkArray, face_points
+
+    install_output_stubs()
+    rotation_3 = load_controller_class('head_rotation').calculate_head_rotation
+    rotation_4 = load_controller_class('game').calculate_head_rotation
+
+    source = open_source(args.clip)
+    buffer = LandmarkArray()
+    estimator = HeadPoseEstimator()
+    frames = []
+    with mp.solutions.face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True) as face_mesh:
+        while True:
+            ret, frame = source.read()
+            if not ret:
+                break
+            frame = cv2.flip(frame, 1)
+            points = face_points(face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)),
+                                 frame.shape[1], frame.shape[0], buffer)
+            if points is not None:
+                frames.append((points.copy(), frame.shape[1], frame.shape[0]))
+    source.release()
+    if not frames:
+        print("Tidak ada wajah terdeteksi di clip")
+        return
+
+    timings = {'heuristic 3.py': [], 'heuristic 4.py': [], 'pnp': []}
+    yaw_3, yaw_4, yaw_pnp = [], [], []
+    for points, width, height in frames:
+        start = time.perf_counter()
+        yaw_3.append(rotation_3(None, points)[0])
+        timings['heuristic 3.py'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        yaw_4.append(rotation_4(None, points))
+        timings['heuristic 4.py'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        angles = estimator.estimate(points, width, height)
+        timings['pnp'].append(time.perf_counter() - start)
+        yaw_pnp.append(angles[0] if angles else np.nan)
+
+    print(f"Clip: {args.clip} ({len(frames)} frame dengan wajah)")
+    for name, values in timings.items():
+        values = np.array(values) * 1e6
+        print(f"  {name:15s}: mean {values.mean():7.1f} us, p95 {np.percentile(values, 95):7.1f} us")
+    print(f"  solvePnP penuh: {estimator.full_solves}x, refine warm-start: {estimator.refinements}x")
+    yaw_pnp = np.array(yaw_pnp)
+    for name, heuristic in (('3.py', yaw_3), ('4.py', yaw_4)):
+        corr = np.corrcoef(heuristic, yaw_pnp)[0, 1] if np.std(yaw_pnp) > 0 else float('nan')
+        print(f"  Korelasi yaw heuristik {name} vs pnp: {corr:.2f}")
+    print(f"  Rentang yaw pnp: {np.nanmin(yaw_pnp):.1f}° .. {np.nanmax(yaw_pnp):.1f}°")
+
+    # Sweep threshold yaw pnp: kesesuaian arah dengan heuristik yang sudah dikalibrasi
+    # (threshold dan smoothing controller), sebagai titik awal tuning pnp pada data rekaman
+    valid = np.isfinite(yaw_pnp)
+    for name, heuristic, threshold, history in (('3.py', yaw_3, 15, 5), ('4.py', yaw_4, 12, 3)):
+        reference = _directions(np.array(heuristic)[valid], threshold, history)
+        if len(np.unique(reference)) < 2:
+            print(f"  {name}: clip tidak memuat gelengan kiri/kanan menurut heuristik, sweep tidak informatif")
+            continue
+        sweep = [(np.mean(_directions(yaw_pnp[valid], candidate, history) == reference), candidate)
+                 for candidate in np.arange(2.0, 30.5, 0.5)]
+        agreement, best = max(sweep)
+        print(f"  {name} (threshold {threshold}, history {history}): threshold pnp {best:.1f}° "
+              f"-> kesesuaian arah {agreement * 100:.1f}% "
+              f"(arah heuristik: {dict(zip(*np.unique(reference, return_counts=True)))})")
+
+
+def _directions(rotations, threshold, history):
+    """Arah per frame seperti smooth_rotation + determine_direction (mean history terakhir)"""
+    padded = np.concatenate([np.zeros(history - 1), rotations])
+    sums = np.lib.stride_tricks.sliding_window_view(padded, history).sum(axis=1)
+    smoothed = sums / np.minimum(np.arange(1, len(rotations) + 1), history)
+    return np.where(smoothed > threshold, 1, np.where(smoothed < -threshold, -1, 0))
+
+
+if __name__ == "__main__":
+    main()
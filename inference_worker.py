@@ -0,0 +1,303 @@
+import argparse
+import multiprocessing
+import queue
+import sys
+import time
+import types
+from collections import deque
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from landmark_array import FACE_LANDMARKS, HAND_LANDMARKS, LandmarkArray
+
+
+def _worker_main(kind, options, frame_name, result_name, slots, frame_bytes, num_landmarks,
+                 tasks, results):
+    """Loop proses worker: baca frame dari slot, inference, tulis landmark ke slot hasil"""
+    import mediapipe as mp
+
+    frame_shm = shared_memory.SharedMemory(name=frame_name)
+    result_shm = shared_memory.SharedMemory(name=result_name)
+    frame_slots = np.ndarray((slots, frame_bytes), np.uint8, frame_shm.buf)
+    landmark_slots = np.ndarray((slots, num_landmarks, 3), np.float32, result_shm.buf)
+
+    if kind == 'face':
+        model = mp.solutions.face_mesh.FaceMesh(**options)
+    else:
+        model = mp.solutions.hands.Hands(**options)
+    buffer = LandmarkArray(num_landmarks)
+    results.put('ready')
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, frame_id, height, width = task
+
+            start = time.perf_counter()
+            frame_rgb = frame_slots[slot, :height * width * 3].reshape(height, width, 3)
+            output = model.process(frame_rgb)
+            detected = output.multi_face_landmarks if kind == 'face' else output.multi_hand_landmarks
+
+            count = 0
+            if detected:
+                # Skala 1x1: landmark tetap ternormalisasi, controller yang mengubah ke pixel
+                points = buffer.update(detected[0], 1, 1)
+                count = len(points)
+                landmark_slots[slot, :count] = points
+            results.put((slot, frame_id, count, time.perf_counter() - start))
+    finally:
+        model.close()
+        del frame_slots, landmark_slots
+        frame_shm.close()
+        result_shm.close()
+
+
+class InferenceWorker:
+    """Jalankan FaceMesh/Hands di proses terpisah, frame dikirim lewat ring shared memory.
+
+    Frame RGB disalin ke salah satu slot shared memory (tanpa pickling); yang
+    lewat queue hanya index slot dan ukuran frame. Worker menulis landmark
+    pertama yang terdeteksi sebagai float32 (N, 3) ternormalisasi ke slot
+    hasil. get_result() mengembalikan objek mirip hasil MediaPipe sehingga
+    process_frame() controller bisa dipakai tanpa perubahan.
+
+    Frame yang lebih besar dari slot (width x height) diperkecil dulu dengan
+    rasio aspek tetap. Landmark keluar ternormalisasi, jadi controller tetap
+    memetakannya ke ukuran frame aslinya; model MediaPipe sendiri bekerja di
+    resolusi input yang jauh lebih kecil dari 640x480.
+    """
+
+    def __init__(self, kind='face', slots=2, width=640, height=480, **options):
+        if kind == 'face':
+            num_landmarks = FACE_LANDMARKS
+            options.setdefault('max_num_faces', 1)
+            options.setdefault('refine_landmarks', True)
+        elif kind == 'hands':
+            num_landmarks = HAND_LANDMARKS
+            options.setdefault('max_num_hands', 1)
+        else:
+            raise ValueError(f"Jenis model tidak dikenal: {kind}")
+
+        self.kind = kind
+        self.slots = slots
+        self.width, self.height = width, height
+        self.frame_bytes = width * height * 3
+        self.num_landmarks = num_landmarks
+
+        self._frame_shm = shared_memory.SharedMemory(create=True, size=slots * self.frame_bytes)
+        self._result_shm = shared_memory.SharedMemory(
+            create=True, size=slots * num_landmarks * 3 * 4
+        )
+        self._frame_slots = np.ndarray((slots, self.frame_bytes), np.uint8, self._frame_shm.buf)
+        self._landmark_slots = np.ndarray((slots, num_landmarks, 3), np.float32, self._result_shm.buf)
+        self._free_slots = deque(range(slots))
+        self._next_frame_id = 0
+
+        # spawn: MediaPipe tidak aman di-fork dari proses yang sudah punya thread
+        ctx = multiprocessing.get_context('spawn')
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._process = ctx.Process(
+            target=_worker_main, name=f"InferenceWorker-{kind}", daemon=True,
+            args=(kind, options, self._frame_shm.name, self._result_shm.name, slots,
+                  self.frame_bytes, num_landmarks, self._tasks, self._results)
+        )
+        self._process.start()
+
+        # Tunggu model selesai dimuat agar frame pertama tidak menanggung waktu startup
+        if self._results.get(timeout=60) != 'ready':
+            raise RuntimeError("Inference worker gagal start")
+
+        # Statistik
+        self.submitted = 0
+        self.completed = 0
+        self._submit_times = {}
+        self._inference_times = deque(maxlen=500)
+        self._round_trip_times = deque(maxlen=500)
+        self.downscaled = 0
+
+    def in_flight(self):
+        return self.slots - len(self._free_slots)
+
+    def submit(self, frame_rgb):
+        """Salin frame ke slot kosong dan antrikan ke worker; None jika ring penuh"""
+        if not self._free_slots:
+            return None
+        height, width = frame_rgb.shape[:2]
+        if width > self.width or height > self.height:
+            # Frame HD / kamera yang mengabaikan set(): perkecil agar muat di slot
+            scale = min(self.width / width, self.height / height)
+            width, height = max(1, int(width * scale)), max(1, int(height * scale))
+            frame_rgb = cv2.resize(frame_rgb, (width, height), interpolation=cv2.INTER_AREA)
+            self.downscaled += 1
+        size = height * width * 3
+
+        slot = self._free_slots.popleft()
+        self._frame_slots[slot, :size].reshape(height, width, 3)[:] = frame_rgb
+
+        frame_id = self._next_frame_id
+        self._next_frame_id += 1
+        self._submit_times[frame_id] = time.perf_counter()
+        self._tasks.put((slot, frame_id, height, width))
+        self.submitted += 1
+        return frame_id
+
+    def get_result(self, timeout=5.0):
+        """Ambil hasil tertua (urutan sama dengan submit), kembalikan objek mirip hasil MediaPipe"""
+        try:
+            slot, frame_id, count, inference_time = self._results.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError("Inference worker tidak merespon") from None
+
+        landmarks = [self._landmark_slots[slot, :count].copy()] if count else None
+        self._free_slots.append(slot)
+
+        self.completed += 1
+        self._inference_times.append(inference_time)
+        self._round_trip_times.append(time.perf_counter() - self._submit_times.pop(frame_id))
+
+        if self.kind == 'face':
+            return types.SimpleNamespace(frame_id=frame_id, multi_face_landmarks=landmarks)
+        return types.SimpleNamespace(frame_id=frame_id, multi_hand_landmarks=landmarks)
+
+    def process(self, frame_rgb):
+        """Pengganti langsung face_mesh.process / hands.process (sinkron)"""
+        if self.submit(frame_rgb) is None:
+            raise RuntimeError("Masih ada frame yang belum diambil hasilnya")
+        return self.get_result()
+
+    def get_stats(self):
+        inference = np.asarray(self._inference_times, dtype=np.float64) * 1000
+        round_trip = np.asarray(self._round_trip_times, dtype=np.float64) * 1000
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'downscaled': self.downscaled,
+            'inference_mean_ms': float(inference.mean()) if inference.size else 0.0,
+            'round_trip_mean_ms': float(round_trip.mean()) if round_trip.size else 0.0,
+        }
+
+    def summary(self):
+        stats = self.get_stats()
+        return (f"Inference worker ({self.kind}): {stats['completed']}/{stats['submitted']} frame, "
+                f"inference {stats['inference_mean_ms']:.1f} ms, "
+                f"round-trip {stats['round_trip_mean_ms']:.1f} ms, "
+                f"{stats['downscaled']} frame diperkecil ke {self.width}x{self.height}")
+
+    def close(self):
+        """Alias stop(), seragam dengan FaceMesh/Hands.close()"""
+        self.stop()
+
+    def stop(self):
+        """Hentikan proses worker dan lepaskan shared memory"""
+        if self._process.is_alive():
+            self._tasks.put(None)
+            self._process.join(timeout=5.0)
+            if self._process.is_alive():
+                self._process.terminate()
+        del self._frame_slots, self._landmark_slots
+        for shm in (self._frame_shm, self._result_shm):
+            shm.close()
+            shm.unlink()
+
+
+def inference_worker_from_argv(argv=None):
+    """Ambil opsi --worker dari command line, kembalikan (bool, argumen sisanya)"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--worker', action='store_true',
+                        help="jalankan model MediaPipe di proses worker (InferenceWorker)")
+    args, remaining = parser.parse_known_args(argv)
+    return args.worker, remaining
+
+
+def _run_bus(source_spec, plugin_names, worker):
+    """Jalankan LandmarkBus headless di atas clip, kembalikan (frame, detik)"""
+    import contextlib
+    import io
+
+    import benchmark
+    import landmark_bus
+    from controllers import CONTROLLERS, load_script_module
+    from frame_sources import open_source
+
+    # Bus dan modul plugin memakai cv2 headless (imshow/waitKey/destroyAllWindows)
+    modules = [landmark_bus] + [load_script_module(CONTROLLERS[name][0]) for name in plugin_names]
+    real_cv2 = [module.cv2 for module in modules]
+    headless_cv2 = benchmark._TimedCV2(benchmark.StageTimer(), headless=True)
+    for module in modules:
+        module.cv2 = headless_cv2
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            bus = landmark_bus.LandmarkBus(open_source(source_spec), worker=worker,
+                                           **landmark_bus.plugin_confidence(plugin_names))
+            for name in plugin_names:
+                plugin_cls = getattr(load_script_module(CONTROLLERS[name][0]), CONTROLLERS[name][1])
+                bus.register(plugin_cls(source=None))
+            start = time.perf_counter()
+            bus.run()
+            elapsed = time.perf_counter() - start
+    finally:
+        for module, cv2_module in zip(modules, real_cv2):
+            module.cv2 = cv2_module
+    return bus.frame_count, elapsed
+
+
+def _run_hands(source_spec, worker):
+    """Jalankan HandGestureDetector (sleep.py) headless di atas clip, kembalikan (frame, detik)"""
+    import contextlib
+    import io
+
+    import benchmark
+    from controllers import CONTROLLERS, load_script_module
+    from duty_cycle import DutyCycle
+    from frame_sources import open_source
+    from motion_gate import MotionGate
+    from system_actions import ActionExecutor, stub_methods
+
+    module = load_script_module(CONTROLLERS['sleep_gesture'][0])
+    real_cv2 = module.cv2
+    module.cv2 = benchmark._TimedCV2(benchmark.StageTimer(), headless=True)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Duty cycle dan motion gate mati: setiap frame benar-benar melewati Hands
+            detector = module.HandGestureDetector(
+                open_source(source_spec), duty_cycle=DutyCycle(enabled=False),
+                motion_gate=MotionGate(enabled=False), actions=ActionExecutor(stub_methods()), worker=worker)
+            start = time.perf_counter()
+            detector.run_detection()
+            elapsed = time.perf_counter() - start
+    finally:
+        module.cv2 = real_cv2
+    return detector.cap.frames_delivered, elapsed
+
+
+def main():
+    """Bandingkan throughput loop single-thread vs inference di proses worker"""
+    from benchmark import install_output_stubs
+    from landmark_bus import PLUGIN_CONTROLLERS
+
+    parser = argparse.ArgumentParser(description="Throughput inference: single-thread vs worker process")
+    parser.add_argument('clip', help="file video / folder gambar / synthetic[:N]")
+    parser.add_argument('--plugins', nargs='+', default=['forehead_cursor'], choices=PLUGIN_CONTROLLERS)
+    parser.add_argument('--hands', action='store_true',
+                        help="ukur HandGestureDetector (Hands) alih-alih LandmarkBus (FaceMesh); "
+                             "jalur tangan memakai process() sinkron, tanpa pipelining")
+    args = parser.parse_args()
+
+    install_output_stubs()
+    print(f"CPU cores: {multiprocessing.cpu_count()}", file=sys.stderr)
+    for label, worker in (("single-thread", False), ("worker process", True)):
+        if args.hands:
+            frames, elapsed = _run_hands(args.clip, worker)
+        else:
+            frames, elapsed = _run_bus(args.clip, args.plugins, worker)
+        fps = frames / elapsed if elapsed > 0 else 0.0
+        print(f"{label:15s}: {frames} frame dalam {elapsed:.2f} s ({fps:.1f} FPS)")
+
+
+if __name__ == "__main__":
+    main()
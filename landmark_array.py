@@ -0,0 +1,224 @@
+import argparse
+import time
+
+import numpy as np
+
+
+FACE_LANDMARKS = 478  # FaceMesh dengan refine_landmarks=True
+HAND_LANDMARKS = 21
+
+# Sambungan kerangka tangan (sama dengan mp.solutions.hands.HAND_CONNECTIONS) sebagai array (K, 2),
+# untuk menggambar dari array (21, 3) tanpa protobuf / impor mediapipe
+HAND_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 4),          # jempol
+    (0, 5), (5, 6), (6, 7), (7, 8),          # telunjuk
+    (9, 10), (10, 11), (11, 12),             # tengah
+    (13, 14), (14, 15), (15, 16),            # manis
+    (0, 17), (17, 18), (18, 19), (19, 20),   # kelingking
+    (5, 9), (9, 13), (13, 17),               # telapak
+])
+
+
+# Layout serialisasi NormalizedLandmark {x, y, z}: 17 byte per landmark
+# (0x0a 0x0f | 0x0d x:f32 | 0x15 y:f32 | 0x1d z:f32)
+_RECORD_SIZE = 17
+_HEADER_BYTES = np.array([0x0a, 0x0f], dtype=np.uint8)
+_FIELD_TAGS = np.array([0x0d, 0x15, 0x1d], dtype=np.uint8)
+
+
+class LandmarkArray:
+    """Konversi landmark MediaPipe ke array float32 (N, 3) dalam pixel.
+
+    Buffer dialokasikan sekali dan dipakai ulang setiap frame. Fungsi fitur
+    cukup memakai fancy indexing (points[[10, 33, 263]]) alih-alih membaca
+    atribut .x/.y protobuf satu per satu.
+    """
+
+    def __init__(self, num_landmarks=FACE_LANDMARKS):
+        self.points = np.zeros((num_landmarks, 3), dtype=np.float32)
+        self.count = 0
+        self._scale = np.ones(3, dtype=np.float32)
+
+    def update(self, landmarks, width, height):
+        """Isi buffer dari NormalizedLandmarkList (list landmark / array (N, 3)), kembalikan view (N, 3)"""
+        landmark_list = getattr(landmarks, 'landmark', landmarks)
+        count = len(landmark_list)
+        if count > len(self.points):
+            self.points = np.zeros((count, 3), dtype=np.float32)
+
+        # z MediaPipe memakai skala yang sama dengan x
+        self._scale[0] = width
+        self._scale[1] = height
+        self._scale[2] = width
+
+        points = self.points[:count]
+        if isinstance(landmarks, np.ndarray):
+            # Sudah berupa array ternormalisasi (misal dari InferenceWorker)
+            np.multiply(landmarks, self._scale, out=points)
+        elif not self._decode_serialized(landmarks, points):
+            # Fallback: baca atribut satu per satu (misal ada field bernilai 0 / visibility)
+            points[:] = np.fromiter(
+                (value for lm in landmark_list for value in (lm.x, lm.y, lm.z)),
+                dtype=np.float32, count=count * 3
+            ).reshape(count, 3)
+            points *= self._scale
+
+        self.count = count
+        return points
+
+    def _decode_serialized(self, landmarks, points):
+        """Decode x/y/z langsung dari bytes protobuf; False jika layout tidak standar"""
+        if not hasattr(landmarks, 'SerializeToString'):
+            return False
+        data = landmarks.SerializeToString()
+        count = len(points)
+        if len(data) != count * _RECORD_SIZE:
+            return False
+
+        # View strided tanpa copy ke header, tag field dan nilai float32
+        headers = np.ndarray((count, 2), np.uint8, data, 0, (_RECORD_SIZE, 1))
+        tags = np.ndarray((count, 3), np.uint8, data, 2, (_RECORD_SIZE, 5))
+        if not ((headers == _HEADER_BYTES).all() and (tags == _FIELD_TAGS).all()):
+            return False
+        values = np.ndarray((count, 3), '<f4', data, 3, (_RECORD_SIZE, 5))
+        np.multiply(values, self._scale, out=points)
+        return True
+
+
+def face_points(results, width, height, buffer):
+    """Array landmark wajah pertama dari hasil FaceMesh, atau None"""
+    if not results.multi_face_landmarks:
+        return None
+    return buffer.update(results.multi_face_landmarks[0], width, height)
+
+
+def hand_points(results, width, height, buffer):
+    """Array landmark tangan pertama dari hasil Hands, atau None"""
+    if not results.multi_hand_landmarks:
+        return None
+    return buffer.update(results.multi_hand_landmarks[0], width, height)
+
+
+# --- Microbenchmark: akses atribut protobuf vs array ---
+
+def _legacy_head_rotation(landmarks, frame_width, frame_height):
+    """Versi lama calculate_head_rotation (3.py) sebagai pembanding"""
+    nose_tip = landmarks[10]
+    left_eye = landmarks[33]
+    right_eye = landmarks[263]
+    left_mouth = landmarks[61]
+    right_mouth = landmarks[291]
+    chin = landmarks[151]
+    nose_x = int(nose_tip.x * frame_width)
+    left_eye_x = int(left_eye.x * frame_width)
+    left_eye_y = int(left_eye.y * frame_height)
+    right_eye_x = int(right_eye.x * frame_width)
+    right_eye_y = int(right_eye.y * frame_height)
+    left_mouth_x = int(left_mouth.x * frame_width)
+    right_mouth_x = int(right_mouth.x * frame_width)
+    chin_x = int(chin.x * frame_width)
+    chin_y = int(chin.y * frame_height)
+    eye_center_x = (left_eye_x + right_eye_x) // 2
+    eye_center_y = (left_eye_y + right_eye_y) // 2
+    mouth_center_x = (left_mouth_x + right_mouth_x) // 2
+    np.arctan2(chin_y - eye_center_y, chin_x - eye_center_x)
+    rotation_indicator = (mouth_center_x - nose_x) * 0.7 + (right_eye_x - left_eye_x) * 0.3
+    face_width = abs(right_eye_x - left_eye_x)
+    return (rotation_indicator / face_width) * 45 if face_width > 0 else 0
+
+
+def _legacy_eye_landmarks(landmarks, eye_indices, img_width, img_height):
+    """Versi lama extract_eye_landmarks (eye.py) sebagai pembanding"""
+    eye_points = []
+    for idx in eye_indices:
+        if idx < len(landmarks.landmark):
+            x = int(landmarks.landmark[idx].x * img_width)
+            y = int(landmarks.landmark[idx].y * img_height)
+            eye_points.append([x, y])
+    return np.array(eye_points)
+
+
+def _legacy_forehead_point(landmarks, img_width, img_height):
+    """Versi lama get_forehead_point (cursor.py) sebagai pembanding"""
+    forehead_points = []
+    for idx in [10, 151, 9, 10]:
+        if idx < len(landmarks.landmark):
+            x = int(landmarks.landmark[idx].x * img_width)
+            y = int(landmarks.landmark[idx].y * img_height)
+            forehead_points.append((x, y))
+    avg_x = sum(p[0] for p in forehead_points) // len(forehead_points)
+    avg_y = sum(p[1] for p in forehead_points) // len(forehead_points)
+    return (avg_x, avg_y - 30)
+
+
+def _fake_landmark_list(count, rng):
+    """NormalizedLandmarkList protobuf asli dengan nilai acak"""
+    from mediapipe.framework.formats import landmark_pb2
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in rng.uniform(0.3, 0.7, (count, 3)):
+        landmark_list.landmark.add(x=x, y=y, z=z - 0.5)
+    return landmark_list
+
+
+def _time_per_frame(func, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        func()
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def main():
+    """Bandingkan biaya ekstraksi fitur per frame: protobuf vs LandmarkArray"""
+    parser = argparse.ArgumentParser(description="Microbenchmark ekstraksi fitur landmark")
+    parser.add_argument('--frames', type=int, default=2000)
+    args = parser.parse_args()
+
+    # Controller asli dipakai untuk versi baru (output mouse/keyboard di-stub)
+    from benchmark import install_output_stubs
+    from controllers import load_controller_class
+    install_output_stubs()
+    rotation_cls = load_controller_class('head_rotation')
+    cursor_cls = load_controller_class('forehead_cursor')
+    eye_cls = load_controller_class('eye')
+
+    rng = np.random.default_rng(0)
+    face = _fake_landmark_list(FACE_LANDMARKS, rng)
+    width, height = 640, 480
+    left_eye = np.array([362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398])
+    right_eye = np.array([33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246])
+    buffer = LandmarkArray()
+
+    def legacy():
+        _legacy_head_rotation(face.landmark, width, height)
+        _legacy_forehead_point(face, width, height)
+        _legacy_eye_landmarks(face, left_eye, width, height)
+        _legacy_eye_landmarks(face, right_eye, width, height)
+
+    def vectorized():
+        points = buffer.update(face, width, height)
+        rotation_cls.calculate_head_rotation(None, points)
+        cursor_cls.get_forehead_point(None, points)
+        eye_cls.extract_eye_landmarks(None, points, left_eye)
+        eye_cls.extract_eye_landmarks(None, points, right_eye)
+
+    def features_only():
+        rotation_cls.calculate_head_rotation(None, points)
+        cursor_cls.get_forehead_point(None, points)
+        eye_cls.extract_eye_landmarks(None, points, left_eye)
+        eye_cls.extract_eye_landmarks(None, points, right_eye)
+
+    points = buffer.update(face, width, height)
+    convert_us = _time_per_frame(lambda: buffer.update(face, width, height), args.frames)
+    legacy_us = _time_per_frame(legacy, args.frames)
+    vectorized_us = _time_per_frame(vectorized, args.frames)
+    features_us = _time_per_frame(features_only, args.frames)
+
+    print(f"Frames: {args.frames}")
+    print(f"Protobuf per-attribute (lama) : {legacy_us:8.1f} us/frame")
+    print(f"LandmarkArray total (baru)    : {vectorized_us:8.1f} us/frame")
+    print(f"  - konversi (N, 3)           : {convert_us:8.1f} us/frame")
+    print(f"  - fitur (fancy indexing)    : {features_us:8.1f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
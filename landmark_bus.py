@@ -0,0 +1,198 @@
+import argparse
+from collections import deque
+
+import cv2
+
+from capture import ThreadedCapture
+from controllers import load_controller_class
+from frame_sources import source_from_argv
+from inference_worker import InferenceWorker
+from motion_gate import MotionGate, motion_gate_from_argv
+from startup import STARTUP, lazy_import, parallel_startup
+
+# Dengan --worker proses utama tidak pernah mengimpor mediapipe
+mp = lazy_import('mediapipe')
+
+
+# Controller FaceMesh yang bisa dipasang sebagai plugin (punya process_frame/handle_key/cleanup)
+PLUGIN_CONTROLLERS = ('head_rotation', 'game', 'forehead_cursor_basic', 'forehead_cursor', 'eye')
+
+# (min_detection_confidence, min_tracking_confidence) FaceMesh milik tiap controller saat berdiri sendiri
+PLUGIN_CONFIDENCE = {
+    'head_rotation': (0.5, 0.5),
+    'game': (0.7, 0.7),
+    'forehead_cursor_basic': (0.5, 0.5),
+    'forehead_cursor': (0.5, 0.5),
+    'eye': (0.7, 0.7),
+}
+
+
+def plugin_confidence(names):
+    """Confidence FaceMesh bersama: yang paling ketat di antara plugin, kembalikan dict kwargs"""
+    detection, tracking = zip(*(PLUGIN_CONFIDENCE[name] for name in names))
+    return {'min_detection_confidence': max(detection), 'min_tracking_confidence': max(tracking)}
+
+
+class LandmarkBus:
+    """Satu kamera + satu inference FaceMesh per frame, hasilnya dibagikan ke banyak controller.
+
+    Plugin adalah controller yang dibuat dengan source=None. Setiap frame bus
+    memanggil plugin.process_frame(frame, results) lalu menampilkan hasilnya
+    di window plugin; input keyboard diteruskan ke handle_key() semua plugin.
+
+    Dengan worker=True FaceMesh berjalan di proses terpisah (InferenceWorker):
+    selagi worker memproses frame N, loop utama sudah membaca frame N+1 dan
+    menggambar/mengirim output untuk frame sebelumnya.
+
+    Tanpa worker, motion gate melewati FaceMesh pada frame statis dan
+    membagikan ulang hasil terakhir ke semua plugin. Mode worker tidak
+    memakai gate karena beberapa frame sedang diproses bersamaan.
+
+    Confidence FaceMesh berlaku untuk semua plugin; gunakan
+    plugin_confidence() agar game/eye (0.7) tidak diam-diam turun ke 0.5.
+    """
+
+    def __init__(self, source=0, plugins=(), min_detection_confidence=0.5,
+                 min_tracking_confidence=0.5, worker=False, motion_gate=None):
+        # refine_landmarks=True karena EyeController butuh landmark iris
+        options = dict(
+            static_image_mode=False,
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+
+        def build_model():
+            if worker:
+                return InferenceWorker('face', **options)
+            return mp.solutions.face_mesh.FaceMesh(**options)
+
+        # Kamera dibuka paralel dengan pembuatan model (atau spawn worker), lalu warm-up
+        self.cap, model = parallel_startup(lambda: ThreadedCapture(source, width=640, height=480), build_model)
+        self.worker = model if worker else None
+        self.face_mesh = None if worker else model
+        self.plugins = list(plugins)
+        self.motion_gate = motion_gate or MotionGate(enabled=not worker)
+
+        # Statistik
+        self.frame_count = 0
+        self.inference_count = 0
+
+    def register(self, plugin):
+        """Tambahkan controller (dibuat dengan source=None) ke bus"""
+        self.plugins.append(plugin)
+        return plugin
+
+    def step(self, frame):
+        """Satu inference untuk frame ini, lalu fan-out ke semua plugin"""
+        if self.worker is not None:
+            results = self.worker.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        elif self.motion_gate.should_infer(frame):
+            results = self.motion_gate.store(self.face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+        else:
+            return self.dispatch(frame, self.motion_gate.results)
+        self.inference_count += 1
+        return self.dispatch(frame, results)
+
+    def dispatch(self, frame, results):
+        """Fan-out hasil inference ke semua plugin"""
+        outputs = []
+        for plugin in self.plugins:
+            # Tiap plugin menggambar overlay di salinannya sendiri
+            canvas = frame.copy() if len(self.plugins) > 1 else frame
+            outputs.append(plugin.process_frame(canvas, results))
+        return outputs
+
+    def _pipelined_results(self):
+        """Yield (frame, results) dengan hingga worker.slots frame diproses paralel"""
+        pending = deque()
+        while True:
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            frame = cv2.flip(frame, 1)
+            self.worker.submit(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            pending.append(frame)
+            if len(pending) >= self.worker.slots:
+                self.inference_count += 1
+                yield pending.popleft(), self.worker.get_result()
+
+        # Habiskan frame yang masih diproses worker
+        while pending:
+            self.inference_count += 1
+            yield pending.popleft(), self.worker.get_result()
+
+    def _sequential_results(self):
+        while True:
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            frame = cv2.flip(frame, 1)
+            if not self.motion_gate.should_infer(frame):
+                yield frame, self.motion_gate.results
+                continue
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            self.inference_count += 1
+            yield frame, self.motion_gate.store(self.face_mesh.process(frame_rgb))
+
+    def run(self):
+        """Loop utama bus"""
+        if self.worker is not None:
+            frames = self._pipelined_results()
+        else:
+            frames = self._sequential_results()
+        try:
+            for frame, results in frames:
+                outputs = self.dispatch(frame, results)
+                self.frame_count += 1
+
+                for plugin, output in zip(self.plugins, outputs):
+                    cv2.imshow(plugin.window_name, output)
+
+                key = cv2.waitKey(1) & 0xFF
+                # Semua plugin menerima key; keluar jika salah satu meminta
+                keep_running = [plugin.handle_key(key) for plugin in self.plugins]
+                if not all(keep_running):
+                    break
+        except KeyboardInterrupt:
+            print("\nLandmark bus dihentikan oleh user")
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
+        for plugin in self.plugins:
+            plugin.cleanup()
+        print(f"Landmark bus: {self.frame_count} frame, {self.inference_count} inference "
+              f"untuk {len(self.plugins)} controller")
+        if self.worker is not None:
+            print(self.worker.summary())
+            self.worker.stop()
+        else:
+            print(self.motion_gate.summary())
+        print(STARTUP.summary())
+        print(self.cap.summary())
+        self.cap.release()
+        cv2.destroyAllWindows()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan beberapa controller dari satu FaceMesh")
+    parser.add_argument('plugins', nargs='+', choices=PLUGIN_CONTROLLERS,
+                        help="controller yang dipasang ke bus")
+    parser.add_argument('--source', default='0', help="sumber frame (lihat frame_sources.py)")
+    parser.add_argument('--worker', action='store_true',
+                        help="jalankan FaceMesh di proses terpisah (shared memory)")
+    args, remaining = parser.parse_known_args()
+
+    motion_gate, remaining = motion_gate_from_argv(remaining)
+    source = source_from_argv([args.source] + remaining)
+    bus = LandmarkBus(source, worker=args.worker, motion_gate=None if args.worker else motion_gate,
+                      **plugin_confidence(args.plugins))
+    for name in args.plugins:
+        bus.register(load_controller_class(name)(source=None))
+    bus.run()
+
+
+if __name__ == "__main__":
+    main()
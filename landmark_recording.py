@@ -0,0 +1,535 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from landmark_array import FACE_LANDMARKS, HAND_LANDMARKS, LandmarkArray
+
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+NUM_LANDMARKS = {'face': FACE_LANDMARKS, 'hand': HAND_LANDMARKS}
+
+# Array per chunk: nama -> (dtype, shape per frame). thumbs hanya jika thumbnail aktif
+_FIELDS = ('timestamps', 'present', 'landmarks', 'thumbs')
+
+
+def _chunk_file(path, field, index):
+    return os.path.join(path, f"{field}_{index:05d}.npy")
+
+
+class LandmarkRecorder:
+    """Rekam landmark per frame ke folder berisi chunk .npy memory-mapped.
+
+    Per chunk (chunk_frames frame) ada file terpisah untuk timestamp capture
+    (float64, detik sejak frame pertama), flag deteksi (bool), landmark
+    ternormalisasi (float32 (N, 3), sama seperti output InferenceWorker) dan
+    opsional thumbnail BGR kecil (uint8). File chunk dibuat penuh di awal
+    dengan open_memmap, sehingga record() hanya menyalin satu baris ke page
+    cache tanpa alokasi; chunk terakhir dipangkas saat close(). meta.json
+    menyimpan jenis (face/hand), ukuran frame dan jumlah frame per chunk.
+    """
+
+    def __init__(self, path, kind='face', width=640, height=480, chunk_frames=1800,
+                 thumbnail_size=None):
+        if kind not in NUM_LANDMARKS:
+            raise ValueError(f"Jenis landmark tidak dikenal: {kind}")
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, META_FILE)):
+            raise FileExistsError(f"Rekaman sudah ada di {path}")
+        self.path = path
+        self.kind = kind
+        self.num_landmarks = NUM_LANDMARKS[kind]
+        self.width = width
+        self.height = height
+        self.chunk_frames = chunk_frames
+        self.thumbnail_size = tuple(thumbnail_size) if thumbnail_size else None
+
+        self._buffer = LandmarkArray(self.num_landmarks)
+        self._arrays = None
+        self._chunk_counts = []
+        self._start = None
+        self.frames = 0
+        self.detected = 0
+        self._write_time = 0.0
+
+    def _shapes(self):
+        shapes = {
+            'timestamps': (np.float64, ()),
+            'present': (np.bool_, ()),
+            'landmarks': (np.float32, (self.num_landmarks, 3)),
+        }
+        if self.thumbnail_size:
+            width, height = self.thumbnail_size
+            shapes['thumbs'] = (np.uint8, (height, width, 3))
+        return shapes
+
+    def _open_chunk(self):
+        index = len(self._chunk_counts)
+        self._arrays = {
+            field: np.lib.format.open_memmap(_chunk_file(self.path, field, index), mode='w+',
+                                             dtype=dtype, shape=(self.chunk_frames,) + shape)
+            for field, (dtype, shape) in self._shapes().items()
+        }
+        self._chunk_counts.append(0)
+
+    def record(self, landmarks, timestamp=None, frame=None):
+        """Tambahkan satu frame.
+
+        landmarks: NormalizedLandmarkList / array (N, 3) ternormalisasi, atau None
+        jika tidak ada wajah/tangan. timestamp: perf_counter saat capture.
+        frame: frame BGR untuk thumbnail (diabaikan jika thumbnail nonaktif).
+        """
+        start = time.perf_counter()
+        if timestamp is None:
+            timestamp = start
+        if self._start is None:
+            self._start = timestamp
+        if self._arrays is None or self._chunk_counts[-1] == self.chunk_frames:
+            self._close_chunk()
+            self._open_chunk()
+
+        row = self._chunk_counts[-1]
+        self._arrays['timestamps'][row] = timestamp - self._start
+        if landmarks is not None:
+            # Skala 1x1: disimpan ternormalisasi, replay mengubah ke pixel sesuai ukuran frame
+            points = self._buffer.update(landmarks, 1, 1)
+            self._arrays['landmarks'][row] = points
+            self._arrays['present'][row] = True
+            self.detected += 1
+        else:
+            self._arrays['present'][row] = False
+        if self.thumbnail_size and frame is not None:
+            cv2.resize(frame, self.thumbnail_size, dst=self._arrays['thumbs'][row],
+                       interpolation=cv2.INTER_LINEAR)
+
+        self._chunk_counts[-1] += 1
+        self.frames += 1
+        self._write_time += time.perf_counter() - start
+
+    def record_results(self, results, timestamp=None, frame=None):
+        """record() dari hasil FaceMesh/Hands (landmark wajah/tangan pertama)"""
+        detected = results.multi_face_landmarks if self.kind == 'face' else results.multi_hand_landmarks
+        self.record(detected[0] if detected else None, timestamp, frame)
+
+    def _close_chunk(self):
+        if self._arrays is None:
+            return
+        count = self._chunk_counts[-1]
+        index = len(self._chunk_counts) - 1
+        arrays, self._arrays = self._arrays, None
+        partial = {}
+        for field, array in arrays.items():
+            array.flush()
+            if count < self.chunk_frames:
+                # Chunk terakhir: salin baris yang terisi sebelum memmap ditutup
+                partial[field] = np.array(array[:count])
+            # Tutup mapping sekarang: di Windows file yang masih di-map tidak bisa ditimpa
+            array._mmap.close()
+        del arrays, array
+        for field, data in partial.items():
+            np.save(_chunk_file(self.path, field, index), data)
+
+    def close(self):
+        """Tutup chunk terakhir dan tulis meta.json"""
+        self._close_chunk()
+        meta = {
+            'version': FORMAT_VERSION,
+            'kind': self.kind,
+            'num_landmarks': self.num_landmarks,
+            'width': self.width,
+            'height': self.height,
+            'chunk_frames': self.chunk_frames,
+            'thumbnail_size': list(self.thumbnail_size) if self.thumbnail_size else None,
+            'frames': self.frames,
+            'chunks': self._chunk_counts,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with open(os.path.join(self.path, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+    def summary(self):
+        write_us = self._write_time / self.frames * 1e6 if self.frames else 0.0
+        return (f"Rekaman landmark: {self.frames} frame ({self.detected} terdeteksi) di "
+                f"{len(self._chunk_counts)} chunk, {write_us:.0f} us/frame -> {self.path}")
+
+
+class LandmarkRecording:
+    """Baca rekaman LandmarkRecorder; semua chunk dibuka dengan mmap_mode='r' (tanpa load ke RAM)"""
+
+    def __init__(self, path):
+        with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Versi rekaman tidak didukung: {self.meta.get('version')}")
+        self.path = path
+        self.kind = self.meta['kind']
+        self.width = self.meta['width']
+        self.height = self.meta['height']
+        self.has_thumbnails = self.meta['thumbnail_size'] is not None
+
+        self.chunks = []
+        for index, count in enumerate(self.meta['chunks']):
+            chunk = {}
+            for field in _FIELDS:
+                filename = _chunk_file(path, field, index)
+                if os.path.exists(filename):
+                    chunk[field] = np.load(filename, mmap_mode='r')[:count]
+            self.chunks.append(chunk)
+
+    def __len__(self):
+        return self.meta['frames']
+
+    @property
+    def duration(self):
+        if not self.chunks or not len(self.chunks[-1]['timestamps']):
+            return 0.0
+        return float(self.chunks[-1]['timestamps'][-1])
+
+    def iter_chunks(self):
+        """Yield dict array per chunk: timestamps (F,), present (F,), landmarks (F, N, 3)[, thumbs]"""
+        yield from self.chunks
+
+    def arrays(self, fields=('timestamps', 'present', 'landmarks')):
+        """Gabungkan semua chunk menjadi array (T, ...) per field (disalin ke RAM)"""
+        return {field: np.concatenate([chunk[field] for chunk in self.chunks])
+                for field in fields}
+
+    def pixel_landmarks(self, chunk):
+        """Landmark (F, N, 3) chunk ini dalam pixel (z memakai skala x, seperti LandmarkArray)"""
+        scale = np.array([self.width, self.height, self.width], dtype=np.float32)
+        return chunk['landmarks'] * scale
+
+
+class ReplaySource:
+    """Sumber frame landmark dari rekaman, tanpa kamera dan tanpa MediaPipe.
+
+    frames() menghasilkan (timestamp, points) per frame: points adalah
+    array pixel (N, 3) di buffer yang dipakai ulang (seperti
+    LandmarkArray.update), atau None jika frame itu tidak ada deteksi.
+    results() membungkus landmark dalam objek mirip output FaceMesh/Hands
+    sehingga process_frame() controller bisa dipakai langsung.
+    """
+
+    def __init__(self, recording):
+        if isinstance(recording, str):
+            recording = LandmarkRecording(recording)
+        self.recording = recording
+        self.width = recording.width
+        self.height = recording.height
+        self._buffer = LandmarkArray(recording.meta['num_landmarks'])
+
+    def __len__(self):
+        return len(self.recording)
+
+    def frames(self):
+        for chunk in self.recording.iter_chunks():
+            timestamps, present, landmarks = chunk['timestamps'], chunk['present'], chunk['landmarks']
+            for row in range(len(timestamps)):
+                if present[row]:
+                    yield float(timestamps[row]), self._buffer.update(landmarks[row], self.width, self.height)
+                else:
+                    yield float(timestamps[row]), None
+
+    def results(self):
+        """Yield (timestamp, thumbnail atau None, results) dengan landmark ternormalisasi"""
+        attribute = 'multi_face_landmarks' if self.recording.kind == 'face' else 'multi_hand_landmarks'
+        for chunk in self.recording.iter_chunks():
+            thumbs = chunk.get('thumbs')
+            for row in range(len(chunk['timestamps'])):
+                detected = [np.asarray(chunk['landmarks'][row])] if chunk['present'][row] else None
+                thumb = thumbs[row] if thumbs is not None else None
+                yield float(chunk['timestamps'][row]), thumb, SimpleNamespace(**{attribute: detected})
+
+
+class ReplayClock:
+    """Pengganti modul time untuk controller saat replay: time() mengikuti timestamp rekaman.
+
+    Dipasang sebagai atribut `time` modul controller (seperti benchmark mengganti
+    cv2/os), sehingga logika berbasis waktu (dwell 2 s, double blink, hold
+    gesture) berjalan dengan waktu rekaman walau replay ribuan frame per detik.
+    """
+
+    def __init__(self, origin=None):
+        self.origin = time.time() if origin is None else origin
+        self.now = 0.0
+
+    def time(self):
+        return self.origin + self.now
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+# --- Target replay: fungsi fitur controller yang diberi makan landmark rekaman ---
+
+class _OutputCounter:
+    """Pengganti CursorDispatcher: hanya menghitung klik/gerakan"""
+
+    def __init__(self):
+        self.clicks = 0
+        self.moves = 0
+        self.latency_estimate = 0.0
+
+    def click(self, button='left'):
+        self.clicks += 1
+
+    def move_to(self, x, y):
+        self.moves += 1
+
+    def stop(self):
+        pass
+
+
+def _replace_cursor_output(controller):
+    controller.cursor_output.stop()
+    controller.cursor_output = _OutputCounter()
+    return controller.cursor_output
+
+
+def _head_rotation(controller, source, clock):
+    """get_rotation -> smooth_rotation -> determine_direction (3.py, metode rotation_method controller)"""
+    changes = 0
+    direction = "CENTER"
+    counts = dict.fromkeys(("LEFT", "RIGHT", "CENTER"), 0)
+    for timestamp, points in source.frames():
+        if points is None:
+            continue
+        # Sama seperti process_frame: frame tanpa rotasi (solvePnP gagal) dilewati
+        rotation = controller.get_rotation(points, source.width, source.height)
+        if rotation is None:
+            continue
+        new_direction = controller.determine_direction(controller.smooth_rotation(rotation))
+        counts[new_direction] += 1
+        if new_direction != direction:
+            changes += 1
+            direction = new_direction
+    return {'rotation_method': controller.rotation_method, 'direction_frames': counts,
+            'direction_changes': changes}
+
+
+def _dwell(controller, source, clock):
+    """get_forehead_point -> update_dwell_click dengan waktu rekaman (cursor.py)"""
+    output = _replace_cursor_output(controller)
+    for timestamp, points in source.frames():
+        clock.now = timestamp
+        forehead = controller.get_forehead_point(points)
+        if forehead is None:
+            # Sama seperti process_frame: wajah hilang mereset dwell
+            controller.dwell_start_time = None
+            controller.is_dwelling = False
+            controller.dwell_progress = 0.0
+            continue
+        controller.update_dwell_click(forehead)
+    return {'dwell_clicks': output.clicks}
+
+
+def _blink(controller, source, clock):
+    """get_eye_features -> detect_blink dengan waktu rekaman (eye.py)"""
+    output = _replace_cursor_output(controller)
+    # Klik double blink hanya di luar kalibrasi gaze; replay hanya menguji logika EAR
+    controller.calibration_mode = False
+    blinks = 0
+    for timestamp, points in source.frames():
+        clock.now = timestamp
+        if points is None:
+            continue
+        eye = controller.get_eye_features(points)
+        if eye is not None and controller.detect_blink(eye['left_ear'], eye['right_ear']):
+            blinks += 1
+    baseline = controller.baseline_ear
+    return {'blinks': blinks, 'double_blink_clicks': output.clicks,
+            'baseline_ear': round(float(baseline), 4) if baseline is not None else None}
+
+
+def _middle_finger(controller, source, clock):
+    """detect_middle_finger_gesture + hold required_hold_time dengan waktu rekaman (sleep.py)"""
+    gesture_frames = 0
+    triggers = 0
+    hold_start = None
+    triggered = False
+    for timestamp, points in source.frames():
+        if points is None or not controller.detect_middle_finger_gesture(points, source.height):
+            hold_start = None
+            triggered = False
+            continue
+        gesture_frames += 1
+        if hold_start is None:
+            hold_start = timestamp
+        # Seperti run_detection: satu aksi per hold, gesture harus dilepas sebelum trigger berikutnya
+        if not triggered and timestamp - hold_start >= controller.required_hold_time:
+            triggers += 1
+            triggered = True
+    return {'gesture_frames': gesture_frames, 'triggers': triggers}
+
+
+# target -> (controller, kind rekaman, kwargs constructor, fungsi replay)
+REPLAY_TARGETS = {
+    'head_rotation': ('head_rotation', 'face', {}, _head_rotation),
+    'dwell': ('forehead_cursor', 'face', {}, _dwell),
+    'blink': ('eye', 'face', {}, _blink),
+    'middle_finger': ('sleep_gesture', 'hand', {}, _middle_finger),
+}
+
+
+def replay(recording, target, params=None):
+    """Jalankan satu target replay di atas rekaman; params = atribut controller yang di-override"""
+    from controllers import CONTROLLERS, load_script_module
+    from event_log import EVENTS
+    from system_actions import ActionExecutor, stub_methods
+
+    if isinstance(recording, str):
+        recording = LandmarkRecording(recording)
+    controller_name, kind, kwargs, run = REPLAY_TARGETS[target]
+    if recording.kind != kind:
+        raise ValueError(f"Target {target} butuh rekaman {kind}, bukan {recording.kind}")
+    filename, class_name, _, _ = CONTROLLERS[controller_name]
+    module = load_script_module(filename)
+    if kind == 'hand':
+        kwargs = dict(kwargs, actions=ActionExecutor(stub_methods()))
+
+    # Profil kalibrasi sementara agar baseline EAR/titik tengah hasil replay tidak menimpa profil user
+    calibration_dir = tempfile.TemporaryDirectory()
+    real_calibration_path = os.environ.get('HEAD_CONTROL_CALIBRATION')
+    os.environ['HEAD_CONTROL_CALIBRATION'] = os.path.join(calibration_dir.name, 'calibration.json')
+    real_time = module.time
+    clock = module.time = ReplayClock()
+    console = EVENTS.console
+    EVENTS.console = None  # event klik/blink tetap ke file (jika ada), tidak ke console
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            controller = getattr(module, class_name)(None, **kwargs)
+        controller.profile_size = (recording.width, recording.height)
+        # Override hanya atribut yang dimiliki controller ini (--set bisa berlaku untuk beberapa target)
+        applied = {name: value for name, value in (params or {}).items() if hasattr(controller, name)}
+        for name, value in applied.items():
+            setattr(controller, name, value)
+
+        source = ReplaySource(recording)
+        start = time.perf_counter()
+        stats = run(controller, source, clock)
+        elapsed = time.perf_counter() - start
+        controller.metrics.close()
+        if kind == 'hand':
+            controller.actions.stop(wait=False)
+    finally:
+        module.time = real_time
+        EVENTS.flush()
+        EVENTS.console = console
+        if real_calibration_path is None:
+            os.environ.pop('HEAD_CONTROL_CALIBRATION', None)
+        else:
+            os.environ['HEAD_CONTROL_CALIBRATION'] = real_calibration_path
+        calibration_dir.cleanup()
+
+    stats.update({
+        'frames': len(recording),
+        'replay_fps': round(len(recording) / elapsed, 1) if elapsed > 0 else None,
+        'params': applied,
+    })
+    return stats
+
+
+def _record(args):
+    """Rekam landmark dari sumber frame dengan MediaPipe"""
+    import mediapipe as mp
+
+    from capture import ThreadedCapture
+
+    cap = ThreadedCapture(args.source if not args.source.isdigit() else int(args.source),
+                          width=640, height=480)
+    if args.kind == 'face':
+        model = mp.solutions.face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True,
+                                                min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    else:
+        model = mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.7,
+                                         min_tracking_confidence=0.5)
+    recorder = None
+    try:
+        while args.frames is None or recorder is None or recorder.frames < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            # Sama seperti controller: frame di-flip (mirror) sebelum inference
+            frame = cv2.flip(frame, 1)
+            if recorder is None:
+                recorder = LandmarkRecorder(args.output, args.kind, frame.shape[1], frame.shape[0],
+                                            args.chunk_frames, args.thumbnail)
+            results = model.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            # File video dibaca lebih cepat dari real time: --fps memberi timestamp index / fps
+            timestamp = recorder.frames / args.fps if args.fps else cap.last_timestamp
+            recorder.record_results(results, timestamp, frame)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        model.close()
+        cap.release()
+        if recorder is not None:
+            recorder.close()
+            print(recorder.summary())
+
+
+def parse_params(items):
+    """Opsi --set ATTR=VALUE (nilai JSON) menjadi dict override atribut controller"""
+    params = {}
+    for item in items or ():
+        name, _, value = item.partition('=')
+        params[name] = json.loads(value)
+    return params
+
+
+def main():
+    """Rekam landmark (dengan MediaPipe) atau replay rekaman ke fungsi fitur controller"""
+    parser = argparse.ArgumentParser(description="Rekam dan replay landmark wajah/tangan")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help="rekam landmark dari kamera/video")
+    record.add_argument('source', help="index kamera, file video, folder gambar, atau 'synthetic[:N]'")
+    record.add_argument('output', help="folder rekaman (baru)")
+    record.add_argument('--kind', choices=sorted(NUM_LANDMARKS), default='face')
+    record.add_argument('--frames', type=int, help="berhenti setelah N frame")
+    record.add_argument('--fps', type=float,
+                        help="timestamp frame = index / FPS (untuk file video; default timestamp capture)")
+    record.add_argument('--chunk-frames', type=int, default=1800, help="frame per chunk")
+    record.add_argument('--thumbnail', type=int, nargs=2, metavar=('W', 'H'),
+                        help="simpan thumbnail BGR berukuran W x H")
+
+    play = commands.add_parser('replay', help="replay rekaman ke fungsi fitur controller")
+    play.add_argument('recording', help="folder rekaman")
+    play.add_argument('--target', choices=sorted(REPLAY_TARGETS), action='append',
+                      help="target replay (default: semua yang cocok dengan jenis rekaman)")
+    play.add_argument('--set', action='append', metavar='ATTR=VALUE',
+                      help="override atribut controller, misal rotation_threshold=12 atau "
+                           "rotation_method=\"pnp\" (nilai JSON)")
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        _record(args)
+        return
+
+    from benchmark import install_output_stubs
+    install_output_stubs()
+    recording = LandmarkRecording(args.recording)
+    targets = args.target or [name for name, spec in REPLAY_TARGETS.items() if spec[1] == recording.kind]
+    params = parse_params(args.set)
+    print(f"Rekaman {recording.kind}: {len(recording)} frame, {recording.duration:.1f} s, "
+          f"{len(recording.chunks)} chunk")
+    applied = set()
+    for target in targets:
+        stats = replay(recording, target, params)
+        applied.update(stats['params'])
+        print(f"{target}: {json.dumps(stats)}")
+    unknown = sorted(set(params) - applied)
+    if unknown:
+        print(f"Peringatan: atribut tidak dimiliki target mana pun: {', '.join(unknown)}")
+
+
+if __name__ == "__main__":
+    main()
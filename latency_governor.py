@@ -0,0 +1,116 @@
+import time
+from collections import deque
+
+from event_log import EVENTS
+
+
+# Level beban (kumulatif): setiap level menambah satu penghematan
+LEVELS = (
+    "full",             # 0: semua fitur aktif
+    "skip_hud",         # 1: tidak menggambar HUD
+    "downscale",        # 2: + FaceMesh diberi frame yang diperkecil
+    "skip_inference",   # 3: + inference hanya setiap frame kedua
+)
+
+
+class LatencyGovernor:
+    """Jaga waktu proses per frame di bawah budget dengan menurunkan beban bertahap.
+
+    Waktu proses dirata-rata (EMA). Jika rata-rata melebihi budget selama
+    degrade_after frame berturut-turut, level naik satu; jika di bawah
+    budget * headroom selama recover_after frame, level turun satu.
+    Recovery sengaja lebih lambat dari degradasi agar level tidak bolak-balik.
+    """
+
+    def __init__(self, budget_ms=1000 / 30, downscale=0.5, degrade_after=5, recover_after=30,
+                 headroom=0.7, smoothing=0.2):
+        self.budget_ms = budget_ms
+        self.downscale = downscale  # Skala frame untuk FaceMesh di level >= 2
+        self.degrade_after = degrade_after
+        self.recover_after = recover_after
+        self.headroom = headroom
+        self.smoothing = smoothing
+
+        self.level = 0
+        self.avg_ms = None
+        self._over_budget = 0
+        self._under_budget = 0
+        self._frame_start = None
+        self.frame_index = 0
+
+        # Statistik
+        self.level_frames = [0] * len(LEVELS)
+        self.skipped_inferences = 0
+        self.level_changes = 0  # total sesi; decisions hanya menyimpan 100 terakhir
+        self.decisions = deque(maxlen=100)  # (frame, level lama, level baru, avg_ms)
+
+    @property
+    def draw_hud(self):
+        return self.level < 1
+
+    @property
+    def inference_scale(self):
+        return self.downscale if self.level >= 2 else 1.0
+
+    def should_infer(self):
+        """False untuk frame yang inference-nya dilewati (level 3, setiap frame kedua)"""
+        if self.level >= 3 and self.frame_index % 2 == 1:
+            self.skipped_inferences += 1
+            return False
+        return True
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """Catat waktu proses frame ini dan sesuaikan level"""
+        elapsed_ms = (time.perf_counter() - self._frame_start) * 1000
+        if self.avg_ms is None:
+            self.avg_ms = elapsed_ms
+        else:
+            self.avg_ms += self.smoothing * (elapsed_ms - self.avg_ms)
+
+        self.level_frames[self.level] += 1
+        self.frame_index += 1
+
+        if self.avg_ms > self.budget_ms:
+            self._over_budget += 1
+            self._under_budget = 0
+        elif self.avg_ms < self.budget_ms * self.headroom:
+            self._under_budget += 1
+            self._over_budget = 0
+        else:
+            self._over_budget = self._under_budget = 0
+
+        if self._over_budget >= self.degrade_after and self.level < len(LEVELS) - 1:
+            self._set_level(self.level + 1)
+        elif self._under_budget >= self.recover_after and self.level > 0:
+            self._set_level(self.level - 1)
+        return elapsed_ms
+
+    def _set_level(self, level):
+        self.level_changes += 1
+        self.decisions.append((self.frame_index, self.level, level, round(self.avg_ms, 2)))
+        EVENTS.emit('governor', f"⚙️ Governor: {LEVELS[self.level]} → {LEVELS[level]} "
+                    f"(avg {self.avg_ms:.1f} ms, budget {self.budget_ms:.1f} ms)",
+                    previous=LEVELS[self.level], level=LEVELS[level], avg_ms=round(self.avg_ms, 2),
+                    budget_ms=round(self.budget_ms, 2))
+        self.level = level
+        self._over_budget = self._under_budget = 0
+
+    def get_stats(self):
+        return {
+            'level': LEVELS[self.level],
+            'avg_ms': round(self.avg_ms, 2) if self.avg_ms is not None else 0.0,
+            'budget_ms': round(self.budget_ms, 2),
+            'level_frames': dict(zip(LEVELS, self.level_frames)),
+            'skipped_inferences': self.skipped_inferences,
+            'level_changes': self.level_changes,
+            'decisions': list(self.decisions),
+        }
+
+    def summary(self):
+        stats = self.get_stats()
+        frames = ", ".join(f"{name} {count}" for name, count in stats['level_frames'].items())
+        return (f"Governor: level {stats['level']}, {stats['level_changes']} perubahan, "
+                f"{stats['skipped_inferences']} inference dilewati, frame per level: {frames}")
@@ -0,0 +1,330 @@
+import argparse
+import bisect
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pipeline_trace import TRACER
+
+
+# Bucket latency stage (detik): sub-ms untuk fitur/output sampai 1 s untuk stall kamera
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+PREFIX = 'head_control_'
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    """Basis metric berlabel; anak per kombinasi label dibuat saat labels() pertama kali dipanggil"""
+
+    kind = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.label_names)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self.lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def _render_child(self, key, child):
+        yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+
+class _Buckets:
+    __slots__ = ('bounds', 'counts', 'sum', 'lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # + bucket +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Histogram bucket tetap; observe() = satu bisect + increment (~1 us)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=STAGE_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _Buckets(self.buckets)
+
+    def _render_child(self, key, child):
+        with child.lock:
+            counts, total = list(child.counts), child.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            labels = _format_labels(self.label_names, key, ('le', _format_value(bound)))
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.label_names, key)
+        yield f"{self.name}_sum{labels} {_format_value(total)}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Kumpulan metric proses ini, dirender dalam format teks Prometheus.
+
+    Selain metric yang di-update langsung, collector (fungsi tanpa argumen
+    yang mengembalikan dict get_stats()) dibaca hanya saat endpoint di-scrape,
+    sehingga statistik yang sudah ada (capture, cursor output, motion gate)
+    ikut diekspor tanpa biaya di hot path.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, label_names, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, label_names, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} sudah terdaftar sebagai {metric.kind}")
+        return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self._get(Counter, name, help_text, label_names)
+
+    def gauge(self, name, help_text, label_names=()):
+        return self._get(Gauge, name, help_text, label_names)
+
+    def histogram(self, name, help_text, label_names=(), buckets=STAGE_BUCKETS):
+        return self._get(Histogram, name, help_text, label_names, buckets=buckets)
+
+    def register_collector(self, source, labels, stats_fn):
+        """Ekspor nilai numerik stats_fn() sebagai gauge <PREFIX><source>_<key>{labels}"""
+        with self._lock:
+            self._collectors.append((source, dict(labels), stats_fn))
+
+    def unregister_collectors(self, **labels):
+        with self._lock:
+            self._collectors = [c for c in self._collectors
+                                if any(c[1].get(k) != str(v) for k, v in labels.items())]
+
+    def _collect(self):
+        samples = {}
+        with self._lock:
+            collectors = list(self._collectors)
+        for source, labels, stats_fn in collectors:
+            try:
+                stats = stats_fn()
+            except Exception:
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{PREFIX}{source}_{key}"
+                samples.setdefault(name, []).append((labels, value))
+        lines = []
+        for name, values in samples.items():
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in values:
+                lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return lines
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        lines.extend(self._collect())
+        return '\n'.join(lines) + '\n'
+
+
+# Satu registry per proses
+REGISTRY = MetricsRegistry()
+
+
+class PipelineMetrics:
+    """Metric per controller: waktu stage, frame, FPS dan aksi output.
+
+    Stage diukur sebagai lap: begin_frame() di awal loop, lalu mark(stage)
+    setelah setiap stage (capture, inference, features, render). Waktu
+    output() (dipanggil oleh kode yang mengirim aksi) dikurangkan dari lap
+    berikutnya sehingga stage tidak tumpang tindih.
+    """
+
+    def __init__(self, controller, capture=None, registry=None):
+        self.controller = controller
+        self.registry = registry or REGISTRY
+        labels = ('controller',)
+        self.stage_seconds = self.registry.histogram(
+            f'{PREFIX}stage_seconds', 'Waktu per stage pipeline per frame', ('controller', 'stage'))
+        self._frames = self.registry.counter(
+            f'{PREFIX}frames_total', 'Frame yang selesai diproses', labels).labels(controller)
+        self._fps = self.registry.gauge(
+            f'{PREFIX}fps', 'FPS loop (EMA)', labels).labels(controller)
+        self.actions = self.registry.counter(
+            f'{PREFIX}actions_total', 'Aksi output yang dikirim', ('controller', 'action'))
+        self._stages = {}
+        self._last = None
+        self._frame_start = None
+        self._excluded = 0.0
+        self.fps = 0.0
+        if capture is not None:
+            self.watch('capture', capture.get_stats)
+
+    def watch(self, source, stats_fn):
+        """Ekspor get_stats() sebuah komponen (dibaca saat scrape)"""
+        self.registry.register_collector(source, {'controller': self.controller}, stats_fn)
+
+    def _stage(self, stage):
+        child = self._stages.get(stage)
+        if child is None:
+            child = self._stages[stage] = self.stage_seconds.labels(self.controller, stage)
+        return child
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            interval = now - self._frame_start
+            if interval > 0:
+                self.fps += 0.1 * (1.0 / interval - self.fps)
+                self._fps.set(self.fps)
+        self._frame_start = self._last = now
+        self._excluded = 0.0
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        if self._last is not None:
+            self._stage(stage).observe(max(0.0, now - self._last - self._excluded))
+        self._last = now
+        self._excluded = 0.0
+
+    def output(self, action, start):
+        """Catat satu aksi output; start = perf_counter sebelum aksi dikirim"""
+        duration = time.perf_counter() - start
+        self._stage('output').observe(duration)
+        self._excluded += duration
+        self.actions.labels(self.controller, action).inc()
+        if TRACER.enabled:
+            TRACER.span_since('output:' + action, start)
+
+    def end_frame(self):
+        self._frames.inc()
+
+    def close(self):
+        """Lepas collector milik controller ini (misal sebelum capture dilepas)"""
+        self.registry.unregister_collectors(controller=self.controller)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrape berkala tidak perlu mengotori console
+        pass
+
+
+class MetricsServer:
+    """Endpoint HTTP lokal /metrics (format teks Prometheus) di thread background"""
+
+    def __init__(self, port=9108, host='127.0.0.1', registry=None):
+        handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry or REGISTRY})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.address = self.httpd.server_address
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def metrics_server_from_argv(argv=None):
+    """Ambil opsi --metrics-port; jika diberikan, jalankan MetricsServer. Kembalikan (server atau None, argumen sisanya)"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--metrics-port', type=int,
+                        help="sajikan metric Prometheus di http://127.0.0.1:<port>/metrics")
+    parser.add_argument('--metrics-host', default='127.0.0.1',
+                        help="alamat bind endpoint metric (default hanya lokal)")
+    args, remaining = parser.parse_known_args(argv)
+    if args.metrics_port is None:
+        return None, remaining
+    server = MetricsServer(args.metrics_port, args.metrics_host)
+    print(f"Metrics: http://{server.address[0]}:{server.address[1]}/metrics")
+    return server, remaining
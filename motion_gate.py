@@ -0,0 +1,145 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+
+def downscale_gray(frame, size):
+    """Frame BGR -> grayscale kecil.
+
+    INTER_LINEAR pada faktor 4 merata-rata 2x2 pixel (noise sensor ~setengah)
+    dan ~7x lebih murah dari INTER_AREA (~75 us vs ~530 us untuk 640x480).
+    """
+    return cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR), cv2.COLOR_BGR2GRAY)
+
+
+def changed_fraction(gray, reference, pixel_threshold):
+    """Fraksi pixel yang selisih gray-nya melebihi pixel_threshold"""
+    changed = cv2.absdiff(gray, reference) > pixel_threshold
+    return np.count_nonzero(changed) / changed.size
+
+
+class MotionGate:
+    """Lewati inference MediaPipe pada frame yang hampir sama dengan frame inference terakhir.
+
+    Setiap frame diperkecil ke grayscale `size` dan dibandingkan dengan
+    frame tempat inference terakhir dijalankan (bukan frame sebelumnya,
+    agar gerakan lambat tetap terakumulasi). Jika fraksi pixel berubah di
+    bawah motion_fraction, hasil inference terakhir dipakai ulang sehingga
+    landmark dan keputusan controller sama seperti frame sebelumnya.
+    Paling lama max_reuse frame berturut-turut dipakai ulang, lalu inference
+    dipaksa (forced refresh).
+
+    Default cukup sensitif untuk kedipan mata di 640x480 (mata ~40x15 px
+    menjadi ~10x4 px di 160x120, jauh di atas motion_fraction).
+    """
+
+    def __init__(self, enabled=True, size=(160, 120), pixel_threshold=8, motion_fraction=0.001,
+                 max_reuse=5):
+        self.enabled = enabled
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.motion_fraction = motion_fraction
+        self.max_reuse = max_reuse
+
+        self.results = None
+        self._reference = None
+        self._gray = None
+        self._reused = 0
+        self._inference_start = None
+
+        # Statistik
+        self.checks = 0
+        self.hits = 0          # Frame yang memakai ulang hasil terakhir
+        self.forced = 0        # Inference karena batas max_reuse
+        self.inferences = 0
+        self.gate_cpu = 0.0    # CPU untuk frame differencing
+        self.inference_cpu = 0.0
+
+    def should_infer(self, frame):
+        """True jika inference perlu dijalankan; jika False pakai self.results"""
+        if not self.enabled:
+            self._inference_start = time.process_time()
+            return True
+
+        # Biaya gate diukur per thread: process_time ikut menghitung thread capture
+        start = time.thread_time()
+        self.checks += 1
+        self._gray = downscale_gray(frame, self.size)
+        if self.results is None or self._reference is None:
+            infer = True
+        elif changed_fraction(self._gray, self._reference, self.pixel_threshold) >= self.motion_fraction:
+            infer = True
+        elif self._reused >= self.max_reuse:
+            self.forced += 1
+            infer = True
+        else:
+            infer = False
+
+        self.gate_cpu += time.thread_time() - start
+        if infer:
+            # Inference diukur dengan process_time karena graph MediaPipe punya thread sendiri
+            self._inference_start = time.process_time()
+        else:
+            self.hits += 1
+            self._reused += 1
+        return infer
+
+    def store(self, results):
+        """Simpan hasil inference baru sebagai acuan, kembalikan results apa adanya"""
+        if self._inference_start is not None:
+            self.inference_cpu += time.process_time() - self._inference_start
+            self._inference_start = None
+        self.inferences += 1
+        self.results = results
+        self._reference = self._gray
+        self._reused = 0
+        return results
+
+    def reset(self):
+        """Paksa inference di frame berikutnya (misal setelah kalibrasi ulang)"""
+        self.results = None
+        self._reference = None
+
+    def get_stats(self):
+        inference_ms = self.inference_cpu / self.inferences * 1000 if self.inferences else 0.0
+        gate_ms = self.gate_cpu / self.checks * 1000 if self.checks else 0.0
+        # CPU yang dihemat = inference yang dilewati dikali biaya rata-rata, dikurangi biaya gate
+        saved = self.hits * inference_ms / 1000 - self.gate_cpu
+        spent = self.inference_cpu + self.gate_cpu
+        return {
+            'enabled': self.enabled,
+            'checks': self.checks,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.checks if self.checks else 0.0,
+            'forced_refresh': self.forced,
+            'inferences': self.inferences,
+            'gate_ms': round(gate_ms, 3),
+            'inference_cpu_ms': round(inference_ms, 2),
+            'saved_cpu_s': round(saved, 3),
+            'saved_percent': round(saved / (spent + saved) * 100, 1) if spent + saved > 0 else 0.0,
+        }
+
+    def summary(self):
+        if not self.enabled:
+            return "Motion gate: nonaktif"
+        stats = self.get_stats()
+        return (f"Motion gate: hit rate {stats['hit_rate'] * 100:.1f}% ({stats['hits']}/{stats['checks']}, "
+                f"{stats['forced_refresh']} forced refresh), gate {stats['gate_ms']:.2f} ms/frame, "
+                f"hemat CPU ~{stats['saved_cpu_s']:.1f}s ({stats['saved_percent']:.0f}%)")
+
+
+def motion_gate_from_argv(argv=None):
+    """Ambil opsi motion gate dari command line, kembalikan (MotionGate, argumen sisanya)"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--no-motion-gate', action='store_true',
+                        help="jalankan inference di setiap frame walau scene diam")
+    parser.add_argument('--gate-threshold', type=float, default=0.001,
+                        help="fraksi pixel berubah minimal agar inference dijalankan")
+    parser.add_argument('--gate-max-reuse', type=int, default=5,
+                        help="maksimal frame berturut-turut yang memakai ulang landmark")
+    args, remaining = parser.parse_known_args(argv)
+    gate = MotionGate(not args.no_motion_gate, motion_fraction=args.gate_threshold,
+                      max_reuse=args.gate_max_reuse)
+    return gate, remaining
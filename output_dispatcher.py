@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from pipeline_trace import TRACER
+from startup import STARTUP
+
+
+class CursorDispatcher:
+    """Kirim gerakan dan klik mouse dari thread terpisah.
+
+    Loop vision cukup memanggil move_to()/click() yang langsung kembali.
+    Gerakan yang belum terkirim digabung menjadi target terbaru, klik selalu
+    diproses lebih dulu (di posisi saat klik diminta), dan posisi cursor
+    dilacak secara internal sehingga tidak perlu query ke OS setiap frame.
+    Jika metrics (PipelineMetrics) diberikan, setiap request dicatat sebagai
+    stage output dan statistik dispatcher ikut diekspor.
+    """
+
+    def __init__(self, backend=None, latency_window=500, metrics=None):
+        if backend is None:
+            import pyautogui as backend
+        self.backend = backend
+
+        self._cond = threading.Condition()
+        self._pending_move = None  # (x, y, waktu request)
+        self._pending_clicks = deque()  # (x, y, button, waktu request)
+        self._running = True
+
+        # Posisi internal: target terakhir yang diminta
+        x, y = backend.position()
+        self._position = (int(x), int(y))
+
+        # Statistik
+        self.moves_requested = 0
+        self.moves_sent = 0
+        self.moves_coalesced = 0
+        self.clicks_sent = 0
+        self.max_queue_depth = 0
+        self._latencies = deque(maxlen=latency_window)
+        self.latency_estimate = 0.0  # EMA latency request -> eksekusi (detik), untuk prediksi cursor
+
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.watch('cursor_output', self.get_stats)
+
+        self._thread = threading.Thread(target=self._worker, name="CursorDispatcher", daemon=True)
+        self._thread.start()
+
+    def move_to(self, x, y):
+        """Minta cursor pindah ke (x, y); request lama yang belum terkirim digantikan"""
+        STARTUP.mark('first_action')
+        requested = time.perf_counter()
+        with self._cond:
+            if self._pending_move is not None:
+                self.moves_coalesced += 1
+            self._pending_move = (int(x), int(y), requested)
+            self._position = (int(x), int(y))
+            self.moves_requested += 1
+            self._update_depth()
+            self._cond.notify()
+        if self.metrics is not None:
+            self.metrics.output('move', requested)
+
+    def click(self, button='left'):
+        """Minta klik di posisi cursor saat ini (diproses sebelum gerakan)"""
+        STARTUP.mark('first_action')
+        requested = time.perf_counter()
+        with self._cond:
+            x, y = self._position
+            self._pending_clicks.append((x, y, button, requested))
+            self._update_depth()
+            self._cond.notify()
+        if self.metrics is not None:
+            self.metrics.output('click', requested)
+
+    def position(self):
+        """Posisi cursor menurut tracking internal (tanpa query OS)"""
+        return self._position
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._pending_clicks) + (1 if self._pending_move is not None else 0)
+
+    def _update_depth(self):
+        depth = len(self._pending_clicks) + (1 if self._pending_move is not None else 0)
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def _worker(self):
+        """Thread output: klik dulu, lalu gerakan terbaru"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._pending_clicks or self._pending_move is not None or not self._running
+                )
+                if not self._running and not self._pending_clicks and self._pending_move is None:
+                    break
+
+                if self._pending_clicks:
+                    job = ('click',) + self._pending_clicks.popleft()
+                else:
+                    job = ('move',) + self._pending_move
+                    self._pending_move = None
+
+            send_start = TRACER.now()
+            try:
+                if job[0] == 'click':
+                    _, x, y, button, requested = job
+                    self.backend.click(x, y, button=button, _pause=False)
+                    self.clicks_sent += 1
+                else:
+                    _, x, y, requested = job
+                    self.backend.moveTo(x, y, _pause=False)
+                    self.moves_sent += 1
+                TRACER.span('cursor.' + job[0], send_start)
+                latency = time.perf_counter() - requested
+                self._latencies.append(latency)
+                self.latency_estimate += 0.1 * (latency - self.latency_estimate)
+            except Exception as e:
+                print(f"Cursor output error: {e}")
+
+    def get_stats(self):
+        latencies = np.asarray(self._latencies, dtype=np.float64) * 1000
+        return {
+            'queue_depth': self.queue_depth(),
+            'max_queue_depth': self.max_queue_depth,
+            'moves_requested': self.moves_requested,
+            'moves_sent': self.moves_sent,
+            'moves_coalesced': self.moves_coalesced,
+            'clicks_sent': self.clicks_sent,
+            'latency_mean_ms': float(latencies.mean()) if latencies.size else 0.0,
+            'latency_p95_ms': float(np.percentile(latencies, 95)) if latencies.size else 0.0,
+            'latency_max_ms': float(latencies.max()) if latencies.size else 0.0,
+        }
+
+    def summary(self):
+        """Ringkasan satu baris statistik output"""
+        stats = self.get_stats()
+        return (f"Cursor output: {stats['moves_sent']}/{stats['moves_requested']} moves sent "
+                f"({stats['moves_coalesced']} coalesced), {stats['clicks_sent']} clicks, "
+                f"latency p95 {stats['latency_p95_ms']:.1f} ms")
+
+    def stop(self):
+        """Kirim sisa antrian lalu hentikan thread"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
@@ -0,0 +1,173 @@
+import argparse
+import itertools
+import json
+import os
+import threading
+import time
+
+
+# Tombol di window OpenCV untuk menulis snapshot trace tanpa keluar
+EXPORT_KEY = ord('x')
+
+
+class PipelineTracer:
+    """Span per stage pipeline (read, flip, cvtColor, process, ...) untuk Perfetto/chrome://tracing.
+
+    Span dicatat sebagai rantai lap: t = TRACER.span('read', t) menyimpan
+    span dari t sampai sekarang dan mengembalikan waktu sekarang sebagai awal
+    span berikutnya. Waktu memakai perf_counter_ns (clock yang sama dengan
+    perf_counter). Buffer berisi `capacity` slot yang dialokasikan di awal;
+    setiap span hanya menimpa satu slot dengan tuple (nama, awal, akhir,
+    thread, frame), sehingga saat buffer berputar yang tersisa adalah span
+    terbaru. Saat nonaktif now()/span() langsung mengembalikan 0.
+    """
+
+    def __init__(self, capacity=200000):
+        self.enabled = False
+        self.path = None
+        self.capacity = capacity
+        self._buffer = [None] * capacity
+        self._index = itertools.count()
+        self.frame = 0
+        self.exports = 0
+        # Nama thread dicatat saat span pertama; thread capture/output bisa sudah selesai saat export
+        self._thread_names = {}
+
+    def configure(self, path, capacity=None):
+        """Aktifkan tracing; trace ditulis ke path saat export()"""
+        if capacity is not None and capacity != self.capacity:
+            self.capacity = capacity
+            self._buffer = [None] * capacity
+        self._index = itertools.count()
+        self.path = path
+        self.enabled = path is not None
+        return self
+
+    def now(self):
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def span(self, name, start):
+        """Catat span name dari start (ns) sampai sekarang, kembalikan waktu sekarang"""
+        if not self.enabled:
+            return 0
+        end = time.perf_counter_ns()
+        tid = threading.get_native_id()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        self._buffer[next(self._index) % self.capacity] = (name, start, end, tid, self.frame)
+        return end
+
+    def span_since(self, name, start_seconds):
+        """Seperti span() dengan start dari time.perf_counter() (detik)"""
+        if self.enabled:
+            self.span(name, int(start_seconds * 1e9))
+
+    def begin_frame(self):
+        """Awal iterasi loop controller: naikkan nomor frame, kembalikan waktu mulai"""
+        self.frame += 1
+        return self.now()
+
+    def end_frame(self, start):
+        """Span 'frame' yang membungkus semua stage satu iterasi"""
+        return self.span('frame', start)
+
+    def handle_key(self, key):
+        """Tulis snapshot trace jika tombol export ditekan.
+
+        Buffer disalin di sini, serialisasi JSON (bisa >1 s untuk buffer
+        penuh) berjalan di thread terpisah agar loop tidak berhenti.
+        """
+        if key == EXPORT_KEY and self.enabled:
+            spans = self._snapshot()
+            threading.Thread(target=self.export, args=(None, spans), name="TraceExport",
+                             daemon=True).start()
+
+    def _snapshot(self):
+        # Baca posisi tulis lalu lanjutkan counter dari posisi yang sama
+        count = next(self._index)
+        self._index = itertools.count(count)
+        if count <= self.capacity:
+            return [span for span in self._buffer[:count] if span is not None]
+        head = count % self.capacity
+        return [span for span in self._buffer[head:] + self._buffer[:head] if span is not None]
+
+    def to_chrome_trace(self, spans=None):
+        """Dict trace-event JSON (format 'X' complete event) dari span di buffer"""
+        if spans is None:
+            spans = self._snapshot()
+        pid = os.getpid()
+        origin = min((span[1] for span in spans), default=0)
+        events = []
+        seen_threads = set()
+        for name, start, end, tid, frame in sorted(spans, key=lambda span: span[1]):
+            seen_threads.add(tid)
+            events.append({
+                'name': name, 'cat': 'pipeline', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': (start - origin) / 1000.0, 'dur': max(0, end - start) / 1000.0,
+                'args': {'frame': frame},
+            })
+
+        # Nama thread agar loop vision, capture dan output mudah dibedakan di Perfetto
+        for tid in sorted(seen_threads):
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': self._thread_names.get(tid, f"thread-{tid}")}})
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                       'args': {'name': 'head_control'}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path=None, spans=None):
+        """Tulis trace ke file JSON; buka di https://ui.perfetto.dev atau chrome://tracing"""
+        path = path or self.path
+        trace = self.to_chrome_trace(spans)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f)
+        self.exports += 1
+        spans = sum(1 for event in trace['traceEvents'] if event['ph'] == 'X')
+        print(f"Trace: {spans} span ditulis ke {path}")
+        return path
+
+
+# Satu tracer per proses; diaktifkan oleh trace_from_argv()
+TRACER = PipelineTracer()
+
+
+def trace_from_argv(argv=None):
+    """Ambil opsi --trace PATH dari command line, kembalikan (TRACER, argumen sisanya)"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--trace', metavar='PATH',
+                        help="rekam span per stage dan tulis trace Chrome/Perfetto ke PATH saat keluar "
+                             "(tekan 'x' untuk snapshot)")
+    parser.add_argument('--trace-capacity', type=int, default=200000,
+                        help="jumlah span terakhir yang disimpan")
+    args, remaining = parser.parse_known_args(argv)
+    TRACER.configure(args.trace, args.trace_capacity)
+    return TRACER, remaining
+
+
+def main():
+    """Ukur overhead span per frame (aktif vs nonaktif)"""
+    parser = argparse.ArgumentParser(description="Benchmark overhead span pipeline")
+    parser.add_argument('--frames', type=int, default=50000, help="jumlah frame simulasi")
+    args = parser.parse_args()
+
+    stages = ('read', 'flip', 'cvtColor', 'process', 'features', 'draw', 'imshow', 'waitKey')
+    tracer = PipelineTracer(capacity=100000)
+    for enabled in (False, True):
+        tracer.configure('pipeline_trace_benchmark.json' if enabled else None)
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            frame_start = t = tracer.begin_frame()
+            for stage in stages:
+                t = tracer.span(stage, t)
+            tracer.end_frame(frame_start)
+        per_frame = (time.perf_counter() - start) / args.frames * 1e6
+        print(f"Tracing {'aktif   ' if enabled else 'nonaktif'}: {per_frame:6.2f} us/frame "
+              f"({len(stages) + 1} span)")
+    start = time.perf_counter()
+    tracer.export()
+    print(f"Export {min(tracer.capacity, args.frames * (len(stages) + 1))} span: "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import numpy as np
+
+
+class RingBuffer:
+    """History berkapasitas tetap di atas array NumPy dengan running sum.
+
+    append() O(1) tanpa alokasi: nilai tertua ditimpa dan dikurangkan dari
+    running sum / sum kuadrat, sehingga mean() dan var() tidak perlu
+    mereduksi ulang seluruh isi. Sum dihitung ulang penuh setiap kali
+    buffer berputar satu kali agar error floating point tidak menumpuk.
+    width=None untuk nilai skalar, width=k untuk vektor (misal titik (x, y)).
+    Untuk skalar running sum disimpan sebagai float Python karena operasi
+    ufunc NumPy pada array 0-d justru lebih mahal dari penjumlahan biasa.
+    """
+
+    def __init__(self, capacity, width=None, dtype=np.float64):
+        shape = (capacity,) if width is None else (capacity, width)
+        self.capacity = capacity
+        self._scalar = width is None
+        self._data = np.zeros(shape, dtype=dtype)
+        self._head = 0  # Index tulis berikutnya
+        self.count = 0
+        self.clear()
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def full(self):
+        return self.count == self.capacity
+
+    def clear(self):
+        self._head = 0
+        self.count = 0
+        if self._scalar:
+            self._sum = 0.0
+            self._sum_sq = 0.0
+        else:
+            self._sum = np.zeros(self._data.shape[1:], dtype=np.float64)
+            self._sum_sq = np.zeros(self._data.shape[1:], dtype=np.float64)
+
+    def append(self, value):
+        if self._scalar:
+            self._append_scalar(value)
+        else:
+            self._append_vector(value)
+
+        self._head += 1
+        if self._head == self.capacity:
+            self._head = 0
+            self._resync()
+
+    def _append_scalar(self, value):
+        if self.count == self.capacity:
+            old = self._data.item(self._head)
+            self._sum -= old
+            self._sum_sq -= old * old
+        else:
+            self.count += 1
+        self._data[self._head] = value
+        new = self._data.item(self._head)
+        self._sum += new
+        self._sum_sq += new * new
+
+    def _append_vector(self, value):
+        if self.count == self.capacity:
+            old = self._data[self._head]
+            self._sum -= old
+            self._sum_sq -= np.square(old, dtype=np.float64)
+        else:
+            self.count += 1
+
+        self._data[self._head] = value
+        new = self._data[self._head]
+        self._sum += new
+        self._sum_sq += np.square(new, dtype=np.float64)
+
+    def _resync(self):
+        """Hitung ulang running sum dari data (sekali per putaran)"""
+        if self._scalar:
+            data = self._data[:self.count].tolist()
+            self._sum = float(sum(data))
+            self._sum_sq = float(sum(v * v for v in data))
+        else:
+            data = self._data[:self.count].astype(np.float64)
+            self._sum[...] = data.sum(axis=0)
+            self._sum_sq[...] = (data * data).sum(axis=0)
+
+    def sum(self):
+        return self._sum if self._scalar else self._sum.copy()
+
+    def mean(self):
+        if self.count == 0:
+            raise ValueError("RingBuffer kosong")
+        return self._sum / self.count
+
+    def var(self):
+        if self.count == 0:
+            raise ValueError("RingBuffer kosong")
+        mean = self._sum / self.count
+        if self._scalar:
+            return max(self._sum_sq / self.count - mean * mean, 0.0)
+        return np.maximum(self._sum_sq / self.count - mean * mean, 0.0)
+
+    def std(self):
+        return np.sqrt(self.var())
+
+    def latest(self):
+        """Nilai terakhir yang di-append"""
+        if self.count == 0:
+            raise ValueError("RingBuffer kosong")
+        return self._data[self._head - 1]
+
+    def weighted_mean(self, weights):
+        """Rata-rata berbobot; weights urut dari terlama ke terbaru, panjang == len(self)"""
+        if len(weights) != self.count:
+            raise ValueError(f"Butuh {self.count} bobot, dapat {len(weights)}")
+        if self._scalar:
+            # Window kecil: list Python lebih cepat dari np.dot pada array pendek
+            data = self._data.tolist()
+            ordered = data[self._head:] + data[:self._head] if self.full else data[:self.count]
+            return sum(w * v for w, v in zip(weights, ordered)) / sum(weights)
+        weights = np.asarray(weights, dtype=np.float64)
+        if self.full and self._head:
+            # Dua segmen (view, tanpa copy): [head:] terlama, [:head] terbaru
+            split = self.capacity - self._head
+            total = np.dot(weights[:split], self._data[self._head:]) + \
+                np.dot(weights[split:], self._data[:self._head])
+        else:
+            total = np.dot(weights, self._data[:self.count])
+        return total / weights.sum()
+
+    def __iter__(self):
+        """Iterasi dari nilai terlama ke terbaru"""
+        start = self._head if self.full else 0
+        for i in range(self.count):
+            yield self._data[(start + i) % self.capacity]
+
+    def values(self):
+        """Salinan isi buffer berurutan (terlama -> terbaru)"""
+        if self.full:
+            return np.concatenate((self._data[self._head:], self._data[:self._head]))
+        return self._data[:self.count].copy()
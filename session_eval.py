@@ -0,0 +1,323 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import time
+
+import numpy as np
+
+from landmark_recording import LandmarkRecording, ReplaySource, parse_params
+
+
+DIRECTIONS = ("LEFT", "CENTER", "RIGHT")
+LABELS_FILE = 'labels.csv'
+# Perintah/gesture yang bertahan lebih singkat dari ini dihitung sebagai flapping
+FLAP_WINDOW = 0.5
+
+
+def load_controller(name, params=None, **kwargs):
+    """Buat controller tanpa kamera/model (source=None) dan terapkan override atribut"""
+    from controllers import CONTROLLERS, load_script_module
+    from system_actions import ActionExecutor, stub_methods
+
+    filename, class_name, _, _ = CONTROLLERS[name]
+    module = load_script_module(filename)
+    if name in ('sleep_gesture', 'shutdown_gesture'):
+        kwargs.setdefault('actions', ActionExecutor(stub_methods()))
+    with contextlib.redirect_stdout(io.StringIO()):
+        controller = getattr(module, class_name)(None, **kwargs)
+    controller.metrics.close()
+    if getattr(controller, 'actions', None) is not None:
+        controller.actions.stop(wait=False)
+    # Override hanya atribut yang dimiliki controller ini (rekaman wajah dan tangan bisa dicampur)
+    for attribute, value in (params or {}).items():
+        if hasattr(controller, attribute):
+            setattr(controller, attribute, value)
+    return controller
+
+
+def load_labels(path):
+    """Ground truth CSV dengan kolom start,end,label (detik pada timeline rekaman)"""
+    with open(path, newline='', encoding='utf-8') as f:
+        return [(float(row['start']), float(row['end']), row['label'].strip())
+                for row in csv.DictReader(f)]
+
+
+def label_frames(timestamps, labels, default):
+    """Label ground truth per frame; frame di luar semua interval = default"""
+    frames = np.full(len(timestamps), default, dtype=object)
+    for start, end, label in labels:
+        frames[(timestamps >= start) & (timestamps < end)] = label
+    return frames.astype(str)
+
+
+def _runs(mask):
+    """Index awal dan akhir (eksklusif) setiap run True berturut-turut"""
+    edges = np.diff(np.concatenate([[False], mask, [False]]).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _flapping(durations, duration_s, flap_window):
+    flaps = int(np.count_nonzero(durations < flap_window))
+    return {
+        'flaps': flaps,
+        'flap_rate': round(flaps / len(durations), 4) if len(durations) else 0.0,
+        'flaps_per_min': round(flaps / duration_s * 60, 2) if duration_s > 0 else 0.0,
+    }
+
+
+def _agreement(truth, predicted, classes):
+    confusion = {actual: {guess: int(np.count_nonzero((truth == actual) & (predicted == guess)))
+                          for guess in classes} for actual in classes}
+    return {
+        'frame_agreement': round(float(np.mean(truth == predicted)), 4) if len(truth) else None,
+        'confusion': confusion,
+    }
+
+
+# --- Sesi wajah: rotasi kepala (3.py) ---
+
+def rotation_session(recording, controller):
+    """Rotasi, rotasi smooth dan arah untuk semua frame terdeteksi dalam rekaman.
+
+    Metode rotasi mengikuti controller.rotation_method (sama dengan controller
+    live): 'heuristic' memakai calculate_head_rotation_batch (vektor); 'pnp'
+    memakai HeadPoseEstimator per frame karena solvePnP dengan warm start
+    bergantung pada frame sebelumnya.
+    """
+    from controllers import CONTROLLERS, load_script_module
+
+    rotation_landmarks = load_script_module(CONTROLLERS['head_rotation'][0]).ROTATION_LANDMARKS
+    timestamps, rotations = [], []
+    scale = np.array([recording.width, recording.height, recording.width], dtype=np.float32)
+    for chunk in recording.iter_chunks():
+        present = np.asarray(chunk['present'])
+        if controller.rotation_method == 'heuristic':
+            # Hanya 6 landmark rotasi yang dibaca dari memmap dan diubah ke pixel
+            points = chunk['landmarks'][:, rotation_landmarks][present] * scale
+            values = controller.calculate_head_rotation_batch(points, np.arange(len(rotation_landmarks)))
+        else:
+            points = chunk['landmarks'][present] * scale
+            values = np.full(len(points), np.nan)
+            for i, frame_points in enumerate(points):
+                angles = controller.head_pose.estimate(frame_points, recording.width, recording.height)
+                if angles:
+                    values[i] = angles[0]
+        timestamps.append(chunk['timestamps'][present])
+        rotations.append(values)
+
+    timestamps = np.concatenate(timestamps) if timestamps else np.zeros(0)
+    rotations = np.concatenate(rotations) if rotations else np.zeros(0)
+    # Seperti process_frame: frame tanpa rotasi (solvePnP gagal) tidak masuk history
+    valid = np.isfinite(rotations)
+    timestamps, rotations = timestamps[valid], rotations[valid]
+    smoothed = controller.smooth_rotation_batch(rotations)
+    return {
+        'rotation_method': controller.rotation_method,
+        'timestamps': timestamps,
+        'rotation': rotations,
+        'smoothed': smoothed,
+        'direction': controller.determine_direction_batch(smoothed),
+    }
+
+
+def direction_report(session, duration_s, labels=None, flap_window=FLAP_WINDOW):
+    """Jumlah perintah (seperti send_control_command), flapping dan kesesuaian ground truth"""
+    timestamps, direction = session['timestamps'], session['direction']
+    # send_control_command: perintah dikirim saat arah berbeda dari perintah terakhir (awal CENTER)
+    previous = np.concatenate([["CENTER"], direction[:-1]])
+    changes = np.flatnonzero(direction != previous)
+    commands = {name: int(np.count_nonzero(direction[changes] == name)) for name in DIRECTIONS}
+
+    # Lama tiap perintah bertahan sampai perintah berikutnya (perintah terakhir tidak dihitung)
+    held = np.diff(timestamps[changes])
+    report = {
+        'frames': len(direction),
+        'direction_frames': {name: int(np.count_nonzero(direction == name)) for name in DIRECTIONS},
+        'events': len(changes),
+        'commands': commands,
+    }
+    report.update(_flapping(held, duration_s, flap_window))
+
+    if labels is not None:
+        truth = label_frames(timestamps, labels, "CENTER")
+        report.update(_agreement(truth, direction, DIRECTIONS))
+        # Interval non-CENTER yang sempat dikenali, dan perintah yang tidak sesuai ground truth
+        intervals = [(start, end, label) for start, end, label in labels if label != "CENTER"]
+        detected = sum(
+            bool(np.any(direction[(timestamps >= start) & (timestamps < end)] == label))
+            for start, end, label in intervals)
+        report['truth_events'] = len(intervals)
+        report['truth_detected'] = detected
+        report['false_events'] = int(np.count_nonzero(direction[changes] != truth[changes]))
+    return report
+
+
+# --- Sesi tangan: gesture jari tengah (sleep.py / shutdown.py) ---
+
+def gesture_session(recording, controller):
+    """Label gesture per frame (False jika tangan tidak terdeteksi) untuk seluruh rekaman"""
+    timestamps, gestures = [], []
+    scale = np.array([recording.width, recording.height, recording.width], dtype=np.float32)
+    for chunk in recording.iter_chunks():
+        present = np.asarray(chunk['present'])
+        labels = np.zeros(len(present), dtype=bool)
+        points = chunk['landmarks'][present] * scale
+        labels[present] = controller.detect_middle_finger_gesture_batch(points, recording.height)
+        timestamps.append(np.asarray(chunk['timestamps']))
+        gestures.append(labels)
+    return {
+        'timestamps': np.concatenate(timestamps) if timestamps else np.zeros(0),
+        'gesture': np.concatenate(gestures) if gestures else np.zeros(0, dtype=bool),
+    }
+
+
+def gesture_report(session, controller, duration_s, labels=None, flap_window=FLAP_WINDOW):
+    """Onset, trigger (hold >= required_hold_time, satu per hold), flapping dan ground truth"""
+    timestamps, gesture = session['timestamps'], session['gesture']
+    starts, ends = _runs(gesture)
+    held = timestamps[ends - 1] - timestamps[starts] if len(starts) else np.zeros(0)
+    triggered = held >= controller.required_hold_time
+    # Waktu trigger: frame pertama dalam run yang sudah ditahan required_hold_time
+    trigger_index = np.minimum(
+        np.searchsorted(timestamps, timestamps[starts[triggered]] + controller.required_hold_time),
+        ends[triggered] - 1)
+    report = {
+        'frames': len(gesture),
+        'gesture_frames': int(np.count_nonzero(gesture)),
+        'events': len(starts),
+        'triggers': int(np.count_nonzero(triggered)),
+    }
+    report.update(_flapping(held, duration_s, flap_window))
+
+    if labels is not None:
+        truth = label_frames(timestamps, labels, "none") == 'middle_finger'
+        report.update(_agreement(truth, gesture, (True, False)))
+        report['confusion'] = {str(actual): {str(guess): count for guess, count in row.items()}
+                               for actual, row in report['confusion'].items()}
+        intervals = [(start, end) for start, end, label in labels if label == 'middle_finger']
+        trigger_times = timestamps[trigger_index]
+        report['truth_events'] = len(intervals)
+        report['truth_detected'] = sum(
+            bool(np.any((trigger_times >= start) & (trigger_times < end))) for start, end in intervals)
+        report['false_events'] = int(np.count_nonzero(~truth[trigger_index]))
+    return report
+
+
+def scalar_check(recording, kind, params, session):
+    """Bandingkan hasil batch dengan method skalar controller per frame; kembalikan (kesesuaian, detik)"""
+    source = ReplaySource(recording)
+    if kind == 'face':
+        controller = load_controller('head_rotation', params, rotation_method=session['rotation_method'])
+        start = time.perf_counter()
+        directions = []
+        for _, points in source.frames():
+            if points is None:
+                continue
+            rotation = controller.get_rotation(points, source.width, source.height)
+            if rotation is not None:
+                directions.append(controller.determine_direction(controller.smooth_rotation(rotation)))
+        agreement = np.mean(np.array(directions) == session['direction']) if directions else 1.0
+    else:
+        controller = load_controller('sleep_gesture', params)
+        start = time.perf_counter()
+        gestures = [points is not None and controller.detect_middle_finger_gesture(points, source.height)
+                    for _, points in source.frames()]
+        agreement = np.mean(np.array(gestures) == session['gesture']) if gestures else 1.0
+    return float(agreement), time.perf_counter() - start
+
+
+def evaluate(path, params=None, labels_path=None, rotation=None, flap_window=FLAP_WINDOW,
+             check=False):
+    """Evaluasi satu rekaman; kembalikan dict laporan.
+
+    rotation=None memakai rotation_method default controller (seperti 3.py live).
+    """
+    recording = LandmarkRecording(path)
+    labels_path = labels_path or os.path.join(path, LABELS_FILE)
+    labels = load_labels(labels_path) if os.path.exists(labels_path) else None
+
+    if recording.kind == 'face':
+        kwargs = {'rotation_method': rotation} if rotation else {}
+        controller = load_controller('head_rotation', params, **kwargs)
+        start = time.perf_counter()
+        session = rotation_session(recording, controller)
+        report = direction_report(session, recording.duration, labels, flap_window)
+        report['rotation_method'] = session['rotation_method']
+    else:
+        controller = load_controller('sleep_gesture', params)
+        start = time.perf_counter()
+        session = gesture_session(recording, controller)
+        report = gesture_report(session, controller, recording.duration, labels, flap_window)
+    elapsed = time.perf_counter() - start
+
+    report = dict({'recording': path, 'kind': recording.kind, 'duration_s': round(recording.duration, 2),
+                   'labels': labels_path if labels is not None else None}, **report)
+    report['eval_fps'] = round(len(recording) / elapsed, 1) if elapsed > 0 else None
+    if check:
+        agreement, scalar_s = scalar_check(recording, recording.kind, params, session)
+        report['scalar_agreement'] = round(agreement, 6)
+        report['scalar_fps'] = round(len(recording) / scalar_s, 1) if scalar_s > 0 else None
+    return report
+
+
+def _print_report(report):
+    print(f"== {report['recording']} ({report['kind']}, {report['frames']} frame dievaluasi, "
+          f"{report['duration_s']:.1f} s, {report['eval_fps']:.0f} frame/s)")
+    if report['kind'] == 'face':
+        print(f"  metode rotasi  : {report['rotation_method']}")
+        print(f"  arah per frame : {report['direction_frames']}")
+        print(f"  perintah       : {report['events']} {report['commands']}")
+    else:
+        print(f"  gesture        : {report['gesture_frames']} frame, {report['events']} onset, "
+              f"{report['triggers']} trigger")
+    print(f"  flapping       : {report['flaps']} ({report['flap_rate'] * 100:.1f}% event, "
+          f"{report['flaps_per_min']:.2f}/menit)")
+    if report['labels']:
+        print(f"  ground truth   : kesesuaian frame {report['frame_agreement'] * 100:.2f}%, "
+              f"{report['truth_detected']}/{report['truth_events']} event terdeteksi, "
+              f"{report['false_events']} event salah")
+        print(f"  confusion      : {report['confusion']}")
+    if 'scalar_agreement' in report:
+        print(f"  cek skalar     : kesesuaian {report['scalar_agreement'] * 100:.2f}%, "
+              f"{report['scalar_fps']:.0f} frame/s (batch {report['eval_fps'] / report['scalar_fps']:.0f}x)")
+
+
+def main():
+    """Evaluasi offline keputusan arah/gesture untuk rekaman landmark (landmark_recording.py)"""
+    parser = argparse.ArgumentParser(description="Evaluasi offline rekaman landmark: event, flapping, "
+                                                 "kesesuaian dengan ground truth")
+    parser.add_argument('recordings', nargs='+', help="folder rekaman landmark")
+    parser.add_argument('--labels', help="CSV start,end,label (default: labels.csv di folder rekaman)")
+    parser.add_argument('--rotation', choices=('heuristic', 'pnp'),
+                        help="estimasi rotasi untuk rekaman wajah (default: rotation_method default "
+                             "controller; pnp tidak divektorisasi)")
+    parser.add_argument('--set', action='append', metavar='ATTR=VALUE',
+                        help="override atribut controller, misal rotation_threshold=12 (nilai JSON)")
+    parser.add_argument('--flap-window', type=float, default=FLAP_WINDOW,
+                        help="perintah/gesture lebih singkat dari ini (detik) dihitung flapping")
+    parser.add_argument('--check', action='store_true',
+                        help="bandingkan dengan method skalar per frame (kesesuaian dan kecepatan)")
+    parser.add_argument('--json', help="tulis semua laporan ke file JSON ini")
+    args = parser.parse_args()
+    if args.labels and len(args.recordings) > 1:
+        parser.error("--labels hanya untuk satu rekaman; simpan labels.csv di folder tiap rekaman")
+
+    from benchmark import install_output_stubs
+    install_output_stubs()
+    params = parse_params(args.set)
+
+    reports = []
+    for path in args.recordings:
+        report = evaluate(path, params, args.labels, args.rotation, args.flap_window, args.check)
+        _print_report(report)
+        reports.append(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,137 +1,171 @@
 import cv2
-import mediapipe as mp
 import numpy as np
-import os
-import platform
 import time
 
+from capture import ThreadedCapture
+from duty_cycle import IDLE_RESULTS, DutyCycle, duty_cycle_from_argv
+from frame_sources import source_from_argv
+from gesture_rules import GestureRuleEngine
+from inference_worker import InferenceWorker, inference_worker_from_argv
+from landmark_array import HAND_CONNECTIONS, HAND_LANDMARKS, LandmarkArray
+from metrics import PipelineMetrics, metrics_server_from_argv
+from motion_gate import MotionGate, motion_gate_from_argv
+from pipeline_trace import TRACER, trace_from_argv
+from startup import STARTUP, lazy_import, parallel_startup
+from system_actions import ActionExecutor, action_executor_from_argv
+
+# Imported when Hands is built (in parallel with opening the camera)
+mp = lazy_import('mediapipe')
+
 class HandGestureDetector:
-    def __init__(self):
-        # Initialize MediaPipe hands
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.5
-        )
-        self.mp_draw = mp.solutions.drawing_utils
+    def __init__(self, source=0, duty_cycle=None, motion_gate=None, actions=None, worker=False):
+        # Sumber frame: index kamera, file video, folder gambar, atau 'synthetic'
+        self.source = source
+        
+        # worker=True: Hands runs in a separate process (InferenceWorker), mediapipe is never imported here
+        self.use_worker = worker
+        
+        # source=None: no camera or Hands (e.g. landmark replay feeds detect_gestures directly)
+        self.cap, self.hands = None, None
+        if source is not None:
+            # Open the camera while mediapipe loads and Hands is built and warmed up
+            self.cap, self.hands = parallel_startup(
+                lambda: ThreadedCapture(source, width=640, height=480), self.create_hands)
+        
+        # Low-power idle mode: motion-gated Hands at a few FPS until a hand shows up
+        self.duty_cycle = duty_cycle or DutyCycle()
+        
+        # While active, static frames reuse the previous Hands result
+        self.motion_gate = motion_gate or MotionGate()
+        
+        # Per-stage metrics (served over HTTP when --metrics-port is given)
+        self.metrics = PipelineMetrics('shutdown_gesture', self.cap)
+        self.metrics.watch('duty_cycle', self.duty_cycle.get_stats)
+        self.metrics.watch('motion_gate', self.motion_gate.get_stats)
+        
+        # OS actions run in a background thread; the shutdown method is probed once here
+        self.actions = actions or ActionExecutor()
+        
+        # Reusable (21, 3) landmark buffer
+        self.landmark_array = LandmarkArray(HAND_LANDMARKS)
+        
+        # Declarative gesture rules (gesture_rules.GESTURES), compiled once and evaluated together
+        self.gesture_engine = GestureRuleEngine()
+        self.trigger_gesture = 'middle_finger'
+        self.cancel_gesture = 'open_palm'  # Cancels a pending shutdown
         
         # Gesture detection variables
         self.gesture_detected = False
         self.gesture_start_time = None
         self.required_hold_time = 2.0  # Hold gesture for 2 seconds
         
-    def detect_middle_finger_gesture(self, landmarks):
+    def create_hands(self):
+        """Initialize MediaPipe hands (mediapipe is imported here, or in the worker process)"""
+        options = dict(
+            static_image_mode=False,
+            max_num_hands=1,
+            min_detection_confidence=0.7,
+            min_tracking_confidence=0.5
+        )
+        if self.use_worker:
+            # Drop-in for hands.process; results carry normalized (21, 3) arrays instead of protobufs.
+            # process() is synchronous (submit then wait for the same frame), so capture and
+            # inference do not overlap: this keeps mediapipe out of the main process but adds
+            # a round-trip per frame instead of raising throughput
+            return InferenceWorker('hands', **options)
+        return mp.solutions.hands.Hands(**options)
+    
+    def draw_hand(self, frame, points):
+        """
+        Draw the hand skeleton from the (21, 3) pixel landmark array
+        Works for both protobuf (in-process) and array (worker) results
+        """
+        pixels = points[:, :2].astype(np.int32)
+        cv2.polylines(frame, pixels[HAND_CONNECTIONS], False, (224, 224, 224), 2)
+        for x, y in pixels.tolist():
+            cv2.circle(frame, (x, y), 3, (224, 224, 224), -1)
+            cv2.circle(frame, (x, y), 2, (0, 0, 255), -1)
+    
+    def detect_gestures(self, points, frame_height):
+        """
+        Evaluate every registered gesture rule in one vectorized pass
+        points is the (21, 3) pixel landmark array from LandmarkArray
+        Returns the set of active gesture names
+        """
+        return self.gesture_engine.matches(points, frame_height)
+    
+    def detect_middle_finger_gesture(self, points, frame_height):
         """
         Detect middle finger up gesture (other fingers down)
+        points is the (21, 3) pixel landmark array from LandmarkArray
         Returns True if gesture is detected
         Thumb position is ignored (can be up or down)
         """
-        # Get landmark positions
-        index_tip = landmarks[8]
-        index_pip = landmarks[6]
-        index_mcp = landmarks[5]
-        
-        middle_tip = landmarks[12]
-        middle_pip = landmarks[10]
-        middle_mcp = landmarks[9]
-        
-        ring_tip = landmarks[16]
-        ring_pip = landmarks[14]
-        ring_mcp = landmarks[13]
-        
-        pinky_tip = landmarks[20]
-        pinky_pip = landmarks[18]
-        pinky_mcp = landmarks[17]
-        
-        # Check if middle finger is extended (tip higher than pip and mcp)
-        middle_extended = (middle_tip.y < middle_pip.y) and (middle_tip.y < middle_mcp.y)
-        
-        # Check if other fingers are folded/down (EXCLUDING THUMB)
-        # Index finger: tip should be lower than pip (folded)
-        index_folded = index_tip.y > index_pip.y
-        
-        # Ring finger: tip should be lower than pip (folded)
-        ring_folded = ring_tip.y > ring_pip.y
-        
-        # Pinky finger: tip should be lower than pip (folded)
-        pinky_folded = pinky_tip.y > pinky_pip.y
-        
-        # Additional check: middle finger should be significantly higher than other fingertips
-        # (EXCLUDING THUMB from comparison)
-        middle_highest = (middle_tip.y < index_tip.y - 0.015) and \
-                        (middle_tip.y < ring_tip.y - 0.015) and \
-                        (middle_tip.y < pinky_tip.y - 0.015)
-        
-        # Combine all conditions (THUMB IS IGNORED)
-        gesture_detected = (middle_extended and 
-                          index_folded and 
-                          ring_folded and 
-                          pinky_folded and
-                          middle_highest)
-        
-        return gesture_detected
+        return 'middle_finger' in self.detect_gestures(points, frame_height)
     
-    def shutdown_system(self):
+    def detect_middle_finger_gesture_batch(self, points, frame_height):
+        """
+        Vectorized detect_middle_finger_gesture for a whole session
+        points is a (T, 21, 3) pixel landmark array
+        Returns a (T,) bool array
+        """
+        index = self.gesture_engine.names.index('middle_finger')
+        return self.gesture_engine.evaluate_batch(points, frame_height)[:, index]
+    
+    def shutdown_system(self, requested=None):
         """
         Shutdown the system based on the operating system
+        (Windows: 10 second delay, macOS/Linux: 1 minute delay)
+        The command runs in the action executor and returns immediately;
+        the outcome arrives through self.actions.poll()
+        requested is the perf_counter time of the gesture decision (for latency stats)
         """
-        system = platform.system()
-        
-        try:
-            if system == "Windows":
-                # Windows shutdown command with 10 second delay
-                os.system("shutdown /s /t 10 /c \"System shutdown initiated by gesture\"")
-                print("Windows shutdown initiated in 10 seconds...")
-                
-            elif system == "Darwin":  # macOS
-                # macOS shutdown command with 1 minute delay
-                os.system("sudo shutdown -h +1 \"System shutdown initiated by gesture\"")
-                print("macOS shutdown initiated in 1 minute...")
-                
-            elif system == "Linux":
-                # Linux shutdown command with 1 minute delay
-                os.system("shutdown -h +1 \"System shutdown initiated by gesture\"")
-                print("Linux shutdown initiated in 1 minute...")
-                
-            else:
-                print(f"Unsupported operating system: {system}")
-                return False
-            
-            return True
-        except Exception as e:
-            print(f"Error shutting down system: {e}")
+        STARTUP.mark('first_action')
+        if 'shutdown' not in self.actions.methods:
+            print(f"Unsupported operating system: {self.actions.system}")
             return False
+        
+        start = time.perf_counter()
+        self.actions.submit('shutdown', requested)
+        self.metrics.output('shutdown', start)
+        return True
     
     def cancel_shutdown(self):
         """
         Cancel pending shutdown (in case user wants to abort)
+        Runs after any shutdown command still queued in the action executor
         """
-        system = platform.system()
-        
-        try:
-            if system == "Windows":
-                os.system("shutdown /a")
-                print("Windows shutdown cancelled")
-                
-            elif system == "Darwin":  # macOS
-                os.system("sudo killall shutdown")
-                print("macOS shutdown cancelled")
-                
-            elif system == "Linux":
-                os.system("shutdown -c")
-                print("Linux shutdown cancelled")
-                
-        except Exception as e:
-            print(f"Error cancelling shutdown: {e}")
+        if 'cancel' in self.actions.methods:
+            start = time.perf_counter()
+            self.actions.submit('cancel')
+            self.metrics.output('cancel', start)
+    
+    def handle_action_results(self):
+        """
+        Report completed OS actions without blocking the frame loop
+        Returns False if a shutdown request failed (nothing is pending anymore)
+        """
+        shutdown_ok = True
+        for result in self.actions.poll():
+            if result['action'] == 'shutdown':
+                if result['ok']:
+                    print(f"System shutdown initiated... ({result['method']}, "
+                          f"{result['latency_ms']:.0f} ms after gesture)")
+                else:
+                    print(f"Failed to initiate system shutdown: {result['error']}")
+                    shutdown_ok = False
+            elif result['ok']:
+                print("Shutdown cancelled")
+            else:
+                print(f"Error cancelling shutdown: {result['error']}")
+        return shutdown_ok
     
     def run_detection(self):
         """
         Main detection loop
         """
-        # Initialize camera
-        cap = cv2.VideoCapture(0)
+        # Camera was opened in __init__ (in parallel with model startup)
+        cap = self.cap
         
         if not cap.isOpened():
             print("Error: Could not open camera")
@@ -140,35 +174,58 @@ class HandGestureDetector:
         print("Hand gesture detection started...")
         print("Show middle finger gesture and hold for 2 seconds to activate shutdown")
         print("Press 'q' to quit")
-        print("Press 'c' to cancel pending shutdown")
+        print("Press 'c' or show an open palm to cancel pending shutdown")
         
         shutdown_initiated = False
+        banner_until = 0.0
         
         while True:
+            self.metrics.begin_frame()
+            frame_start = t = TRACER.begin_frame()
             ret, frame = cap.read()
             if not ret:
                 print("Error: Could not read frame")
                 break
+            self.metrics.mark('capture')
+            t = TRACER.span('read', t)
             
             # Flip frame horizontally for mirror effect
             frame = cv2.flip(frame, 1)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            t = TRACER.span('flip', t)
             
-            # Process frame with MediaPipe
-            results = self.hands.process(rgb_frame)
+            # Process frame with MediaPipe (while idle only on sampled frames with motion)
+            if not self.duty_cycle.should_process(frame):
+                results = IDLE_RESULTS
+                t = TRACER.span('duty_cycle', t)
+            elif self.motion_gate.should_infer(frame):
+                t = TRACER.span('motion_gate', t)
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                t = TRACER.span('cvtColor', t)
+                results = self.motion_gate.store(self.hands.process(rgb_frame))
+                t = TRACER.span('process', t)
+                self.duty_cycle.update(bool(results.multi_hand_landmarks), cap.last_timestamp)
+            else:
+                # Static scene: reuse the previous landmarks and gesture decision
+                results = self.motion_gate.results
+                self.duty_cycle.update(bool(results.multi_hand_landmarks))
+                t = TRACER.span('motion_gate', t)
+            self.metrics.mark('inference')
             
             current_time = time.time()
             gesture_detected_now = False
             
             if results.multi_hand_landmarks:
                 for hand_landmarks in results.multi_hand_landmarks:
+                    points = self.landmark_array.update(hand_landmarks, frame.shape[1], frame.shape[0])
+                    
                     # Draw hand landmarks
-                    self.mp_draw.draw_landmarks(
-                        frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS
-                    )
+                    draw_start = TRACER.now()
+                    self.draw_hand(frame, points)
+                    TRACER.span('draw', draw_start)
                     
-                    # Check for gesture
-                    if self.detect_middle_finger_gesture(hand_landmarks.landmark):
+                    # Check all gestures at once
+                    gestures = self.detect_gestures(points, frame.shape[0])
+                    if self.trigger_gesture in gestures:
                         gesture_detected_now = True
                         
                         if not self.gesture_detected:
@@ -188,26 +245,33 @@ class HandGestureDetector:
                         
                         # Check if held long enough
                         if hold_time >= self.required_hold_time and not shutdown_initiated:
-                            cv2.putText(frame, "INITIATING SHUTDOWN!", 
-                                      (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                            cv2.imshow('Hand Gesture Detection', frame)
-                            cv2.waitKey(1000)  # Show message for 1 second
-                            
-                            # Shutdown system
-                            if self.shutdown_system():
-                                print("System shutdown initiated...")
+                            # Shutdown system (non-blocking, message shown for 1 second)
+                            if self.shutdown_system(cap.last_timestamp):
                                 shutdown_initiated = True
+                                banner_until = current_time + 1.0
                             else:
                                 print("Failed to initiate system shutdown")
+                    
+                    elif shutdown_initiated and self.cancel_gesture in gestures:
+                        # Open palm cancels the pending shutdown
+                        self.cancel_shutdown()
+                        shutdown_initiated = False
             
             # Reset gesture detection if not detected
             if not gesture_detected_now:
                 self.gesture_detected = False
                 self.gesture_start_time = None
             
+            # Completed OS actions; a failed shutdown is no longer pending
+            if not self.handle_action_results():
+                shutdown_initiated = False
+            
             # Display status
+            if time.time() < banner_until:
+                cv2.putText(frame, "INITIATING SHUTDOWN!", 
+                          (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
             if shutdown_initiated:
-                cv2.putText(frame, "SHUTDOWN PENDING - Press 'c' to cancel", 
+                cv2.putText(frame, "SHUTDOWN PENDING - 'c' / open palm to cancel", 
                           (10, frame.shape[0] - 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
             
             # Display instructions
@@ -216,11 +280,24 @@ class HandGestureDetector:
             cv2.putText(frame, "Press 'q' to quit, 'c' to cancel shutdown", 
                       (10, frame.shape[0] - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
             
+            self.metrics.mark('features')
+            t = TRACER.span('features', t)
+            
+            if self.duty_cycle.mode == 'idle':
+                cv2.putText(frame, "Idle (low power)", 
+                          (frame.shape[1] - 200, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+            
             # Show frame
             cv2.imshow('Hand Gesture Detection', frame)
+            t = TRACER.span('imshow', t)
             
-            # Check for key press
-            key = cv2.waitKey(1) & 0xFF
+            # Check for key press (while idle this also sleeps until the next sample)
+            key = cv2.waitKey(self.duty_cycle.wait_ms()) & 0xFF
+            TRACER.span('waitKey', t)
+            TRACER.handle_key(key)
+            self.metrics.mark('render')
+            self.metrics.end_frame()
+            TRACER.end_frame(frame_start)
             if key == ord('q'):
                 break
             elif key == ord('c') and shutdown_initiated:
@@ -228,6 +305,17 @@ class HandGestureDetector:
                 shutdown_initiated = False
         
         # Cleanup
+        print(STARTUP.summary())
+        print(self.duty_cycle.summary())
+        print(self.motion_gate.summary())
+        self.actions.stop()
+        self.handle_action_results()
+        print(self.actions.summary())
+        print(cap.summary())
+        if self.use_worker:
+            print(self.hands.summary())
+            self.hands.stop()
+        self.metrics.close()
         cap.release()
         cv2.destroyAllWindows()
 
@@ -236,8 +324,19 @@ def main():
     Main function to run the hand gesture detector
     """
     try:
-        detector = HandGestureDetector()
+        duty_cycle, argv = duty_cycle_from_argv()
+        motion_gate, argv = motion_gate_from_argv(argv)
+        actions, argv = action_executor_from_argv(argv)
+        metrics_server, argv = metrics_server_from_argv(argv)
+        tracer, argv = trace_from_argv(argv)
+        worker, argv = inference_worker_from_argv(argv)
+        detector = HandGestureDetector(source_from_argv(argv), duty_cycle=duty_cycle, motion_gate=motion_gate,
+                                       actions=actions, worker=worker)
         detector.run_detection()
+        if tracer.enabled:
+            tracer.export()
+        if metrics_server is not None:
+            metrics_server.stop()
     except KeyboardInterrupt:
         print("\nProgram interrupted by user")
     except Exception as e:
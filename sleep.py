@@ -1,123 +1,140 @@
 import cv2
-import mediapipe as mp
 import numpy as np
-import os
-import platform
 import time
 
+from capture import ThreadedCapture
+from duty_cycle import IDLE_RESULTS, DutyCycle, duty_cycle_from_argv
+from frame_sources import source_from_argv
+from gesture_rules import GestureRuleEngine
+from inference_worker import InferenceWorker, inference_worker_from_argv
+from landmark_array import HAND_CONNECTIONS, HAND_LANDMARKS, LandmarkArray
+from metrics import PipelineMetrics, metrics_server_from_argv
+from motion_gate import MotionGate, motion_gate_from_argv
+from pipeline_trace import TRACER, trace_from_argv
+from startup import STARTUP, lazy_import, parallel_startup
+from system_actions import ActionExecutor, action_executor_from_argv
+
+# Imported when Hands is built (in parallel with opening the camera)
+mp = lazy_import('mediapipe')
+
 class HandGestureDetector:
-    def __init__(self):
-        # Initialize MediaPipe hands
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.5
-        )
-        self.mp_draw = mp.solutions.drawing_utils
+    def __init__(self, source=0, duty_cycle=None, motion_gate=None, actions=None, worker=False):
+        # Sumber frame: index kamera, file video, folder gambar, atau 'synthetic'
+        self.source = source
+        
+        # worker=True: Hands runs in a separate process (InferenceWorker), mediapipe is never imported here
+        self.use_worker = worker
+        
+        # source=None: no camera or Hands (e.g. landmark replay feeds detect_gestures directly)
+        self.cap, self.hands = None, None
+        if source is not None:
+            # Open the camera while mediapipe loads and Hands is built and warmed up
+            self.cap, self.hands = parallel_startup(
+                lambda: ThreadedCapture(source, width=640, height=480), self.create_hands)
+        
+        # Low-power idle mode: motion-gated Hands at a few FPS until a hand shows up
+        self.duty_cycle = duty_cycle or DutyCycle()
+        
+        # While active, static frames reuse the previous Hands result
+        self.motion_gate = motion_gate or MotionGate()
+        
+        # Per-stage metrics (served over HTTP when --metrics-port is given)
+        self.metrics = PipelineMetrics('sleep_gesture', self.cap)
+        self.metrics.watch('duty_cycle', self.duty_cycle.get_stats)
+        self.metrics.watch('motion_gate', self.motion_gate.get_stats)
+        
+        # OS actions run in a background thread; the suspend method is probed once here
+        self.actions = actions or ActionExecutor()
+        
+        # Reusable (21, 3) landmark buffer
+        self.landmark_array = LandmarkArray(HAND_LANDMARKS)
+        
+        # Declarative gesture rules (gesture_rules.GESTURES), compiled once and evaluated together
+        self.gesture_engine = GestureRuleEngine()
+        self.trigger_gesture = 'middle_finger'
         
         # Gesture detection variables
         self.gesture_detected = False
         self.gesture_start_time = None
         self.required_hold_time = 2.0  # Hold gesture for 2 seconds
         
-    def detect_middle_finger_gesture(self, landmarks):
+    def create_hands(self):
+        """Initialize MediaPipe hands (mediapipe is imported here, or in the worker process)"""
+        options = dict(
+            static_image_mode=False,
+            max_num_hands=1,
+            min_detection_confidence=0.7,
+            min_tracking_confidence=0.5
+        )
+        if self.use_worker:
+            # Drop-in for hands.process; results carry normalized (21, 3) arrays instead of protobufs.
+            # process() is synchronous (submit then wait for the same frame), so capture and
+            # inference do not overlap: this keeps mediapipe out of the main process but adds
+            # a round-trip per frame instead of raising throughput
+            return InferenceWorker('hands', **options)
+        return mp.solutions.hands.Hands(**options)
+    
+    def draw_hand(self, frame, points):
+        """
+        Draw the hand skeleton from the (21, 3) pixel landmark array
+        Works for both protobuf (in-process) and array (worker) results
+        """
+        pixels = points[:, :2].astype(np.int32)
+        cv2.polylines(frame, pixels[HAND_CONNECTIONS], False, (224, 224, 224), 2)
+        for x, y in pixels.tolist():
+            cv2.circle(frame, (x, y), 3, (224, 224, 224), -1)
+            cv2.circle(frame, (x, y), 2, (0, 0, 255), -1)
+    
+    def detect_gestures(self, points, frame_height):
+        """
+        Evaluate every registered gesture rule in one vectorized pass
+        points is the (21, 3) pixel landmark array from LandmarkArray
+        Returns the set of active gesture names
+        """
+        return self.gesture_engine.matches(points, frame_height)
+    
+    def detect_middle_finger_gesture(self, points, frame_height):
         """
         Detect middle finger up gesture (other fingers down)
+        points is the (21, 3) pixel landmark array from LandmarkArray
         Returns True if gesture is detected
         Thumb position is ignored (can be up or down)
         """
-        # Get landmark positions
-        index_tip = landmarks[8]
-        index_pip = landmarks[6]
-        index_mcp = landmarks[5]
-        
-        middle_tip = landmarks[12]
-        middle_pip = landmarks[10]
-        middle_mcp = landmarks[9]
-        
-        ring_tip = landmarks[16]
-        ring_pip = landmarks[14]
-        ring_mcp = landmarks[13]
-        
-        pinky_tip = landmarks[20]
-        pinky_pip = landmarks[18]
-        pinky_mcp = landmarks[17]
-        
-        # Check if middle finger is extended (tip higher than pip and mcp)
-        middle_extended = (middle_tip.y < middle_pip.y) and (middle_tip.y < middle_mcp.y)
-        
-        # Check if other fingers are folded/down (EXCLUDING THUMB)
-        # Index finger: tip should be lower than pip (folded)
-        index_folded = index_tip.y > index_pip.y
-        
-        # Ring finger: tip should be lower than pip (folded)
-        ring_folded = ring_tip.y > ring_pip.y
-        
-        # Pinky finger: tip should be lower than pip (folded)
-        pinky_folded = pinky_tip.y > pinky_pip.y
-        
-        # Additional check: middle finger should be significantly higher than other fingertips
-        # (EXCLUDING THUMB from comparison)
-        middle_highest = (middle_tip.y < index_tip.y - 0.015) and \
-                        (middle_tip.y < ring_tip.y - 0.015) and \
-                        (middle_tip.y < pinky_tip.y - 0.015)
-        
-        # Combine all conditions (THUMB IS IGNORED)
-        gesture_detected = (middle_extended and 
-                          index_folded and 
-                          ring_folded and 
-                          pinky_folded and
-                          middle_highest)
-        
-        return gesture_detected
+        return 'middle_finger' in self.detect_gestures(points, frame_height)
     
-    def put_system_to_sleep(self):
+    def detect_middle_finger_gesture_batch(self, points, frame_height):
+        """
+        Vectorized detect_middle_finger_gesture for a whole session
+        points is a (T, 21, 3) pixel landmark array
+        Returns a (T,) bool array
+        """
+        index = self.gesture_engine.names.index('middle_finger')
+        return self.gesture_engine.evaluate_batch(points, frame_height)[:, index]
+    
+    def put_system_to_sleep(self, requested=None):
         """
         Put the system to sleep based on the operating system
+        The command runs in the action executor (method probed at startup, with
+        the old PowerShell -> psshutdown -> nircmd -> rundll32 fallback on Windows)
+        Returns immediately; the outcome arrives through self.actions.poll()
+        requested is the perf_counter time of the gesture decision (for latency stats)
         """
-        system = platform.system()
-        
-        try:
-            if system == "Windows":
-                # Method 1: PowerShell command untuk true sleep/suspend
-                powershell_cmd = 'powershell "Add-Type -AssemblyName System.Windows.Forms; [System.Windows.Forms.Application]::SetSuspendState([System.Windows.Forms.PowerState]::Suspend, $false, $false)"'
-                result1 = os.system(powershell_cmd)
-                
-                # Method 2: Alternative menggunakan psshutdown (jika tersedia)
-                if result1 != 0:
-                    os.system("psshutdown -d -t 0")
-                
-                # Method 3: Alternative menggunakan nircmd (jika terinstall)
-                if result1 != 0:
-                    os.system("nircmd standby")
-                
-                # Method 4: Fallback ke rundll32 dengan parameter yang berbeda
-                if result1 != 0:
-                    os.system("rundll32.exe powrprof.dll,SetSuspendState Sleep")
-                    
-            elif system == "Darwin":  # macOS
-                # macOS sleep command
-                os.system("pmset sleepnow")
-            elif system == "Linux":
-                # Linux sleep command (requires systemctl)
-                os.system("systemctl suspend")
-            else:
-                print(f"Unsupported operating system: {system}")
-                return False
-            
-            return True
-        except Exception as e:
-            print(f"Error putting system to sleep: {e}")
+        STARTUP.mark('first_action')
+        if 'sleep' not in self.actions.methods:
+            print(f"Unsupported operating system: {self.actions.system}")
             return False
+        
+        start = time.perf_counter()
+        self.actions.submit('sleep', requested)
+        self.metrics.output('sleep', start)
+        return True
     
     def run_detection(self):
         """
         Main detection loop
         """
-        # Initialize camera
-        cap = cv2.VideoCapture(0)
+        # Camera was opened in __init__ (in parallel with model startup)
+        cap = self.cap
         
         if not cap.isOpened():
             print("Error: Could not open camera")
@@ -127,31 +144,55 @@ class HandGestureDetector:
         print("Show middle finger gesture and hold for 2 seconds to activate sleep mode")
         print("Press 'q' to quit")
         
+        sleep_requested = False
+        
         while True:
+            self.metrics.begin_frame()
+            frame_start = t = TRACER.begin_frame()
             ret, frame = cap.read()
             if not ret:
                 print("Error: Could not read frame")
                 break
+            self.metrics.mark('capture')
+            t = TRACER.span('read', t)
             
             # Flip frame horizontally for mirror effect
             frame = cv2.flip(frame, 1)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            t = TRACER.span('flip', t)
             
-            # Process frame with MediaPipe
-            results = self.hands.process(rgb_frame)
+            # Process frame with MediaPipe (while idle only on sampled frames with motion)
+            if not self.duty_cycle.should_process(frame):
+                results = IDLE_RESULTS
+                t = TRACER.span('duty_cycle', t)
+            elif self.motion_gate.should_infer(frame):
+                t = TRACER.span('motion_gate', t)
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                t = TRACER.span('cvtColor', t)
+                results = self.motion_gate.store(self.hands.process(rgb_frame))
+                t = TRACER.span('process', t)
+                self.duty_cycle.update(bool(results.multi_hand_landmarks), cap.last_timestamp)
+            else:
+                # Static scene: reuse the previous landmarks and gesture decision
+                results = self.motion_gate.results
+                self.duty_cycle.update(bool(results.multi_hand_landmarks))
+                t = TRACER.span('motion_gate', t)
+            self.metrics.mark('inference')
             
             current_time = time.time()
             gesture_detected_now = False
             
             if results.multi_hand_landmarks:
                 for hand_landmarks in results.multi_hand_landmarks:
+                    points = self.landmark_array.update(hand_landmarks, frame.shape[1], frame.shape[0])
+                    
                     # Draw hand landmarks
-                    self.mp_draw.draw_landmarks(
-                        frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS
-                    )
+                    draw_start = TRACER.now()
+                    self.draw_hand(frame, points)
+                    TRACER.span('draw', draw_start)
                     
-                    # Check for gesture
-                    if self.detect_middle_finger_gesture(hand_landmarks.landmark):
+                    # Check all gestures at once
+                    gestures = self.detect_gestures(points, frame.shape[0])
+                    if self.trigger_gesture in gestures:
                         gesture_detected_now = True
                         
                         if not self.gesture_detected:
@@ -170,39 +211,76 @@ class HandGestureDetector:
                                   (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
                         
                         # Check if held long enough
-                        if hold_time >= self.required_hold_time:
-                            cv2.putText(frame, "ACTIVATING SLEEP MODE!", 
-                                      (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                            cv2.imshow('Hand Gesture Detection', frame)
-                            cv2.waitKey(1000)  # Show message for 1 second
-                            
-                            # Put system to sleep
-                            if self.put_system_to_sleep():
-                                print("System going to sleep...")
+                        if hold_time >= self.required_hold_time and not sleep_requested:
+                            # Put system to sleep (non-blocking, frames keep flowing)
+                            if self.put_system_to_sleep(cap.last_timestamp):
+                                sleep_requested = True
                             else:
                                 print("Failed to put system to sleep")
-                            
-                            break
+                                # Keep running; a new full hold is needed to try again
+                                self.gesture_detected = False
+                                self.gesture_start_time = None
             
             # Reset gesture detection if not detected
             if not gesture_detected_now:
                 self.gesture_detected = False
                 self.gesture_start_time = None
             
+            # Completed OS actions, collected without waiting
+            for result in self.actions.poll():
+                if result['ok']:
+                    print(f"System going to sleep... ({result['method']}, "
+                          f"{result['latency_ms']:.0f} ms after gesture)")
+                else:
+                    print(f"Failed to put system to sleep: {result['error']}")
+                # Keep detecting after the system resumes (or the command failed);
+                # the next trigger needs a fresh hold
+                sleep_requested = False
+                self.gesture_detected = False
+                self.gesture_start_time = None
+            
+            if sleep_requested:
+                cv2.putText(frame, "ACTIVATING SLEEP MODE!", 
+                          (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+            
             # Display instructions
             cv2.putText(frame, "Show middle finger to activate sleep", 
                       (10, frame.shape[0] - 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
             cv2.putText(frame, "Press 'q' to quit", 
                       (10, frame.shape[0] - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
             
+            self.metrics.mark('features')
+            t = TRACER.span('features', t)
+            
+            if self.duty_cycle.mode == 'idle':
+                cv2.putText(frame, "Idle (low power)", 
+                          (frame.shape[1] - 200, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+            
             # Show frame
             cv2.imshow('Hand Gesture Detection', frame)
+            t = TRACER.span('imshow', t)
             
-            # Check for quit
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            # Check for quit (while idle this also sleeps until the next sample)
+            key = cv2.waitKey(self.duty_cycle.wait_ms()) & 0xFF
+            TRACER.span('waitKey', t)
+            TRACER.handle_key(key)
+            self.metrics.mark('render')
+            self.metrics.end_frame()
+            TRACER.end_frame(frame_start)
+            if key == ord('q'):
                 break
         
         # Cleanup
+        print(STARTUP.summary())
+        print(self.duty_cycle.summary())
+        print(self.motion_gate.summary())
+        self.actions.stop()
+        print(self.actions.summary())
+        print(cap.summary())
+        if self.use_worker:
+            print(self.hands.summary())
+            self.hands.stop()
+        self.metrics.close()
         cap.release()
         cv2.destroyAllWindows()
 
@@ -211,8 +289,19 @@ def main():
     Main function to run the hand gesture detector
     """
     try:
-        detector = HandGestureDetector()
+        duty_cycle, argv = duty_cycle_from_argv()
+        motion_gate, argv = motion_gate_from_argv(argv)
+        actions, argv = action_executor_from_argv(argv)
+        metrics_server, argv = metrics_server_from_argv(argv)
+        tracer, argv = trace_from_argv(argv)
+        worker, argv = inference_worker_from_argv(argv)
+        detector = HandGestureDetector(source_from_argv(argv), duty_cycle=duty_cycle, motion_gate=motion_gate,
+                                       actions=actions, worker=worker)
         detector.run_detection()
+        if tracer.enabled:
+            tracer.export()
+        if metrics_server is not None:
+            metrics_server.stop()
     except KeyboardInterrupt:
         print("\nProgram interrupted by user")
     except Exception as e:
@@ -0,0 +1,102 @@
+import importlib.util
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+class StartupTimer:
+    """Timeline startup proses: kapan kamera, model, warm-up, frame pertama dan aksi pertama siap.
+
+    mark() hanya mencatat kemunculan pertama setiap nama sehingga aman
+    dipanggil di hot path (satu lookup dict setelah tercatat).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.start = time.perf_counter()
+        self.marks = {}
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.start
+
+    def get_stats(self):
+        return {name: round(elapsed, 4) for name, elapsed in self.marks.items()}
+
+    def summary(self):
+        if not self.marks:
+            return "Startup: belum ada tahap tercatat"
+        stages = ", ".join(f"{name} {elapsed:.2f}s" for name, elapsed in self.marks.items())
+        first_action = self.marks.get('first_action')
+        if first_action is None:
+            return f"Startup: {stages} (belum ada aksi)"
+        return f"Startup: {stages} -> time-to-first-action {first_action:.2f}s"
+
+
+# Satu timeline per proses, dimulai saat modul ini pertama kali diimpor
+STARTUP = StartupTimer()
+
+
+def lazy_import(name):
+    """Modul yang baru benar-benar dieksekusi saat atributnya pertama kali diakses.
+
+    Dipakai untuk dependensi berat (mediapipe) agar tidak dimuat oleh proses
+    yang tidak memakainya (misal parent LandmarkBus dengan --worker), dan agar
+    impor terjadi di dalam parallel_startup() bersamaan dengan pembukaan kamera.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def warm_up(model, width=640, height=480):
+    """Satu inference pada frame hitam agar inisialisasi graph tidak jatuh di frame nyata pertama"""
+    model.process(np.zeros((height, width, 3), dtype=np.uint8))
+    STARTUP.mark('warmup_done')
+
+
+def parallel_startup(open_camera, build_model, warmup_size=(640, 480)):
+    """Buka kamera di thread terpisah sambil membangun (dan warm-up) model di thread utama.
+
+    Negosiasi kamera (VideoCapture + set()) sebagian besar menunggu driver
+    dengan GIL dilepas, sehingga impor mediapipe dan konstruksi model bisa
+    berjalan bersamaan. Mengembalikan (cap, model).
+    """
+    camera = {}
+
+    def _open():
+        try:
+            camera['cap'] = open_camera()
+            STARTUP.mark('camera_ready')
+        except Exception as e:
+            camera['error'] = e
+
+    thread = threading.Thread(target=_open, name="CameraStartup", daemon=True)
+    thread.start()
+    try:
+        model = build_model()
+        STARTUP.mark('model_ready')
+        if warmup_size is not None:
+            warm_up(model, *warmup_size)
+    except Exception:
+        thread.join()
+        if 'cap' in camera:
+            camera['cap'].release()
+        raise
+
+    thread.join()
+    if 'error' in camera:
+        model.close()
+        raise camera['error']
+    return camera['cap'], model
@@ -0,0 +1,280 @@
+import argparse
+import platform
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+SHUTDOWN_MESSAGE = "System shutdown initiated by gesture"
+
+# Per OS dan aksi: daftar kandidat (nama, argv, probe). Dicoba berurutan;
+# probe = (argv, stdout yang diharapkan atau None) atau None (cukup executable ada).
+# sudo memakai -n: aksi berjalan di background, jadi tidak boleh menunggu prompt password.
+ACTION_METHODS = {
+    'Windows': {
+        'sleep': [
+            ('powershell', ['powershell', '-NoProfile', '-Command',
+                            "Add-Type -AssemblyName System.Windows.Forms; "
+                            "[System.Windows.Forms.Application]::SetSuspendState("
+                            "[System.Windows.Forms.PowerState]::Suspend, $false, $false)"], None),
+            ('psshutdown', ['psshutdown', '-d', '-t', '0'], None),
+            ('nircmd', ['nircmd', 'standby'], None),
+            ('rundll32', ['rundll32.exe', 'powrprof.dll,SetSuspendState', 'Sleep'], None),
+        ],
+        'shutdown': [('shutdown', ['shutdown', '/s', '/t', '10', '/c', SHUTDOWN_MESSAGE], None)],
+        'cancel': [('shutdown', ['shutdown', '/a'], None)],
+    },
+    'Darwin': {
+        'sleep': [('pmset', ['pmset', 'sleepnow'], None)],
+        'shutdown': [('shutdown', ['sudo', '-n', 'shutdown', '-h', '+1', SHUTDOWN_MESSAGE], None)],
+        'cancel': [('killall', ['sudo', '-n', 'killall', 'shutdown'], None)],
+    },
+    'Linux': {
+        'sleep': [('systemctl', ['systemctl', 'suspend'], (['systemctl', 'can-suspend'], 'yes'))],
+        'shutdown': [('shutdown', ['shutdown', '-h', '+1', SHUTDOWN_MESSAGE], None)],
+        'cancel': [('shutdown', ['shutdown', '-c'], None)],
+    },
+}
+
+
+def stub_methods(delay=0.0, fail_first=False):
+    """Kandidat pengganti untuk uji di Linux/CI: proses Python yang hanya mencetak aksi.
+
+    delay mensimulasikan waktu eksekusi perintah; fail_first menambah kandidat
+    gagal di depan agar jalur fallback ikut teruji.
+    """
+    methods = {}
+    for action in ('sleep', 'shutdown', 'cancel'):
+        script = f"import time; time.sleep({delay}); print('{action} (stub)')"
+        candidates = [('stub', [sys.executable, '-c', script], None)]
+        if fail_first:
+            candidates.insert(0, ('stub_fail', [sys.executable, '-c', 'raise SystemExit(1)'], None))
+        methods[action] = candidates
+    return methods
+
+
+class ActionExecutor:
+    """Jalankan aksi OS (sleep/shutdown/cancel) lewat subprocess di thread terpisah.
+
+    Saat start, thread executor mem-probe sekali metode mana yang tersedia
+    untuk setiap aksi dan menyimpannya (selected). submit() langsung kembali;
+    perintah dijalankan dengan timeout, dan jika gagal kandidat berikutnya
+    dicoba (seperti rantai fallback os.system lama). Hasil diambil loop
+    vision lewat poll() tanpa menunggu.
+    """
+
+    def __init__(self, methods=None, timeout=10.0, system=None):
+        self.system = system or platform.system()
+        self.methods = methods if methods is not None else ACTION_METHODS.get(self.system, {})
+        self.timeout = timeout
+
+        self.selected = {}  # aksi -> (nama, argv) hasil probe
+        self.probed = threading.Event()
+        self.probe_time = None
+        self._jobs = queue.Queue()
+        self._results = deque()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        # Statistik
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self._latencies = deque(maxlen=100)  # request -> perintah selesai (detik)
+        self._launch_latencies = deque(maxlen=100)  # request -> proses berjalan
+
+        self._thread = threading.Thread(target=self._worker, name="ActionExecutor", daemon=True)
+        self._thread.start()
+
+    def _probe_method(self, name, argv, probe):
+        if shutil.which(argv[0]) is None:
+            return False
+        if probe is None:
+            return True
+        probe_argv, expected = probe
+        try:
+            result = subprocess.run(probe_argv, capture_output=True, text=True, timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        if result.returncode != 0:
+            return False
+        return expected is None or result.stdout.strip() == expected
+
+    def _probe(self):
+        """Pilih kandidat pertama yang lolos probe untuk setiap aksi"""
+        start = time.perf_counter()
+        for action, candidates in self.methods.items():
+            for name, argv, probe in candidates:
+                if self._probe_method(name, argv, probe):
+                    self.selected[action] = (name, argv)
+                    break
+        self.probe_time = time.perf_counter() - start
+        self.probed.set()
+
+    def available(self, action):
+        """Nama metode hasil probe untuk aksi ini, atau None (menunggu probe selesai)"""
+        self.probed.wait()
+        method = self.selected.get(action)
+        return method[0] if method else None
+
+    def submit(self, action, requested=None):
+        """Jadwalkan aksi; requested = perf_counter saat keputusan gesture dibuat"""
+        if action not in self.methods:
+            raise ValueError(f"Aksi tidak dikenal untuk {self.system}: {action}")
+        with self._lock:
+            self._pending += 1
+            self.submitted += 1
+        self._jobs.put((action, requested if requested is not None else time.perf_counter()))
+
+    @property
+    def busy(self):
+        with self._lock:
+            return self._pending > 0
+
+    def poll(self):
+        """Ambil hasil aksi yang sudah selesai (list dict), tanpa menunggu"""
+        results = []
+        while self._results:
+            results.append(self._results.popleft())
+        return results
+
+    def _candidates(self, action):
+        """Metode hasil probe dulu, lalu kandidat lain sebagai fallback"""
+        chosen = self.selected.get(action)
+        candidates = [(name, argv) for name, argv, _ in self.methods[action]]
+        if chosen is not None:
+            candidates.remove(chosen)
+            candidates.insert(0, chosen)
+        return candidates
+
+    def _run(self, action, requested):
+        errors = []
+        for name, argv in self._candidates(action):
+            try:
+                process = subprocess.Popen(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                           stdin=subprocess.DEVNULL)
+            except OSError as e:
+                errors.append(f"{name}: {e}")
+                continue
+            self._launch_latencies.append(time.perf_counter() - requested)
+            try:
+                returncode = process.wait(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                errors.append(f"{name}: timeout {self.timeout:.0f}s")
+                continue
+            if returncode == 0:
+                # Metode yang berhasil dipakai lebih dulu untuk aksi berikutnya
+                self.selected[action] = (name, argv)
+                return {'action': action, 'ok': True, 'method': name, 'error': None}
+            errors.append(f"{name}: exit {returncode}")
+        return {'action': action, 'ok': False, 'method': None,
+                'error': "; ".join(errors) or "tidak ada metode untuk OS ini"}
+
+    def _worker(self):
+        self._probe()
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            action, requested = job
+            result = self._run(action, requested)
+            result['latency_ms'] = (time.perf_counter() - requested) * 1000
+            self._latencies.append(result['latency_ms'] / 1000)
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+                if not result['ok']:
+                    self.failed += 1
+            self._results.append(result)
+
+    def stop(self, wait=True):
+        """Hentikan thread setelah aksi yang sudah dijadwalkan selesai"""
+        self._jobs.put(None)
+        if wait:
+            self._thread.join(timeout=self.timeout * 2)
+
+    def get_stats(self):
+        latencies = np.asarray(self._latencies, dtype=np.float64) * 1000
+        launch = np.asarray(self._launch_latencies, dtype=np.float64) * 1000
+        return {
+            'selected': {action: method[0] for action, method in self.selected.items()},
+            'probe_ms': round(self.probe_time * 1000, 1) if self.probe_time is not None else None,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'launch_mean_ms': float(launch.mean()) if launch.size else 0.0,
+            'latency_mean_ms': float(latencies.mean()) if latencies.size else 0.0,
+            'latency_max_ms': float(latencies.max()) if latencies.size else 0.0,
+        }
+
+    def summary(self):
+        stats = self.get_stats()
+        selected = ", ".join(f"{a}={m}" for a, m in stats['selected'].items()) or "tidak ada"
+        return (f"Aksi OS: metode {selected} (probe {stats['probe_ms']} ms), {stats['completed']}/"
+                f"{stats['submitted']} selesai, {stats['failed']} gagal, gesture->aksi "
+                f"{stats['latency_mean_ms']:.0f} ms (proses jalan {stats['launch_mean_ms']:.0f} ms)")
+
+
+def action_executor_from_argv(argv=None):
+    """Ambil opsi --stub-actions dari command line, kembalikan (ActionExecutor, argumen sisanya)"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--stub-actions', action='store_true',
+                        help="jalankan perintah stub (hanya mencetak) alih-alih sleep/shutdown sungguhan")
+    parser.add_argument('--action-timeout', type=float, default=10.0,
+                        help="timeout per perintah OS (detik)")
+    args, remaining = parser.parse_known_args(argv)
+    methods = stub_methods() if args.stub_actions else None
+    return ActionExecutor(methods, timeout=args.action_timeout), remaining
+
+
+def main():
+    """Uji di Linux dengan perintah stub: stall loop frame dan latency gesture->aksi"""
+    parser = argparse.ArgumentParser(description="Benchmark executor aksi OS dengan perintah stub")
+    parser.add_argument('--actions', type=int, default=10, help="jumlah aksi yang dipicu")
+    parser.add_argument('--delay', type=float, default=0.2, help="lama eksekusi perintah stub (detik)")
+    args = parser.parse_args()
+
+    methods = stub_methods(args.delay, fail_first=True)
+    frame_interval = 1 / 30
+
+    def frame_loop(trigger):
+        """Loop 30 FPS yang memicu aksi setiap 10 frame; kembalikan waktu frame terlama (ms)"""
+        worst = 0.0
+        for frame in range(args.actions * 10):
+            start = time.perf_counter()
+            if frame % 10 == 0:
+                trigger()
+            worst = max(worst, time.perf_counter() - start)
+            time.sleep(max(0.0, frame_interval - (time.perf_counter() - start)))
+        return worst * 1000
+
+    # Baseline: perintah dijalankan blocking di loop (seperti os.system lama), termasuk fallback
+    def blocking():
+        for _, argv, _ in methods['sleep']:
+            if subprocess.call(argv) == 0:
+                break
+
+    print(f"Blocking os.system-style : frame terlama {frame_loop(blocking):7.1f} ms")
+
+    executor = ActionExecutor(methods, timeout=5.0)
+    executor.available('sleep')
+    worst = frame_loop(lambda: executor.submit('sleep'))
+    executor.stop()
+    stats = executor.get_stats()
+    print(f"ActionExecutor           : frame terlama {worst:7.1f} ms")
+    print(f"  probe {stats['probe_ms']} ms -> {stats['selected']}")
+    print(f"  {stats['completed']}/{stats['submitted']} selesai, {stats['failed']} gagal; "
+          f"gesture->proses jalan {stats['launch_mean_ms']:.1f} ms, "
+          f"gesture->selesai {stats['latency_mean_ms']:.1f} ms (stub {args.delay * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()